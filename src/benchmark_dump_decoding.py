@@ -0,0 +1,130 @@
+# %%
+# Imports #
+
+import os
+import time
+
+import pandas as pd
+
+from dump_catalog import get_dump_file_path
+from open_library_dump import (
+    DICT_JSON_DECODERS,
+    DUMP_LINE_SKIP,
+    DumpFile,
+    RevisionMap,
+    parse_dump_line,
+)
+from utils.display_tools import pprint_df, pprint_dict, pprint_ls  # noqa
+
+# %%
+# Variables #
+
+book_data_dir = os.path.join("F:\\", "book-data")
+
+SAMPLE_LINES = 200000  # Number of lines read from the start of the dump
+REPEATS = 3  # Best of this many runs is reported
+
+
+# %%
+# Sample #
+
+
+def read_sample_lines(dump_file_path, num_lines=SAMPLE_LINES):
+    """Read the first lines of a dump file (.txt or .txt.gz) into memory."""
+    ls_lines = []
+    with DumpFile(dump_file_path) as dump_file:
+        for line in dump_file:
+            ls_lines.append(line)
+            if len(ls_lines) >= num_lines:
+                break
+
+    print(f"Sampled {len(ls_lines)} lines from {dump_file_path}")
+    return ls_lines
+
+
+def time_best_of(function, repeats=REPEATS):
+    """Run a function a few times and return the fastest time in seconds."""
+    ls_seconds = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function()
+        ls_seconds.append(time.perf_counter() - start_time)
+    return min(ls_seconds)
+
+
+# %%
+# Benchmarks #
+
+
+def benchmark_dump_decoding(ls_lines):
+    """
+    Compare the JSON decoders and the prefix checks on a sample of dump lines.
+
+    - decode_<name>: decode every JSON blob with one of the installed decoders
+    - parse_dump_line: the full line parse used by the loaders
+    - parse_dump_line_unchanged: every line is already stored, so the revision
+      check skips the JSON decode
+    - parse_dump_line_other_type: the type filter rejects every line before
+      the JSON decode
+
+    Returns:
+        DataFrame: One row per case with seconds, lines/sec and MB/sec.
+    """
+    ls_blobs = [line.rstrip("\n").split("\t")[4] for line in ls_lines]
+    sample_mb = sum(len(line) for line in ls_lines) / (1024 * 1024)
+
+    ls_keys_revisions = []
+    for line in ls_lines:
+        parts = line.split("\t")
+        ls_keys_revisions.append((parts[1], parts[2]))
+    revision_map = RevisionMap(ls_keys_revisions)
+
+    dict_cases = {}
+    for decoder_name, decode in DICT_JSON_DECODERS.items():
+        dict_cases[f"decode_{decoder_name}"] = lambda decode=decode: [
+            decode(blob) for blob in ls_blobs
+        ]
+    dict_cases["parse_dump_line"] = lambda: [parse_dump_line(line) for line in ls_lines]
+    dict_cases["parse_dump_line_unchanged"] = lambda: [
+        parse_dump_line(line, revision_map=revision_map) for line in ls_lines
+    ]
+    dict_cases["parse_dump_line_other_type"] = lambda: [
+        parse_dump_line(line, line_types={"/type/none"}) for line in ls_lines
+    ]
+
+    # every line must really be skipped for the skip cases to be meaningful
+    if not all(
+        parse_dump_line(line, revision_map=revision_map) is DUMP_LINE_SKIP
+        for line in ls_lines
+        if line.strip()
+    ):
+        raise ValueError("The revision map does not skip every sample line")
+
+    ls_results = []
+    for case_name, function in dict_cases.items():
+        seconds = time_best_of(function)
+        ls_results.append(
+            {
+                "case": case_name,
+                "seconds": round(seconds, 3),
+                "lines_per_sec": round(len(ls_lines) / seconds),
+                "mb_per_sec": round(sample_mb / seconds, 1),
+            }
+        )
+
+    return pd.DataFrame(ls_results)
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    # the same dump file the loaders pick from the catalog
+    works_dump_path = get_dump_file_path(book_data_dir, "works")
+
+    ls_sample_lines = read_sample_lines(works_dump_path)
+    df_results = benchmark_dump_decoding(ls_sample_lines)
+    pprint_df(df_results)
+
+
+# %%
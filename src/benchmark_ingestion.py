@@ -0,0 +1,296 @@
+# %%
+# Imports #
+
+import glob
+import importlib
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from open_library_dump import DumpFile
+from synthetic_dump import write_synthetic_dumps
+from utils.display_tools import pprint_df, pprint_dict, pprint_ls  # noqa
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# %%
+# Variables #
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+benchmark_dir = os.path.join(project_root, "data", "benchmarks")
+
+# (num_authors, num_works) of each synthetic dump size
+LS_BENCHMARK_SIZES = [(20000, 50000), (100000, 250000)]
+GZIP_DUMPS = True  # Benchmark reading .txt.gz like the published dumps
+RUN_POSTGRES = True  # Needs a running Postgres test instance
+# The Postgres benchmarks drop and reload the tables of this database
+BENCHMARK_POSTGRES_DB = os.getenv("BENCHMARK_POSTGRES_DB", "book_bot_benchmark")
+
+# case name: (database, authors loader, works loader, loader kwargs)
+DICT_SQLITE_CASES = {
+    "sqlite_serial": (
+        "sqlite",
+        "load_db_authors_sqlite",
+        "load_db_works_sqlite",
+        {},
+    ),
+    "sqlite_bulk": (
+        "sqlite",
+        "load_db_authors_sqlite_bulk",
+        "load_db_works_sqlite_bulk",
+        {},
+    ),
+}
+DICT_POSTGRES_CASES = {
+    "postgres_upsert": (
+        "postgres",
+        "load_db_authors_postgres",
+        "load_db_works_postgres",
+        {},
+    ),
+    "postgres_copy": (
+        "postgres",
+        "load_db_authors_postgres_copy",
+        "load_db_works_postgres_copy",
+        {},
+    ),
+    "postgres_copy_fresh_build": (
+        "postgres",
+        "load_db_authors_postgres_copy",
+        "load_db_works_postgres_copy",
+        {"fresh_build": True},
+    ),
+    "postgres_pipeline": (
+        "postgres",
+        "load_db_authors_postgres_pipeline",
+        "load_db_works_postgres_pipeline",
+        {},
+    ),
+    "postgres_parallel": (
+        "postgres",
+        "load_db_authors_postgres_parallel",
+        "load_db_works_postgres_parallel",
+        {},
+    ),
+}
+
+
+# %%
+# Measurements #
+
+
+def get_peak_rss_mb(children=False):
+    """
+    Peak resident memory in MB of this process, or of its largest finished child
+    process with `children` (e.g. the parse pool of the parallel loaders).
+
+    Returns None where the resource module is not available.
+    """
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    max_rss = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    if sys.platform == "darwin":
+        return round(max_rss / (1024 * 1024), 1)
+    return round(max_rss / 1024, 1)
+
+
+def get_sqlite_bytes_written(sqlite_db_path):
+    """Size of the database file and its WAL/journal files."""
+    return sum(os.path.getsize(path) for path in glob.glob(f"{sqlite_db_path}*"))
+
+
+def get_postgres_sizes(pg_cursor):
+    """Return (bytes of the loaded tables and indexes, current WAL position)."""
+    pg_cursor.execute(
+        """
+        SELECT
+            COALESCE(SUM(pg_total_relation_size(c.oid)), 0),
+            pg_current_wal_lsn()
+        FROM pg_class c
+        WHERE c.relkind = 'r'
+        AND c.relnamespace = current_schema()::regnamespace
+        AND c.relname IN (
+            'authors', 'works', 'work_authors', 'editions', 'edition_isbns',
+            'redirects'
+        );
+        """
+    )
+    return pg_cursor.fetchone()
+
+
+def reset_postgres_tables(local_database_postgres, fresh_build):
+    """Drop the loaded tables and create them for the next benchmark case."""
+    pg_conn = local_database_postgres.get_connection()
+    try:
+        with pg_conn.cursor() as pg_cursor:
+            pg_cursor.execute(
+                """
+                DROP TABLE IF EXISTS
+                    edition_isbns, editions, work_authors, works, authors, redirects;
+                """
+            )
+        pg_conn.commit()
+    finally:
+        local_database_postgres.release_connection(pg_conn)
+
+    if fresh_build:
+        local_database_postgres.ensure_postgres_fresh_build_tables()
+    else:
+        local_database_postgres.ensure_postgres_tables()
+
+
+# %%
+# Benchmarks #
+
+
+def run_loader_case(case_name, case, authors_dump_path, works_dump_path):
+    """
+    Load both dumps with one loader pair and measure it.
+
+    Runs in its own process, so the loader module connects to the benchmark
+    database and the peak RSS only covers this case.
+
+    Returns:
+        dict: Rows, seconds, rows/sec, peak RSS and bytes written of the case.
+    """
+    database, authors_loader_name, works_loader_name, dict_kwargs = case
+
+    if database == "sqlite":
+        sqlite_db_path = os.path.join(benchmark_dir, f"{case_name}.db")
+        for path in glob.glob(f"{sqlite_db_path}*"):
+            os.remove(path)
+        os.environ["SQLITE_DB_PATH"] = sqlite_db_path
+        loader_module = importlib.import_module("local_database_sqlite")
+    else:
+        os.environ["POSTGRES_DB"] = BENCHMARK_POSTGRES_DB
+        loader_module = importlib.import_module("local_database_postgres")
+        fresh_build = dict_kwargs.get("fresh_build", False)
+        reset_postgres_tables(loader_module, fresh_build)
+        pg_conn = loader_module.get_connection()
+        pg_conn.autocommit = True
+        with pg_conn.cursor() as pg_cursor:
+            pg_cursor.execute("SELECT pg_current_wal_lsn();")
+            start_wal_lsn = pg_cursor.fetchone()[0]
+
+    start_time = time.perf_counter()
+    getattr(loader_module, authors_loader_name)(authors_dump_path, **dict_kwargs)
+    getattr(loader_module, works_loader_name)(works_dump_path, **dict_kwargs)
+    if database == "postgres" and fresh_build:
+        loader_module.finalize_postgres_fresh_build()
+    seconds = time.perf_counter() - start_time
+
+    dict_result = {"case": case_name, "seconds": round(seconds, 2)}
+    if database == "sqlite":
+        loader_module.sqlite_conn.close()
+        dict_result["table_bytes"] = get_sqlite_bytes_written(sqlite_db_path)
+        dict_result["wal_bytes"] = None
+    else:
+        with pg_conn.cursor() as pg_cursor:
+            table_bytes, end_wal_lsn = get_postgres_sizes(pg_cursor)
+            pg_cursor.execute(
+                "SELECT pg_wal_lsn_diff(%s, %s);", (end_wal_lsn, start_wal_lsn)
+            )
+            dict_result["table_bytes"] = int(table_bytes)
+            dict_result["wal_bytes"] = int(pg_cursor.fetchone()[0])
+        loader_module.release_connection(pg_conn)
+
+    dict_result["peak_rss_mb"] = get_peak_rss_mb()
+    dict_result["peak_child_rss_mb"] = get_peak_rss_mb(children=True)
+    return dict_result
+
+
+def count_dump_lines(dump_file_path):
+    """Count the lines of a synthetic dump, the number of rows a full load writes."""
+    with DumpFile(dump_file_path) as dump_file:
+        return sum(1 for _ in dump_file)
+
+
+def benchmark_ingestion(ls_sizes=LS_BENCHMARK_SIZES, run_postgres=RUN_POSTGRES):
+    """
+    Load synthetic dumps of each size with every loader and report throughput.
+
+    Each case runs in a fresh process so peak RSS is measured per loader.
+    `table_bytes` is the size of the loaded database (SQLite file with its WAL,
+    or the Postgres tables with their indexes) and `wal_bytes` is the Postgres
+    WAL written during the load.
+
+    Returns:
+        DataFrame: One row per (size, loader) case.
+    """
+    if run_postgres and BENCHMARK_POSTGRES_DB == "book_bot":
+        raise ValueError("The Postgres benchmarks drop tables, use a test database")
+
+    dict_cases = dict(DICT_SQLITE_CASES)
+    if run_postgres:
+        dict_cases.update(DICT_POSTGRES_CASES)
+
+    ls_results = []
+    for num_authors, num_works in ls_sizes:
+        authors_dump_path, works_dump_path = write_synthetic_dumps(
+            benchmark_dir, num_authors, num_works, gzip_files=GZIP_DUMPS
+        )
+        dump_bytes = os.path.getsize(authors_dump_path) + os.path.getsize(
+            works_dump_path
+        )
+        num_rows = count_dump_lines(authors_dump_path) + count_dump_lines(
+            works_dump_path
+        )
+
+        for case_name, case in dict_cases.items():
+            # spawn so the child imports the loader module with the benchmark database
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                dict_result = executor.submit(
+                    run_loader_case,
+                    case_name,
+                    case,
+                    authors_dump_path,
+                    works_dump_path,
+                ).result()
+
+            dict_result["authors"] = num_authors
+            dict_result["works"] = num_works
+            dict_result["dump_bytes"] = dump_bytes
+            dict_result["rows_per_sec"] = round(num_rows / dict_result["seconds"])
+            ls_results.append(dict_result)
+            pprint_dict(dict_result)
+
+    return pd.DataFrame(ls_results)[
+        [
+            "authors",
+            "works",
+            "case",
+            "seconds",
+            "rows_per_sec",
+            "peak_rss_mb",
+            "peak_child_rss_mb",
+            "dump_bytes",
+            "table_bytes",
+            "wal_bytes",
+        ]
+    ]
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    df_results = benchmark_ingestion()
+    pprint_df(df_results)
+    df_results.to_csv(
+        os.path.join(benchmark_dir, f"ingestion_{time.strftime('%Y%m%d_%H%M%S')}.csv"),
+        index=False,
+    )
+
+
+# %%
@@ -0,0 +1,525 @@
+# %%
+# Imports #
+
+import datetime
+import itertools
+import json
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+from dump_catalog import get_dump_file_path
+from open_library_dump import (
+    DICT_RECORD_LINE_TYPES,
+    REDIRECT_LINE_TYPE,
+    DumpFile,
+    get_redirect_row,
+    get_work_row_and_author_keys,
+    iter_dump_lines_with_progress,
+    iter_dump_records,
+)
+from utils.display_tools import pprint_df, pprint_dict, pprint_ls  # noqa
+
+# %%
+# Variables #
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATALOG_INDEX_DIR = os.path.join(project_root, "data", "catalog_index")
+book_data_dir = os.path.join("F:\\", "book-data")
+
+# magic, token count, work count, author count, metadata bytes
+CATALOG_INDEX_HEADER = struct.Struct("<8sQQQQ")
+CATALOG_INDEX_MAGIC = b"OLCATIX1"
+
+# Runs of letters and digits of the normalized text, "_" separates tokens
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+CATALOG_RESULT_LIMIT = 50
+
+# Rows fetched per round trip by the server-side cursors of a psycopg2 connection
+CATALOG_CURSOR_ITERSIZE = 100000
+
+# Posting arrays are intersected as sets when the longest one is less than
+# this many times as long as the shortest
+DENSE_POSTINGS_RATIO = 4
+
+
+# %%
+# Tokens #
+
+
+def normalize_text(text):
+    """Casefold text and strip its accents, so "Émile" and "emile" match."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def get_text_tokens(text):
+    """Split text into the normalized tokens indexed for titles."""
+    return TOKEN_PATTERN.findall(normalize_text(text))
+
+
+# %%
+# Sources #
+
+
+def iter_catalog_rows_from_dumps(authors_dump_path, works_dump_path):
+    """
+    Read the author names and works of an authors and a works dump.
+
+    Links to a redirected author are pointed at its target, one hop like the
+    loaders. Authors are held in a dict, about 100 bytes per author.
+
+    Returns:
+        tuple: (dict_author_names, work_rows) where work_rows is a generator
+            of (work_key, title, author_keys).
+    """
+    dict_author_names = {}
+    dict_author_redirects = {}
+    line_types = {DICT_RECORD_LINE_TYPES["authors"], REDIRECT_LINE_TYPE}
+    with DumpFile(authors_dump_path) as dump_file:
+        lines = iter_dump_lines_with_progress(dump_file, "Reading Authors")
+        for line_type, line_key, _, _, record in iter_dump_records(
+            lines, line_types=line_types
+        ):
+            if line_type == REDIRECT_LINE_TYPE:
+                _, target = get_redirect_row(line_type, line_key, record)
+                if target:
+                    dict_author_redirects[line_key] = target
+            else:
+                dict_author_names[line_key] = record.get("name") or ""
+
+    def iter_work_rows():
+        with DumpFile(works_dump_path) as dump_file:
+            lines = iter_dump_lines_with_progress(dump_file, "Reading Works")
+            records = iter_dump_records(
+                lines, line_types={DICT_RECORD_LINE_TYPES["works"]}
+            )
+            for _, line_key, line_revision, line_last_modified, record in records:
+                work_row, author_keys = get_work_row_and_author_keys(
+                    line_key, line_revision, line_last_modified, record
+                )
+                yield line_key, work_row[3], [
+                    dict_author_redirects.get(author_key, author_key)
+                    for author_key in author_keys
+                ]
+
+    return dict_author_names, iter_work_rows()
+
+
+def get_catalog_cursor(conn, name):
+    """
+    Cursor for one catalog read of `conn`. A psycopg2 connection gets a named
+    server-side cursor, so its rows arrive CATALOG_CURSOR_ITERSIZE at a time
+    rather than all at once, a sqlite3 cursor already steps through them.
+    """
+    if isinstance(conn, sqlite3.Connection):
+        return conn.cursor()
+    cursor = conn.cursor(name=name)
+    cursor.itersize = CATALOG_CURSOR_ITERSIZE
+    return cursor
+
+
+def iter_catalog_rows_from_tables(conn):
+    """
+    Read the author names and works of the `authors`, `works` and
+    `work_authors` tables, from a sqlite3 or psycopg2 connection.
+
+    Returns:
+        tuple: (dict_author_names, work_rows) like iter_catalog_rows_from_dumps.
+    """
+    cursor = get_catalog_cursor(conn, "catalog_authors")
+    cursor.execute("SELECT author_key, name FROM authors")
+    dict_author_names = {author_key: name or "" for author_key, name in cursor}
+    cursor.close()
+
+    def iter_work_rows():
+        cursor = get_catalog_cursor(conn, "catalog_works")
+        try:
+            # links arrive grouped by work, so a work is complete when the key changes
+            cursor.execute(
+                """
+                SELECT w.work_key, w.title, wa.author_key
+                FROM works w
+                LEFT JOIN work_authors wa ON wa.work_key = w.work_key
+                ORDER BY w.work_key
+                """
+            )
+            for work_key, rows in itertools.groupby(cursor, key=lambda row: row[0]):
+                rows = list(rows)
+                yield work_key, rows[0][1], [row[2] for row in rows if row[2]]
+        finally:
+            cursor.close()
+
+    return dict_author_names, iter_work_rows()
+
+
+# %%
+# Build #
+
+
+def append_string(blob, offsets, text):
+    blob += (text or "").encode("utf-8")
+    offsets.append(len(blob))
+
+
+def build_catalog_index(index_path, dict_author_names, work_rows, source=None):
+    """
+    Write a memory-mappable inverted index of work titles with their authors.
+
+    Every normalized title token maps to the sorted ids of the works whose
+    title contains it, stored as uint32 posting arrays. The works' keys,
+    titles and author ids and the authors' keys and names are stored as
+    offset arrays over UTF-8 blobs, so CatalogIndex reads everything straight
+    from the mapped file. Only authors linked to a work are stored, with an
+    empty name if they are missing from `dict_author_names`.
+
+    All 8 byte arrays come first, then the 4 byte arrays, then the blobs, so
+    every array stays aligned for mmap.
+
+    Parameters:
+        index_path (str): Where to write the index.
+        dict_author_names (dict): author_key to name.
+        work_rows (iterable): (work_key, title, author_keys) rows, see
+            iter_catalog_rows_from_dumps and iter_catalog_rows_from_tables.
+        source (str): Description of the source kept in the metadata.
+
+    Returns:
+        str: The path of the index.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+
+    dict_postings = {}
+    dict_author_ids = {}
+    work_key_blob, work_key_offsets = bytearray(), array("q", [0])
+    title_blob, title_offsets = bytearray(), array("q", [0])
+    author_links, link_offsets = array("I"), array("q", [0])
+    author_key_blob, author_key_offsets = bytearray(), array("q", [0])
+    name_blob, name_offsets = bytearray(), array("q", [0])
+
+    for work_id, (work_key, title, author_keys) in enumerate(work_rows):
+        append_string(work_key_blob, work_key_offsets, work_key)
+        append_string(title_blob, title_offsets, title)
+        for token in set(get_text_tokens(title)):
+            postings = dict_postings.get(token)
+            if postings is None:
+                postings = dict_postings[token] = array("I")
+            postings.append(work_id)
+
+        for author_key in dict.fromkeys(author_keys):
+            author_id = dict_author_ids.get(author_key)
+            if author_id is None:
+                author_id = dict_author_ids[author_key] = len(dict_author_ids)
+                append_string(author_key_blob, author_key_offsets, author_key)
+                append_string(
+                    name_blob, name_offsets, dict_author_names.get(author_key)
+                )
+            author_links.append(author_id)
+        link_offsets.append(len(author_links))
+
+    # code point order is also the UTF-8 byte order the lookups bisect in
+    token_blob, token_offsets = bytearray(), array("q", [0])
+    postings, posting_offsets = array("I"), array("q", [0])
+    for token in sorted(dict_postings):
+        append_string(token_blob, token_offsets, token)
+        postings.extend(dict_postings[token])
+        posting_offsets.append(len(postings))
+
+    metadata = json.dumps(
+        {
+            "source": source,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "token_pattern": TOKEN_PATTERN.pattern,
+        }
+    ).encode("utf-8")
+
+    with open(index_path + ".tmp", "wb") as f:
+        f.write(
+            CATALOG_INDEX_HEADER.pack(
+                CATALOG_INDEX_MAGIC,
+                len(token_offsets) - 1,
+                len(work_key_offsets) - 1,
+                len(author_key_offsets) - 1,
+                len(metadata),
+            )
+        )
+        for values in (
+            token_offsets,
+            posting_offsets,
+            work_key_offsets,
+            title_offsets,
+            link_offsets,
+            author_key_offsets,
+            name_offsets,
+            postings,
+            author_links,
+        ):
+            values.tofile(f)
+        for blob in (token_blob, work_key_blob, title_blob, author_key_blob, name_blob):
+            f.write(blob)
+        f.write(metadata)
+    os.replace(index_path + ".tmp", index_path)
+
+    print(
+        f"Indexed {len(work_key_offsets) - 1} works, {len(dict_author_ids)} authors "
+        f"and {len(token_offsets) - 1} tokens: {index_path}"
+    )
+    return index_path
+
+
+def build_catalog_index_from_dumps(authors_dump_path, works_dump_path, index_path=None):
+    """Build the catalog index of an authors and a works dump."""
+    index_path = index_path or os.path.join(
+        CATALOG_INDEX_DIR, os.path.basename(works_dump_path) + ".catidx"
+    )
+    dict_author_names, work_rows = iter_catalog_rows_from_dumps(
+        authors_dump_path, works_dump_path
+    )
+    return build_catalog_index(
+        index_path,
+        dict_author_names,
+        work_rows,
+        source=f"{os.path.abspath(authors_dump_path)}, "
+        f"{os.path.abspath(works_dump_path)}",
+    )
+
+
+def build_catalog_index_from_tables(conn, index_path):
+    """Build the catalog index of the tables of a database connection."""
+    dict_author_names, work_rows = iter_catalog_rows_from_tables(conn)
+    return build_catalog_index(
+        index_path, dict_author_names, work_rows, source=type(conn).__module__
+    )
+
+
+# %%
+# Lookup #
+
+
+class CatalogIndex:
+    """
+    Memory-mapped catalog index built by build_catalog_index.
+
+    Opening the index only maps the file, and the pages are shared by every
+    process that maps it. A lookup bisects the token strings, intersects the
+    posting arrays from the shortest one and reads the matched works and
+    authors from the mapped blobs.
+    """
+
+    def __init__(self, index_path):
+        self._index_file = open(index_path, "rb")
+        self._index_map = mmap.mmap(
+            self._index_file.fileno(), 0, access=mmap.ACCESS_READ
+        )
+
+        (
+            magic,
+            num_tokens,
+            num_works,
+            num_authors,
+            metadata_bytes,
+        ) = CATALOG_INDEX_HEADER.unpack_from(self._index_map)
+        if magic != CATALOG_INDEX_MAGIC:
+            raise ValueError(f"Not a catalog index: {index_path}")
+        self.num_tokens = num_tokens
+        self.num_works = num_works
+        self.num_authors = num_authors
+
+        view = memoryview(self._index_map)
+        position = CATALOG_INDEX_HEADER.size
+        self._views = []
+
+        def take(count, item_size, type_code):
+            nonlocal position
+            values = view[position : position + count * item_size].cast(type_code)
+            self._views.append(values)
+            position += count * item_size
+            return values
+
+        (
+            self._token_offsets,
+            self._posting_offsets,
+            self._work_key_offsets,
+            self._title_offsets,
+            self._link_offsets,
+            self._author_key_offsets,
+            self._name_offsets,
+        ) = [
+            take(count + 1, 8, "q")
+            for count in (
+                num_tokens,
+                num_tokens,
+                num_works,
+                num_works,
+                num_works,
+                num_authors,
+                num_authors,
+            )
+        ]
+        self._postings = take(self._posting_offsets[-1], 4, "I")
+        self._author_links = take(self._link_offsets[-1], 4, "I")
+
+        # blobs are sliced from the map by absolute position
+        self._blob_starts = {}
+        for blob_name, offsets in (
+            ("tokens", self._token_offsets),
+            ("work_keys", self._work_key_offsets),
+            ("titles", self._title_offsets),
+            ("author_keys", self._author_key_offsets),
+            ("names", self._name_offsets),
+        ):
+            self._blob_starts[blob_name] = position
+            position += offsets[-1]
+
+        self.metadata = json.loads(bytes(view[position : position + metadata_bytes]))
+        view.release()
+
+    def __len__(self):
+        return self.num_works
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_bytes(self, blob_name, offsets, item_id):
+        start = self._blob_starts[blob_name]
+        return self._index_map[start + offsets[item_id] : start + offsets[item_id + 1]]
+
+    def get_string(self, blob_name, offsets, item_id):
+        return self.get_bytes(blob_name, offsets, item_id).decode("utf-8")
+
+    def get_token_id(self, token):
+        """Bisect the sorted token strings for a normalized token, or None."""
+        token_bytes = token.encode("utf-8")
+        low, high = 0, self.num_tokens
+        while low < high:
+            middle = (low + high) // 2
+            if self.get_bytes("tokens", self._token_offsets, middle) < token_bytes:
+                low = middle + 1
+            else:
+                high = middle
+        if (
+            low < self.num_tokens
+            and self.get_bytes("tokens", self._token_offsets, low) == token_bytes
+        ):
+            return low
+        return None
+
+    def get_postings(self, token_id):
+        """Sorted work ids of a token, as a view of the mapped posting array."""
+        return self._postings[
+            self._posting_offsets[token_id] : self._posting_offsets[token_id + 1]
+        ]
+
+    def find_work_ids(self, search_string, limit=None):
+        """
+        Get the ids of the works whose title contains every token of a search.
+
+        The posting arrays are intersected by bisecting each one for the
+        current candidate, from where the previous bisect ended, and skipping
+        ahead to the next id of an array that lacks it. A rare token skips the
+        others across most of their ids, and the search stops as soon as
+        `limit` works matched. Arrays of similar length skip little, so they
+        are intersected as sets instead.
+        """
+        ls_postings = []
+        for token in set(get_text_tokens(search_string)):
+            token_id = self.get_token_id(token)
+            if token_id is None:
+                return []
+            ls_postings.append(self.get_postings(token_id))
+        if not ls_postings:
+            return []
+
+        ls_postings.sort(key=len)
+        if len(ls_postings) == 1:
+            return list(ls_postings[0][:limit])
+        if len(ls_postings[0]) * DENSE_POSTINGS_RATIO > len(ls_postings[-1]):
+            set_work_ids = set(ls_postings[0])
+            for postings in ls_postings[1:]:
+                set_work_ids.intersection_update(postings)
+            return sorted(set_work_ids)[:limit]
+
+        # leapfrog: a candidate missing from a list jumps to that list's next id
+        ls_positions = [0] * len(ls_postings)
+        work_ids = []
+        candidate = ls_postings[0][0]
+        list_index = matched_lists = 0
+        while True:
+            postings = ls_postings[list_index]
+            position = bisect_left(postings, candidate, ls_positions[list_index])
+            if position == len(postings):
+                return work_ids
+            ls_positions[list_index] = position
+            if postings[position] == candidate:
+                matched_lists += 1
+                if matched_lists == len(ls_postings):
+                    work_ids.append(candidate)
+                    if len(work_ids) == limit:
+                        return work_ids
+                    candidate += 1
+                    matched_lists = 0
+            else:
+                candidate = postings[position]
+                matched_lists = 1
+            list_index = (list_index + 1) % len(ls_postings)
+
+    def get_work(self, work_id):
+        """Get a work with its authors, in the shape of the Open Library API."""
+        ls_authors = []
+        for link in range(self._link_offsets[work_id], self._link_offsets[work_id + 1]):
+            author_id = self._author_links[link]
+            ls_authors.append(
+                {
+                    "key": self.get_string(
+                        "author_keys", self._author_key_offsets, author_id
+                    ),
+                    "name": self.get_string("names", self._name_offsets, author_id),
+                }
+            )
+        return {
+            "key": self.get_string("work_keys", self._work_key_offsets, work_id),
+            "title": self.get_string("titles", self._title_offsets, work_id),
+            "authors": ls_authors,
+        }
+
+    def find_works(self, search_string, limit=CATALOG_RESULT_LIMIT):
+        """
+        Find works whose title contains all tokens of a search, with their
+        authors. Works are returned in index order, at most `limit` of them.
+        """
+        work_ids = self.find_work_ids(search_string, limit)
+        return [self.get_work(work_id) for work_id in work_ids]
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._index_map.close()
+        self._index_file.close()
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    authors_dump_path = get_dump_file_path(book_data_dir, "authors")
+    works_dump_path = get_dump_file_path(book_data_dir, "works")
+    index_path = os.path.join(
+        CATALOG_INDEX_DIR, os.path.basename(works_dump_path) + ".catidx"
+    )
+    if not os.path.exists(index_path):
+        build_catalog_index_from_dumps(authors_dump_path, works_dump_path, index_path)
+
+    with CatalogIndex(index_path) as catalog_index:
+        print(f"{len(catalog_index)} works in {index_path}")
+        pprint_ls(catalog_index.find_works("fourth wing"))
+
+
+# %%
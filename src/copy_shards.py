@@ -0,0 +1,206 @@
+# %%
+# Imports #
+
+import datetime
+import gzip
+import json
+import os
+import zlib
+
+from dump_catalog import get_file_fingerprint
+from open_library_dump import (
+    AUTHORS_COLUMNS,
+    REDIRECTS_COLUMNS,
+    WORKS_COLUMNS,
+    WORK_AUTHORS_COLUMNS,
+    DumpFile,
+    format_copy_line,
+    get_key_number,
+    run_dump_pipeline,
+)
+from utils.display_tools import pprint_df, pprint_dict, pprint_ls  # noqa
+
+# %%
+# Variables #
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COPY_SHARDS_DIR = os.path.join(project_root, "data", "copy_shards")
+
+COPY_SHARD_COUNT = 8
+COPY_SHARD_COMPRESSLEVEL = 3  # Shards are written once and read many times
+COPY_SHARD_BATCH_ROW_NUM = 100000
+
+# Tables written for each dump type, the authors, works and redirects rows are
+# prefixed with their line_number like the rows COPYed into the staging tables
+DICT_SHARD_TABLE_COLUMNS = {
+    "authors": {
+        "authors": ("line_number",) + AUTHORS_COLUMNS,
+        "redirects": ("line_number",) + REDIRECTS_COLUMNS,
+    },
+    "works": {
+        "works": ("line_number",) + WORKS_COLUMNS,
+        "work_authors": WORK_AUTHORS_COLUMNS,
+        "redirects": ("line_number",) + REDIRECTS_COLUMNS,
+    },
+}
+
+
+# %%
+# Shards #
+
+
+def get_key_shard(key, num_shards):
+    """
+    Shard of a key. A work and its work_authors links share a shard, so a shard
+    can be loaded on its own.
+    """
+    key_number = get_key_number(key)
+    if key_number is None:
+        key_number = zlib.crc32(key.encode("utf-8"))
+    return key_number % num_shards
+
+
+def get_shard_file_name(table_name, shard):
+    return f"{table_name}_{shard:03d}.copy.gz"
+
+
+def get_copy_shards_manifest_path(dump_file_path, shards_dir=COPY_SHARDS_DIR):
+    """Manifest of the shards exported from a dump file."""
+    return os.path.join(shards_dir, os.path.basename(dump_file_path), "manifest.json")
+
+
+def load_copy_shards_manifest(manifest_path):
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_copy_shards_export_current(dump_file_path, shards_dir=COPY_SHARDS_DIR):
+    """True if the shards of this exact dump file (by fingerprint) are exported."""
+    manifest_path = get_copy_shards_manifest_path(dump_file_path, shards_dir)
+    if not os.path.exists(manifest_path):
+        return False
+    dict_manifest = load_copy_shards_manifest(manifest_path)
+    return dict_manifest["source_fingerprint"] == get_file_fingerprint(dump_file_path)
+
+
+def export_copy_shards(
+    dump_type,
+    dump_file_path,
+    num_shards=COPY_SHARD_COUNT,
+    shards_dir=COPY_SHARDS_DIR,
+    max_rows_to_read=None,
+):
+    """
+    Parse a dump once into gzip compressed, COPY-ready shard files.
+
+    Rows are split over `num_shards` files per table by key, so shards hold
+    disjoint keys and can be loaded in parallel with
+    load_copy_shards_postgres. Within a shard the rows keep their file order
+    and line numbers, so the last occurrence of a key still wins.
+
+    The manifest is written last and names the source file by fingerprint,
+    so an interrupted export is never mistaken for a finished one.
+
+    Parameters:
+        dump_type (str): "authors" or "works".
+        dump_file_path (str): The path to the .txt or .txt.gz dump.
+        num_shards (int): Shard files per table.
+        shards_dir (str): Directory the export directory is created in.
+        max_rows_to_read (int): Stop after this many rows. Defaults to all rows.
+
+    Returns:
+        str: The path of the manifest.
+    """
+    manifest_path = get_copy_shards_manifest_path(dump_file_path, shards_dir)
+    export_dir = os.path.dirname(manifest_path)
+    os.makedirs(export_dir, exist_ok=True)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    dict_table_columns = DICT_SHARD_TABLE_COLUMNS[dump_type]
+    dict_shard_files = {
+        table_name: [
+            gzip.open(
+                os.path.join(export_dir, get_shard_file_name(table_name, shard)),
+                "wt",
+                encoding="utf-8",
+                compresslevel=COPY_SHARD_COMPRESSLEVEL,
+            )
+            for shard in range(num_shards)
+        ]
+        for table_name in dict_table_columns
+    }
+    dict_shard_row_counts = {
+        table_name: [0] * num_shards for table_name in dict_table_columns
+    }
+
+    def write_batch(rows, work_author_rows, redirect_rows, line_offset):
+        # rows and redirect rows are (line_number, key, ...) and links are
+        # (work_key, author_key)
+        for table_name, table_rows, key_index in (
+            (dump_type, rows, 1),
+            ("work_authors", work_author_rows, 0),
+            ("redirects", redirect_rows, 1),
+        ):
+            if table_name not in dict_table_columns:
+                continue
+            ls_shard_files = dict_shard_files[table_name]
+            ls_row_counts = dict_shard_row_counts[table_name]
+            for row in table_rows:
+                shard = get_key_shard(row[key_index], num_shards)
+                ls_shard_files[shard].write(format_copy_line(row))
+                ls_row_counts[shard] += 1
+
+    try:
+        with DumpFile(dump_file_path) as dump_file:
+            row_counter, _, _ = run_dump_pipeline(
+                dump_type,
+                dump_file,
+                write_batch,
+                COPY_SHARD_BATCH_ROW_NUM,
+                max_rows_to_read=max_rows_to_read,
+            )
+    finally:
+        for ls_shard_files in dict_shard_files.values():
+            for shard_file in ls_shard_files:
+                shard_file.close()
+
+    dict_manifest = {
+        "dump_type": dump_type,
+        "source_file": os.path.abspath(dump_file_path),
+        "source_fingerprint": get_file_fingerprint(dump_file_path),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "rows": row_counter,
+        "complete": max_rows_to_read is None,
+        "num_shards": num_shards,
+        "tables": {
+            table_name: {
+                "columns": list(columns),
+                "shards": [
+                    {
+                        "file": get_shard_file_name(table_name, shard),
+                        "rows": dict_shard_row_counts[table_name][shard],
+                        "bytes": os.path.getsize(
+                            os.path.join(
+                                export_dir, get_shard_file_name(table_name, shard)
+                            )
+                        ),
+                    }
+                    for shard in range(num_shards)
+                ],
+            }
+            for table_name, columns in dict_table_columns.items()
+        },
+    }
+
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(dict_manifest, f, indent=2)
+    os.replace(temp_path, manifest_path)
+
+    print(f"Exported {row_counter} {dump_type} rows to {num_shards} shards")
+    print(f"Manifest: {manifest_path}")
+    return manifest_path
+
+
+# %%
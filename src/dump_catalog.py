@@ -0,0 +1,275 @@
+# %%
+# Imports #
+
+import datetime
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+from utils.display_tools import pprint_df, pprint_dict, pprint_ls  # noqa
+
+# %%
+# Variables #
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATALOG_PATH = os.path.join(project_root, "data", "dump_catalog.json")
+
+# e.g. ol_dump_works_2024-01-31.txt.gz, ol_dump_authors_latest.txt
+DUMP_FILE_NAME_PATTERN = re.compile(
+    r"^ol_dump_(?P<dump_type>[a-z_]+?)_(?P<dump_date>\d{4}-\d{2}-\d{2}|latest)"
+    r"\.txt(?P<gz>\.gz)?$"
+)
+
+# Bytes hashed at the start, middle and end of a file for its fingerprint
+FINGERPRINT_SAMPLE_BYTES = 1024 * 1024
+
+
+# %%
+# Fingerprints #
+
+
+def get_file_fingerprint(file_path):
+    """
+    Fingerprint a dump file without reading all of it.
+
+    Hashes the size and 1 MiB samples from the start, middle and end of the
+    file. Dumps are never edited in place, so this tells different downloads
+    apart in a fraction of a second where hashing a multi-GB file takes minutes.
+    """
+    file_size = os.path.getsize(file_path)
+    sha256 = hashlib.sha256(str(file_size).encode())
+    with open(file_path, "rb") as f:
+        for offset in (0, file_size // 2, file_size - FINGERPRINT_SAMPLE_BYTES):
+            f.seek(max(offset, 0))
+            sha256.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+    return sha256.hexdigest()
+
+
+def parse_dump_file_name(file_path):
+    """
+    Get the dump type and date from an Open Library dump file name.
+
+    Files downloaded as `latest` get the date of their modification time.
+
+    Returns:
+        tuple or None: (dump_type, dump_date, is_gzip), or None if the file is
+            not a dump.
+    """
+    match = DUMP_FILE_NAME_PATTERN.match(os.path.basename(file_path))
+    if match is None:
+        return None
+
+    dump_date = match.group("dump_date")
+    if dump_date == "latest":
+        dump_date = datetime.date.fromtimestamp(os.path.getmtime(file_path)).isoformat()
+    return match.group("dump_type"), dump_date, match.group("gz") is not None
+
+
+# %%
+# Catalog #
+
+
+def load_catalog(catalog_path=CATALOG_PATH):
+    """Read the dump catalog, an empty one if it does not exist yet."""
+    if not os.path.exists(catalog_path):
+        return {"files": {}}
+    with open(catalog_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_catalog(dict_catalog, catalog_path=CATALOG_PATH):
+    """Write the dump catalog, replacing the file atomically."""
+    os.makedirs(os.path.dirname(catalog_path), exist_ok=True)
+    temp_path = catalog_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(dict_catalog, f, indent=2, sort_keys=True)
+    os.replace(temp_path, catalog_path)
+
+
+def scan_dump_files(dict_catalog, book_data_dir):
+    """
+    Add the dump files in a directory to the catalog and drop deleted ones.
+
+    A file is only fingerprinted again when its size or modification time
+    changed. Its extraction and load records are kept as long as the
+    fingerprint is the same.
+    """
+    dict_files = dict_catalog["files"]
+    book_data_dir = os.path.abspath(book_data_dir)
+
+    for file_path in list(dict_files):
+        if os.path.dirname(file_path) == book_data_dir and not os.path.exists(
+            file_path
+        ):
+            del dict_files[file_path]
+
+    for file_path in glob.glob(os.path.join(book_data_dir, "ol_dump_*")):
+        file_path = os.path.abspath(file_path)
+        parsed_name = parse_dump_file_name(file_path)
+        if parsed_name is None:
+            continue
+        dump_type, dump_date, is_gzip = parsed_name
+
+        file_stat = os.stat(file_path)
+        dict_entry = dict_files.get(file_path, {})
+        if (
+            dict_entry.get("size") == file_stat.st_size
+            and dict_entry.get("mtime") == int(file_stat.st_mtime)
+        ):
+            continue
+
+        fingerprint = get_file_fingerprint(file_path)
+        if dict_entry.get("fingerprint") != fingerprint:
+            dict_entry = {"loads": {}}
+        dict_entry.update(
+            {
+                "dump_type": dump_type,
+                "dump_date": dump_date,
+                "is_gzip": is_gzip,
+                "size": file_stat.st_size,
+                "mtime": int(file_stat.st_mtime),
+                "fingerprint": fingerprint,
+            }
+        )
+        dict_files[file_path] = dict_entry
+
+    return dict_catalog
+
+
+def get_latest_dump_paths(dict_catalog, dump_type):
+    """
+    Get the newest dump of a type, as its gzip file and extracted text file.
+
+    A text file only counts as extracted if the catalog recorded extracting it
+    from the gzip file, or if there is no gzip file of that date.
+
+    Returns:
+        tuple: (gz_path, text_path), either may be None.
+    """
+    ls_entries = [
+        (dict_entry["dump_date"], file_path, dict_entry)
+        for file_path, dict_entry in dict_catalog["files"].items()
+        if dict_entry["dump_type"] == dump_type
+    ]
+    if not ls_entries:
+        raise ValueError(f"No {dump_type} dump found")
+
+    latest_date = max(dump_date for dump_date, _, _ in ls_entries)
+    gz_path = text_path = None
+    for dump_date, file_path, dict_entry in ls_entries:
+        if dump_date != latest_date:
+            continue
+        if dict_entry["is_gzip"]:
+            gz_path = file_path
+        else:
+            text_path = file_path
+
+    if gz_path and text_path:
+        extracted_from = dict_catalog["files"][text_path].get("extracted_from")
+        if extracted_from != dict_catalog["files"][gz_path]["fingerprint"]:
+            text_path = None
+
+    return gz_path, text_path
+
+
+def extract_dump_file(dict_catalog, gz_path):
+    """
+    Extract a gzip dump next to itself and record it in the catalog.
+
+    The text is written to a temporary file that is renamed once complete, so
+    an interrupted extraction is never mistaken for a finished one.
+    """
+    text_path = gz_path[: -len(".gz")]
+    temp_path = text_path + ".tmp"
+    with gzip.open(gz_path, "rb") as f_in:
+        with open(temp_path, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out, 16 * 1024 * 1024)
+    os.replace(temp_path, text_path)
+
+    dict_gz_entry = dict_catalog["files"][gz_path]
+    file_stat = os.stat(text_path)
+    dict_catalog["files"][text_path] = {
+        "dump_type": dict_gz_entry["dump_type"],
+        "dump_date": dict_gz_entry["dump_date"],
+        "is_gzip": False,
+        "size": file_stat.st_size,
+        "mtime": int(file_stat.st_mtime),
+        "fingerprint": get_file_fingerprint(text_path),
+        "extracted_from": dict_gz_entry["fingerprint"],
+        "loads": {},
+    }
+    return text_path
+
+
+def get_dump_file_path(book_data_dir, dump_type, extract=False):
+    """
+    Pick the file to load for a dump type and update the catalog.
+
+    Always takes the newest dump of the type. Its extracted text file is used
+    if there is one, otherwise the gzip file is extracted when `extract` is
+    set or returned as is (the loaders read gzip directly).
+
+    Parameters:
+        book_data_dir (str): Directory holding the downloaded dumps.
+        dump_type (str): e.g. "authors", "works" or "editions".
+        extract (bool): Extract the gzip file if it is not extracted yet.
+
+    Returns:
+        str: The path of the dump file to load.
+    """
+    dict_catalog = scan_dump_files(load_catalog(), book_data_dir)
+    gz_path, text_path = get_latest_dump_paths(dict_catalog, dump_type)
+
+    if text_path:
+        print(f"Using extracted {dump_type} dump: {text_path}")
+    elif extract:
+        print(f"Extracting {gz_path}")
+        text_path = extract_dump_file(dict_catalog, gz_path)
+        print(f"Extraction complete. Text file path: {text_path}")
+    else:
+        print(f"Loading {dump_type} directly from the gzip file: {gz_path}")
+
+    save_catalog(dict_catalog)
+    return text_path or gz_path
+
+
+# %%
+# Loads #
+
+
+def get_dump_load(file_path, database_name):
+    """
+    Get the record of a completed load of a dump file into a database.
+
+    Returns None if that exact file (by fingerprint) was never fully loaded
+    into the database.
+    """
+    dict_entry = load_catalog()["files"].get(os.path.abspath(file_path))
+    if dict_entry is None:
+        return None
+    return dict_entry["loads"].get(database_name)
+
+
+def record_dump_load(file_path, database_name, dict_stats=None):
+    """
+    Record that a dump file was fully loaded into a database.
+
+    Files that are not Open Library dumps, such as sampled dumps, are not
+    tracked.
+    """
+    dict_catalog = scan_dump_files(load_catalog(), os.path.dirname(file_path))
+    dict_entry = dict_catalog["files"].get(os.path.abspath(file_path))
+    if dict_entry is None:
+        return
+    dict_entry["loads"][database_name] = {
+        "loaded_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "rows": (dict_stats or {}).get("rows"),
+    }
+    save_catalog(dict_catalog)
+
+
+# %%
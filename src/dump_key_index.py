@@ -0,0 +1,421 @@
+# %%
+# Imports #
+
+import gzip
+import io
+import json
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+
+from dump_catalog import get_dump_file_path, get_file_fingerprint
+from open_library_dump import (
+    DUMP_COLUMN_COUNT,
+    READ_BUFFER_SIZE,
+    decode_json,
+    get_key_number,
+)
+from utils.display_tools import pprint_df, pprint_dict, pprint_ls  # noqa
+
+# %%
+# Variables #
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KEY_INDEX_DIR = os.path.join(project_root, "data", "key_index")
+book_data_dir = os.path.join("F:\\", "book-data")
+
+# magic, entry count, seek point count, metadata bytes
+KEY_INDEX_HEADER = struct.Struct("<8sQQQ")
+KEY_INDEX_MAGIC = b"OLKEYIX1"
+
+# Entries are packed as key_number << LINE_INDEX_BITS | line_index while sorting,
+# which leaves 31 bits for the key numbers, far above the largest Open Library key
+LINE_INDEX_BITS = 32
+MAX_LINE_INDEX = (1 << LINE_INDEX_BITS) - 1
+MAX_PACKED_KEY_NUMBER = 1 << (63 - LINE_INDEX_BITS)
+
+# Uncompressed bytes per gzip member of the seekable copy of a .gz dump, the
+# most a lookup has to decompress
+SEEK_BLOCK_BYTES = 64 * 1024
+
+
+# %%
+# Build #
+
+
+def get_key_index_path(dump_file_path, index_dir=KEY_INDEX_DIR):
+    return os.path.join(index_dir, os.path.basename(dump_file_path) + ".keyidx")
+
+
+def write_seek_block(
+    seekable_file, ls_block_lines, block_start, seek_uncompressed, seek_compressed
+):
+    """Write lines as one gzip member of the seekable copy and record its seek point."""
+    seek_uncompressed.append(block_start)
+    seek_compressed.append(seekable_file.tell())
+    seekable_file.write(gzip.compress(b"".join(ls_block_lines), mtime=0))
+
+
+def scan_dump_lines(dump_stream, seekable_file=None):
+    """
+    Read the key and position of every line of a binary dump stream.
+
+    Standard keys are packed with their line index into `packed_entries`,
+    other keys go to `dict_other_keys`. With `seekable_file`, the lines are
+    also written to it in members of SEEK_BLOCK_BYTES, see
+    build_dump_key_index.
+
+    Returns:
+        tuple: (packed_entries, is_sorted, line_offsets, line_lengths,
+            seek_uncompressed, seek_compressed, dict_other_keys)
+    """
+    packed_entries = array("q")
+    line_offsets = array("q")
+    line_lengths = array("I")
+    seek_uncompressed = array("q")
+    seek_compressed = array("q")
+    dict_other_keys = {}
+    seek_arrays = (seek_uncompressed, seek_compressed)
+
+    is_sorted = True
+    line_offset = 0
+    block_start = 0
+    ls_block_lines = []
+    for line_index, raw_line in enumerate(dump_stream):
+        if line_index > MAX_LINE_INDEX:
+            raise ValueError(f"Too many lines to index, at most {MAX_LINE_INDEX + 1}")
+        # only the key column is needed, the JSON is never decoded
+        parts = raw_line.split(b"\t", 2)
+        if len(parts) == 3:
+            key = parts[1].decode("utf-8")
+            key_number = get_key_number(key)
+            if key_number is None or key_number >= MAX_PACKED_KEY_NUMBER:
+                dict_other_keys[key] = (line_offset, len(raw_line))
+            else:
+                packed = key_number << LINE_INDEX_BITS | line_index
+                if packed_entries and packed < packed_entries[-1]:
+                    is_sorted = False
+                packed_entries.append(packed)
+        line_offsets.append(line_offset)
+        line_lengths.append(len(raw_line))
+        line_offset += len(raw_line)
+
+        if seekable_file is not None:
+            ls_block_lines.append(raw_line)
+            if line_offset - block_start >= SEEK_BLOCK_BYTES:
+                write_seek_block(
+                    seekable_file, ls_block_lines, block_start, *seek_arrays
+                )
+                block_start = line_offset
+                ls_block_lines = []
+
+    if ls_block_lines:
+        write_seek_block(seekable_file, ls_block_lines, block_start, *seek_arrays)
+
+    return (
+        packed_entries,
+        is_sorted,
+        line_offsets,
+        line_lengths,
+        seek_uncompressed,
+        seek_compressed,
+        dict_other_keys,
+    )
+
+
+def build_dump_key_index(dump_file_path, index_path=None):
+    """
+    Build a sorted key -> (offset, length) index over the lines of a dump.
+
+    Plain text dumps are indexed in place. A single gzip stream cannot be
+    entered in the middle, so for .gz dumps a block compressed copy is
+    written next to the index: a multi-member gzip file (still readable by
+    gzip and DumpFile) whose members each hold SEEK_BLOCK_BYTES of whole
+    lines. The seek points map the uncompressed offset of every member to its
+    compressed offset, so a lookup decompresses one small member.
+
+    When a key appears more than once, the last line wins, as in the loaders.
+    Standard keys are sorted as packed 64 bit integers like RevisionMap, so
+    building needs about 40 bytes of memory per line. A dump can have up to
+    2**32 lines. An empty dump gives an empty index.
+
+    Parameters:
+        dump_file_path (str): The .txt or .txt.gz dump.
+        index_path (str): Where to write the index. Defaults to KEY_INDEX_DIR.
+
+    Returns:
+        str: The path of the index.
+    """
+    index_path = index_path or get_key_index_path(dump_file_path)
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    is_gzip = dump_file_path.endswith(".gz")
+    data_file_path = index_path + ".seekable.gz" if is_gzip else dump_file_path
+
+    if is_gzip:
+        dump_stream = io.BufferedReader(
+            gzip.open(dump_file_path, "rb"), buffer_size=READ_BUFFER_SIZE
+        )
+        seekable_file = open(data_file_path + ".tmp", "wb")
+    else:
+        dump_stream = open(dump_file_path, "rb", buffering=READ_BUFFER_SIZE)
+        seekable_file = None
+    try:
+        with dump_stream:
+            (
+                packed_entries,
+                is_sorted,
+                line_offsets,
+                line_lengths,
+                seek_uncompressed,
+                seek_compressed,
+                dict_other_keys,
+            ) = scan_dump_lines(dump_stream, seekable_file)
+    finally:
+        if seekable_file is not None:
+            seekable_file.close()
+    if is_gzip:
+        os.replace(data_file_path + ".tmp", data_file_path)
+
+    if not is_sorted:
+        packed_entries = array("q", sorted(packed_entries))
+
+    # keep the last line of every key
+    key_numbers = array("q")
+    offsets = array("q")
+    lengths = array("I")
+    for position, packed in enumerate(packed_entries):
+        key_number = packed >> LINE_INDEX_BITS
+        if (
+            position + 1 < len(packed_entries)
+            and packed_entries[position + 1] >> LINE_INDEX_BITS == key_number
+        ):
+            continue
+        line_index = packed & MAX_LINE_INDEX
+        key_numbers.append(key_number)
+        offsets.append(line_offsets[line_index])
+        lengths.append(line_lengths[line_index])
+
+    metadata = json.dumps(
+        {
+            "source_file": os.path.abspath(dump_file_path),
+            "source_fingerprint": get_file_fingerprint(dump_file_path),
+            "data_file": os.path.abspath(data_file_path),
+            "is_gzip": is_gzip,
+            "other_keys": dict_other_keys,
+        }
+    ).encode("utf-8")
+
+    # the 8 byte arrays come first so every array stays aligned for mmap
+    with open(index_path + ".tmp", "wb") as f:
+        f.write(
+            KEY_INDEX_HEADER.pack(
+                KEY_INDEX_MAGIC,
+                len(key_numbers),
+                len(seek_uncompressed),
+                len(metadata),
+            )
+        )
+        for values in (
+            key_numbers,
+            offsets,
+            seek_uncompressed,
+            seek_compressed,
+            lengths,
+        ):
+            values.tofile(f)
+        f.write(metadata)
+    os.replace(index_path + ".tmp", index_path)
+
+    print(f"Indexed {len(key_numbers) + len(dict_other_keys)} keys: {index_path}")
+    return index_path
+
+
+# %%
+# Lookup #
+
+
+class DumpKeyIndex:
+    """
+    Memory-mapped key index built by build_dump_key_index.
+
+    Lookups bisect the mapped key array and read one line from the dump (or
+    decompress one member of its seekable copy), without loading the index
+    or the dump into memory.
+    """
+
+    def __init__(self, index_path):
+        self._index_file = open(index_path, "rb")
+        self._index_map = mmap.mmap(
+            self._index_file.fileno(), 0, access=mmap.ACCESS_READ
+        )
+
+        (
+            magic,
+            num_entries,
+            num_seek_points,
+            metadata_bytes,
+        ) = KEY_INDEX_HEADER.unpack_from(self._index_map)
+        if magic != KEY_INDEX_MAGIC:
+            raise ValueError(f"Not a dump key index: {index_path}")
+
+        view = memoryview(self._index_map)
+        position = KEY_INDEX_HEADER.size
+        arrays = []
+        for count, item_size, type_code in (
+            (num_entries, 8, "q"),
+            (num_entries, 8, "q"),
+            (num_seek_points, 8, "q"),
+            (num_seek_points, 8, "q"),
+            (num_entries, 4, "I"),
+        ):
+            arrays.append(
+                view[position : position + count * item_size].cast(type_code)
+            )
+            position += count * item_size
+        (
+            self._key_numbers,
+            self._offsets,
+            self._seek_uncompressed,
+            self._seek_compressed,
+            self._lengths,
+        ) = arrays
+
+        dict_metadata = json.loads(
+            bytes(view[position : position + metadata_bytes])
+        )
+        view.release()
+        self.source_file = dict_metadata["source_file"]
+        self.source_fingerprint = dict_metadata["source_fingerprint"]
+        self.is_gzip = dict_metadata["is_gzip"]
+        self._other_keys = dict_metadata["other_keys"]
+
+        self._data_file = open(dict_metadata["data_file"], "rb")
+        # an empty file cannot be mapped, and an empty dump has no keys to read
+        self._data_map = None
+        if os.fstat(self._data_file.fileno()).st_size:
+            self._data_map = mmap.mmap(
+                self._data_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        self._cached_block = (None, b"")
+
+    def __len__(self):
+        return len(self._key_numbers) + len(self._other_keys)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_location(self, key):
+        """Get the (offset, length) of a key's line in the uncompressed dump."""
+        key_number = get_key_number(key)
+        if key_number is None or key_number >= MAX_PACKED_KEY_NUMBER:
+            location = self._other_keys.get(key)
+            return tuple(location) if location else None
+
+        index = bisect_left(self._key_numbers, key_number)
+        if index < len(self._key_numbers) and self._key_numbers[index] == key_number:
+            return self._offsets[index], self._lengths[index]
+        return None
+
+    def read_block(self, block):
+        """Decompress one member of the seekable copy, caching the last one."""
+        if self._cached_block[0] != block:
+            start = self._seek_compressed[block]
+            end = (
+                self._seek_compressed[block + 1]
+                if block + 1 < len(self._seek_compressed)
+                else len(self._data_map)
+            )
+            self._cached_block = (
+                block,
+                zlib.decompress(self._data_map[start:end], wbits=31),
+            )
+        return self._cached_block[1]
+
+    def get_line(self, key):
+        """
+        Get the raw dump line of a key, or None.
+
+        Key numbers are shared by keys that only differ in their prefix, so
+        the key column of the line is checked before it is returned.
+        """
+        location = self.get_location(key)
+        if location is None:
+            return None
+
+        offset, length = location
+        if self.is_gzip:
+            block = bisect_right(self._seek_uncompressed, offset) - 1
+            block_offset = offset - self._seek_uncompressed[block]
+            raw_line = self.read_block(block)[block_offset : block_offset + length]
+        else:
+            raw_line = self._data_map[offset : offset + length]
+
+        line = raw_line.decode("utf-8")
+        if line.split("\t", 2)[1] != key:
+            return None
+        return line
+
+    def get_record(self, key):
+        """Get the decoded JSON record of a key, or None."""
+        line = self.get_line(key)
+        if line is None:
+            return None
+        return decode_json(line.rstrip("\n").split("\t", DUMP_COLUMN_COUNT - 1)[-1])
+
+    def get_records(self, keys):
+        """
+        Get the records of many keys as a dict of key to record.
+
+        Keys are read in file order, so neighbouring keys share one decompressed
+        block and the dump is read front to back.
+        """
+        ls_located_keys = []
+        for key in keys:
+            location = self.get_location(key)
+            if location is not None:
+                ls_located_keys.append((location[0], key))
+
+        dict_records = {}
+        for _, key in sorted(ls_located_keys):
+            record = self.get_record(key)
+            if record is not None:
+                dict_records[key] = record
+        return dict_records
+
+    def close(self):
+        for view in (
+            self._key_numbers,
+            self._offsets,
+            self._seek_uncompressed,
+            self._seek_compressed,
+            self._lengths,
+        ):
+            view.release()
+        self._index_map.close()
+        self._index_file.close()
+        if self._data_map is not None:
+            self._data_map.close()
+        self._data_file.close()
+
+
+# %%
+# Main #
+
+if __name__ == "__main__":
+    for dump_type in ("authors", "works"):
+        dump_file_path = get_dump_file_path(book_data_dir, dump_type)
+        index_path = get_key_index_path(dump_file_path)
+        if not os.path.exists(index_path):
+            build_dump_key_index(dump_file_path, index_path)
+
+        with DumpKeyIndex(index_path) as key_index:
+            print(f"{dump_type}: {len(key_index)} keys in {index_path}")
+
+
+# %%
@@ -0,0 +1,220 @@
+# %%
+# Imports #
+
+import gzip
+import hashlib
+import os
+import random
+
+from open_library_dump import (
+    DICT_RECORD_LINE_TYPES,
+    DUMP_COLUMN_COUNT,
+    DumpFile,
+    decode_json,
+    get_author_key_from_ref,
+    iter_dump_lines_with_progress,
+)
+from utils.display_tools import pprint_df, pprint_dict, pprint_ls  # noqa
+
+# %%
+# Variables #
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES_DIR = os.path.join(project_root, "data", "samples")
+
+SAMPLE_SEED = 42
+
+
+# %%
+# Sampling #
+
+
+def is_key_sampled(key, sample_fraction, seed=SAMPLE_SEED):
+    """
+    Decide from the key alone whether a work is in a hash-based sample.
+
+    Every line of a key gets the same answer, and the same fraction and seed
+    always select the same works, whatever the dump's order.
+    """
+    digest = hashlib.blake2b(f"{seed}:{key}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") < sample_fraction * 2**64
+
+
+def get_line_key(line):
+    """Get the key column of a dump line without decoding its JSON, or None."""
+    parts = line.split("\t", 2)
+    if len(parts) < 3:
+        return None
+    return parts[1]
+
+
+def get_line_author_keys(line):
+    """Get the author keys referenced by a works dump line."""
+    parts = line.rstrip("\n").split("\t", DUMP_COLUMN_COUNT - 1)
+    if len(parts) < DUMP_COLUMN_COUNT:
+        return []
+    record = decode_json(parts[-1])
+    author_keys = []
+    for author_ref in record.get("authors", []):
+        author_key = get_author_key_from_ref(author_ref)
+        if author_key:
+            author_keys.append(author_key)
+    return author_keys
+
+
+def iter_sampled_work_lines(works_dump_path, sample_fraction=None, sample_size=None):
+    """
+    Stream the works dump once and yield the sampled lines in file order.
+
+    With `sample_fraction`, works are picked by a hash of their key, which
+    needs no memory. With `sample_size`, a seeded reservoir sample of that
+    many lines is held in memory and yielded in file order at the end. Only
+    work lines are sampled, redirect and delete lines are skipped.
+    """
+    if (sample_fraction is None) == (sample_size is None):
+        raise ValueError("Pass either sample_fraction or sample_size")
+
+    rng = random.Random(SAMPLE_SEED)
+    ls_reservoir = []
+    works_seen = 0
+    line_type_prefix = DICT_RECORD_LINE_TYPES["works"] + "\t"
+    with DumpFile(works_dump_path) as dump_file:
+        lines = iter_dump_lines_with_progress(dump_file, "Sampling Works")
+        for line_number, line in enumerate(lines):
+            if not line.startswith(line_type_prefix):
+                continue
+            works_seen += 1
+            if sample_fraction is not None:
+                key = get_line_key(line)
+                if key and is_key_sampled(key, sample_fraction):
+                    yield line
+            elif len(ls_reservoir) < sample_size:
+                ls_reservoir.append((line_number, line))
+            else:
+                replace_index = rng.randrange(works_seen)
+                if replace_index < sample_size:
+                    ls_reservoir[replace_index] = (line_number, line)
+
+    for _, line in sorted(ls_reservoir):
+        yield line
+
+
+def write_sampled_dumps(
+    authors_dump_path,
+    works_dump_path,
+    sample_fraction=None,
+    sample_size=None,
+    output_dir=SAMPLES_DIR,
+):
+    """
+    Write a sample of the works dump and exactly the authors it references.
+
+    The works dump is streamed once to draw the sample (see
+    iter_sampled_work_lines) and collect the author keys of the sampled works,
+    then the authors dump is streamed once keeping only those authors. Only
+    the key column of rejected lines is looked at. Loading the two files with
+    any loader gives a referentially complete database: every work_authors
+    link points at a loaded author, or at a stub when the author is missing
+    from the full authors dump too.
+
+    Parameters:
+        authors_dump_path (str): The full authors dump (.txt or .txt.gz).
+        works_dump_path (str): The full works dump (.txt or .txt.gz).
+        sample_fraction (float): Share of works to keep, e.g. 0.01.
+        sample_size (int): Number of works lines to keep instead.
+        output_dir (str): Directory for the sampled .txt.gz dumps.
+
+    Returns:
+        tuple: (authors_sample_path, works_sample_path, dict_stats)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    sample_name = (
+        f"fraction_{sample_fraction}" if sample_size is None else f"size_{sample_size}"
+    )
+    works_sample_path = os.path.join(
+        output_dir, f"sample_{sample_name}_{os.path.basename(works_dump_path)}"
+    )
+    authors_sample_path = os.path.join(
+        output_dir, f"sample_{sample_name}_{os.path.basename(authors_dump_path)}"
+    )
+    if not works_sample_path.endswith(".gz"):
+        works_sample_path += ".gz"
+        authors_sample_path += ".gz"
+
+    works_count = 0
+    link_count = 0
+    set_author_keys = set()
+    with gzip.open(works_sample_path, "wt", encoding="utf-8") as f_out:
+        for line in iter_sampled_work_lines(
+            works_dump_path, sample_fraction=sample_fraction, sample_size=sample_size
+        ):
+            f_out.write(line)
+            works_count += 1
+            author_keys = get_line_author_keys(line)
+            link_count += len(author_keys)
+            set_author_keys.update(author_keys)
+
+    set_found_author_keys = set()
+    with gzip.open(authors_sample_path, "wt", encoding="utf-8") as f_out:
+        with DumpFile(authors_dump_path) as dump_file:
+            for line in iter_dump_lines_with_progress(dump_file, "Sampling Authors"):
+                key = get_line_key(line)
+                if key in set_author_keys:
+                    f_out.write(line)
+                    set_found_author_keys.add(key)
+
+    dict_stats = {
+        "works": works_count,
+        "work_authors": link_count,
+        "referenced_authors": len(set_author_keys),
+        "authors": len(set_found_author_keys),
+        "authors_missing_from_dump": len(set_author_keys - set_found_author_keys),
+    }
+    print(f"Wrote sampled dumps: {works_sample_path}, {authors_sample_path}")
+    return authors_sample_path, works_sample_path, dict_stats
+
+
+def write_sampled_editions_dump(
+    editions_dump_path, works_sample_path, output_dir=SAMPLES_DIR
+):
+    """
+    Write the editions of the works in a sampled works dump.
+
+    Editions are kept when their first work (the one the loaders link them
+    to) is in the sample, so `editions.work_key` never points outside it.
+    Lines that reference no work at all are skipped without decoding their
+    JSON.
+
+    Returns:
+        tuple: (editions_sample_path, edition_count)
+    """
+    with DumpFile(works_sample_path) as dump_file:
+        set_work_keys = {get_line_key(line) for line in dump_file}
+
+    sample_prefix = os.path.basename(works_sample_path).split("_ol_dump_")[0]
+    editions_sample_path = os.path.join(
+        output_dir, f"{sample_prefix}_{os.path.basename(editions_dump_path)}"
+    )
+    if not editions_sample_path.endswith(".gz"):
+        editions_sample_path += ".gz"
+
+    edition_count = 0
+    with gzip.open(editions_sample_path, "wt", encoding="utf-8") as f_out:
+        with DumpFile(editions_dump_path) as dump_file:
+            for line in iter_dump_lines_with_progress(dump_file, "Sampling Editions"):
+                if "/works/" not in line:
+                    continue
+                parts = line.rstrip("\n").split("\t", DUMP_COLUMN_COUNT - 1)
+                if len(parts) < DUMP_COLUMN_COUNT:
+                    continue
+                works = decode_json(parts[-1]).get("works", [])
+                if works and isinstance(works[0], dict):
+                    if works[0].get("key") in set_work_keys:
+                        f_out.write(line)
+                        edition_count += 1
+
+    print(f"Wrote sampled editions dump: {editions_sample_path}")
+    return editions_sample_path, edition_count
+
+
+# %%
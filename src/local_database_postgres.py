@@ -1,14 +1,56 @@
 # %%
 # Imports #
 
+import gzip
+import io
 import json
 import os
+import queue
+import time
+from collections import deque
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
 
-import pandas as pd
 from dotenv import load_dotenv
-from psycopg2 import pool
+from psycopg2 import errors, pool
+from psycopg2.extras import execute_values
 from tqdm import tqdm
 
+from copy_shards import get_key_shard, load_copy_shards_manifest
+from open_library_api import get_book_info_by_isbn
+from open_library_dump import (
+    AUTHORS_COLUMNS,
+    DICT_KEY_COLUMNS,
+    DICT_RECORD_LINE_TYPES,
+    REDIRECT_LINE_TYPES,
+    REDIRECTS_COLUMNS,
+    STORAGE_LAYOUT,
+    WORKS_COLUMNS,
+    WORK_AUTHORS_COLUMNS,
+    DumpFile,
+    RevisionMap,
+    format_copy_line,
+    get_author_key_from_ref,
+    get_author_row,
+    get_checkpoint_path,
+    get_edition_row_and_isbns,
+    get_layout_columns,
+    get_load_stats,
+    get_redirect_row,
+    get_work_row_and_author_keys,
+    iter_dump_lines_with_progress,
+    iter_dump_parse_tasks,
+    iter_dump_records,
+    limit_parsed_rows,
+    load_checkpoint,
+    normalize_isbn,
+    run_dump_pipeline,
+    save_checkpoint,
+)
+from query_results import check_query_output, format_query_result
 from utils.display_tools import pprint_df, pprint_dict, pprint_ls  # noqa
 
 # %%
@@ -19,9 +61,20 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 verbose = False
 
 COMMIT_EVERY_ROW_NUM = 100000
+DEADLOCK_RETRIES = 3
+FRESH_BUILD_MAINTENANCE_WORK_MEM = "2GB"
+FRESH_BUILD_PARALLEL_WORKERS = 4
+SERVER_CURSOR_ITERSIZE = 100000
+PARTITION_WRITES_IN_FLIGHT = 2  # Batches queued per partition in partitioned loads
 
 dict_vars: dict[str, list[str]] = {}
 
+# SQL converting the JSON text of a staged column to its compact layout type
+DICT_COMPACT_COLUMN_SQL = {
+    "source_records": "json_to_text_array({})",
+    "covers": "json_to_int_array({})",
+}
+
 
 # %%
 # Credentials #
@@ -35,7 +88,7 @@ POSTGRES_URL = os.getenv("POSTGRES_URL")
 POSTGRES_USER = os.getenv("POSTGRES_USER")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 POSTGRES_PORT = os.getenv("POSTGRES_PORT")
-POSTGRES_DB = "book_bot"
+POSTGRES_DB = os.getenv("POSTGRES_DB", "book_bot")
 
 # %%
 # Connect To Postgres #
@@ -67,19 +120,135 @@ def release_connection(conn):
 # Connect To Postgres #
 
 
-def ensure_postgres_tables():
+def ensure_postgres_layout_functions(pg_cursor):
+    """
+    Create the functions converting JSON text columns to the compact layout.
+
+    Empty lists become NULL, which takes no space in a row.
+    """
+    pg_cursor.execute(
+        """
+        CREATE OR REPLACE FUNCTION json_to_int_array(value TEXT)
+        RETURNS INTEGER[] AS $$
+            SELECT NULLIF(
+                ARRAY(SELECT jsonb_array_elements_text(value::jsonb)::INTEGER),
+                '{}'
+            )
+        $$ LANGUAGE SQL IMMUTABLE;
+        """
+    )
+    pg_cursor.execute(
+        """
+        CREATE OR REPLACE FUNCTION json_to_text_array(value TEXT)
+        RETURNS TEXT[] AS $$
+            SELECT NULLIF(ARRAY(SELECT jsonb_array_elements_text(value::jsonb)), '{}')
+        $$ LANGUAGE SQL IMMUTABLE;
+        """
+    )
+
+
+def get_storage_layout_postgres(pg_cursor):
+    """Storage layout of the existing tables, "compact" if works.covers is an array."""
+    pg_cursor.execute(
+        """
+        SELECT data_type FROM information_schema.columns
+        WHERE table_schema = current_schema()
+        AND table_name = 'works' AND column_name = 'covers';
+        """
+    )
+    row = pg_cursor.fetchone()
+    return "compact" if row and row[0] == "ARRAY" else "json"
+
+
+def get_layout_column_sql(columns, layout, value_sql=None):
+    """
+    Columns of a table stored in a layout and the SQL giving their values.
+
+    Each value is the column itself, or `value_sql` (e.g. "%s") when given,
+    wrapped in its conversion from JSON text for the compact layout.
+
+    Returns:
+        tuple: (columns, value expressions)
+    """
+    columns = get_layout_columns(columns, layout)
+    ls_values = []
+    for column in columns:
+        value = value_sql or column
+        if layout == "compact" and column in DICT_COMPACT_COLUMN_SQL:
+            value = DICT_COMPACT_COLUMN_SQL[column].format(value)
+        ls_values.append(value)
+    return columns, ls_values
+
+
+def ensure_postgres_redirects_table(pg_cursor):
+    """
+    Create the `redirects` table of keys that were merged into another key.
+
+    Deleted keys are only removed from their tables, they are not recorded.
+    """
+    pg_cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS redirects (
+            key TEXT PRIMARY KEY,
+            target TEXT NOT NULL
+        );
+        """
+    )
+
+
+def ensure_postgres_search_indexes(pg_cursor):
+    """
+    Create the pg_trgm GIN indexes behind the title and author name searches.
+
+    The indexes are on the lowercased text, so the LIKE conditions built by
+    get_search_condition look up any substring of three or more characters in
+    the index instead of scanning every row.
+    """
+    pg_cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    pg_cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS works_title_trgm_idx
+        ON works USING GIN (LOWER(title) gin_trgm_ops);
+        """
+    )
+    pg_cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS authors_name_trgm_idx
+        ON authors USING GIN (LOWER(name) gin_trgm_ops);
+        """
+    )
+
+
+def ensure_postgres_tables(num_partitions=None, layout=STORAGE_LAYOUT):
+    """
+    Create the tables if they do not exist yet.
+
+    With `num_partitions`, `works` and `work_authors` are created
+    hash-partitioned on work_key into that many partitions (works_p0,
+    work_authors_p0, ...), so a work and its links land in partitions with
+    the same number. New tables are created in the storage `layout`, existing
+    tables are never converted (see migrate_postgres_storage_layout).
+    """
     pg_conn = get_connection()
     pg_cursor = pg_conn.cursor()
+    partition_clause = "PARTITION BY HASH (work_key)" if num_partitions else ""
+    source_records_type = "TEXT[]" if layout == "compact" else "TEXT"
+    covers_type = "INTEGER[]" if layout == "compact" else "TEXT"
+    # the compact layout drops the authors blob, the links are in work_authors
+    authors_column = "" if layout == "compact" else ", authors TEXT"
+
+    ensure_postgres_layout_functions(pg_cursor)
+    ensure_postgres_redirects_table(pg_cursor)
 
     # Create authors table
     pg_cursor.execute(
-        """
+        f"""
         CREATE TABLE IF NOT EXISTS authors (
             author_key TEXT PRIMARY KEY,
             revision INTEGER,
             last_modified TIMESTAMP WITHOUT TIME ZONE,
             name TEXT,
-            source_records TEXT,
+            source_records {source_records_type},
             latest_revision INTEGER,
             created TIMESTAMP WITHOUT TIME ZONE
         );
@@ -88,53 +257,463 @@ def ensure_postgres_tables():
 
     # Create works table
     pg_cursor.execute(
-        """
+        f"""
         CREATE TABLE IF NOT EXISTS works (
             work_key TEXT PRIMARY KEY,
             revision INTEGER,
             last_modified TIMESTAMP WITHOUT TIME ZONE,
             title TEXT,
             created TIMESTAMP WITHOUT TIME ZONE,
-            covers TEXT,
-            latest_revision INTEGER,
-            authors TEXT
-        );
+            covers {covers_type},
+            latest_revision INTEGER{authors_column}
+        ) {partition_clause};
         """
     )
 
     # Create work_authors table (many-to-many relationship)
     pg_cursor.execute(
-        """
+        f"""
         CREATE TABLE IF NOT EXISTS work_authors (
             work_key TEXT,
             author_key TEXT,
             FOREIGN KEY (work_key) REFERENCES works(work_key) ON DELETE CASCADE,
             FOREIGN KEY (author_key) REFERENCES authors(author_key) ON DELETE CASCADE,
             PRIMARY KEY (work_key, author_key)
-        );
+        ) {partition_clause};
         """
     )
 
+    for partition in range(num_partitions or 0):
+        for table_name in ("works", "work_authors"):
+            pg_cursor.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {table_name}_p{partition}
+                PARTITION OF {table_name}
+                FOR VALUES WITH (MODULUS {num_partitions}, REMAINDER {partition});
+                """
+            )
+
+    # the primary key only serves lookups by work, author searches and
+    # redirect resolution look links up by author
+    pg_cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS work_authors_author_key_idx
+        ON work_authors (author_key);
+        """
+    )
+
+    ensure_postgres_search_indexes(pg_cursor)
+
     pg_conn.commit()
     pg_cursor.close()
     pg_conn.close()
 
+    ensure_postgres_editions_tables()
+
     print("Tables ensured.")
 
 
+def ensure_postgres_editions_tables():
+    """
+    Create the `editions` table and its ISBN lookup table.
+
+    `edition_isbns` holds every ISBN of an edition normalized to ISBN-13, so
+    its primary key is the lookup index for both ISBN-10 and ISBN-13 queries.
+    `editions.work_key` links an edition back to `works`.
+    """
+    pg_conn = get_connection()
+    try:
+        with pg_conn.cursor() as pg_cursor:
+            ensure_postgres_redirects_table(pg_cursor)
+            pg_cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS editions (
+                    edition_key TEXT PRIMARY KEY,
+                    revision INTEGER,
+                    last_modified TIMESTAMP WITHOUT TIME ZONE,
+                    title TEXT,
+                    work_key TEXT,
+                    publish_date TEXT,
+                    publishers TEXT,
+                    number_of_pages INTEGER,
+                    covers TEXT
+                );
+                """
+            )
+
+            pg_cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS editions_work_key_idx
+                ON editions (work_key);
+                """
+            )
+
+            pg_cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS edition_isbns (
+                    isbn TEXT,
+                    edition_key TEXT,
+                    FOREIGN KEY (edition_key) REFERENCES editions(edition_key)
+                        ON DELETE CASCADE,
+                    PRIMARY KEY (isbn, edition_key)
+                );
+                """
+            )
+        pg_conn.commit()
+    finally:
+        release_connection(pg_conn)
+
+
+def check_fresh_build_resume(resume, fresh_build):
+    """
+    Refuse to resume a fresh build. Its UNLOGGED tables are truncated by a
+    crash, so a checkpoint could point past committed rows that are gone.
+    """
+    if resume and fresh_build:
+        raise ValueError("A fresh build cannot resume, start it again from the top")
+
+
+def ensure_postgres_fresh_build_tables():
+    """
+    Create empty UNLOGGED tables without keys or indexes for a fresh build.
+
+    Loading into these tables skips WAL, B-tree maintenance and foreign key
+    checks. finalize_postgres_fresh_build adds the keys and indexes once the
+    load is done. Refuses to run if the tables already exist, incremental
+    loads should keep using ensure_postgres_tables and the constrained path.
+    """
+    pg_conn = get_connection()
+    try:
+        with pg_conn.cursor() as pg_cursor:
+            pg_cursor.execute(
+                """
+                SELECT table_name FROM information_schema.tables
+                WHERE table_schema = current_schema()
+                AND table_name IN ('authors', 'works', 'work_authors', 'redirects');
+                """
+            )
+            ls_existing_tables = [row[0] for row in pg_cursor.fetchall()]
+            if ls_existing_tables:
+                raise ValueError(
+                    f"Tables already exist: {ls_existing_tables}, "
+                    "drop them for a fresh build or use the incremental loaders"
+                )
+
+            ensure_postgres_layout_functions(pg_cursor)
+
+            pg_cursor.execute(
+                """
+                CREATE UNLOGGED TABLE authors (
+                    author_key TEXT,
+                    revision INTEGER,
+                    last_modified TIMESTAMP WITHOUT TIME ZONE,
+                    name TEXT,
+                    source_records TEXT,
+                    latest_revision INTEGER,
+                    created TIMESTAMP WITHOUT TIME ZONE
+                );
+                """
+            )
+
+            pg_cursor.execute(
+                """
+                CREATE UNLOGGED TABLE works (
+                    work_key TEXT,
+                    revision INTEGER,
+                    last_modified TIMESTAMP WITHOUT TIME ZONE,
+                    title TEXT,
+                    created TIMESTAMP WITHOUT TIME ZONE,
+                    covers TEXT,
+                    latest_revision INTEGER,
+                    authors TEXT
+                );
+                """
+            )
+
+            pg_cursor.execute(
+                """
+                CREATE UNLOGGED TABLE work_authors (
+                    work_key TEXT,
+                    author_key TEXT
+                );
+                """
+            )
+
+            # deletes are kept as NULL targets until the build is finalized
+            pg_cursor.execute(
+                """
+                CREATE UNLOGGED TABLE redirects (
+                    key TEXT,
+                    target TEXT
+                );
+                """
+            )
+        pg_conn.commit()
+    finally:
+        release_connection(pg_conn)
+
+    print("Fresh build tables created.")
+
+
+def finalize_postgres_fresh_build(layout=STORAGE_LAYOUT):
+    """
+    Turn the fresh build tables into the constrained schema of ensure_postgres_tables.
+
+    Duplicate keys are removed keeping the newest revision, redirected and
+    deleted keys are removed with their links, links to redirected authors are
+    pointed at the target, author stubs are added for linked authors missing
+    from the authors dump, and the tables are
+    switched to logged. SET LOGGED rewrites a table together with its indexes,
+    so it runs before the keys are built. For the compact `layout` the column
+    conversions run in the same ALTER TABLE, so each table is still rewritten
+    once. Primary keys, the author lookup index, the foreign keys and the
+    search indexes are then built once over the full tables, using parallel
+    maintenance workers for the index builds.
+    """
+    dict_layout_changes = {"authors": "", "works": "", "work_authors": ""}
+    if layout == "compact":
+        dict_layout_changes["authors"] = (
+            ", ALTER COLUMN source_records TYPE TEXT[]"
+            " USING json_to_text_array(source_records)"
+        )
+        dict_layout_changes["works"] = (
+            ", ALTER COLUMN covers TYPE INTEGER[] USING json_to_int_array(covers)"
+            ", DROP COLUMN authors"
+        )
+
+    pg_conn = get_connection()
+    try:
+        with pg_conn.cursor() as pg_cursor:
+            pg_cursor.execute(
+                f"SET maintenance_work_mem = '{FRESH_BUILD_MAINTENANCE_WORK_MEM}';"
+            )
+            pg_cursor.execute(
+                "SET max_parallel_maintenance_workers = "
+                f"{FRESH_BUILD_PARALLEL_WORKERS};"
+            )
+
+            print("Removing duplicate keys...")
+            # concurrent writers do not append in dump order, so the newest
+            # revision wins and the physical position only breaks ties
+            for table_name, key_column in (
+                ("authors", "author_key"),
+                ("works", "work_key"),
+            ):
+                pg_cursor.execute(
+                    f"""
+                    DELETE FROM {table_name} a USING {table_name} b
+                    WHERE a.{key_column} = b.{key_column}
+                    AND (
+                        COALESCE(a.revision, -1),
+                        COALESCE(a.last_modified, '-infinity'),
+                        a.ctid
+                    ) < (
+                        COALESCE(b.revision, -1),
+                        COALESCE(b.last_modified, '-infinity'),
+                        b.ctid
+                    );
+                    """
+                )
+            # redirect lines have no revision, every loader writes all lines
+            # of a key on one connection in dump order, so the last one wins
+            pg_cursor.execute(
+                """
+                DELETE FROM redirects a USING redirects b
+                WHERE a.key = b.key AND a.ctid < b.ctid;
+                """
+            )
+
+            # a dump has one line per key, so a redirected or deleted key has
+            # no record, but it can still be linked to from other works
+            print("Applying redirects and deletes...")
+            pg_cursor.execute(
+                "DELETE FROM authors a USING redirects r WHERE a.author_key = r.key;"
+            )
+            pg_cursor.execute(
+                "DELETE FROM works w USING redirects r WHERE w.work_key = r.key;"
+            )
+            pg_cursor.execute(
+                """
+                DELETE FROM work_authors wa USING redirects r
+                WHERE wa.work_key = r.key;
+                """
+            )
+            pg_cursor.execute(
+                """
+                UPDATE work_authors wa SET author_key = r.target
+                FROM redirects r
+                WHERE wa.author_key = r.key AND r.target IS NOT NULL;
+                """
+            )
+            pg_cursor.execute(
+                """
+                DELETE FROM work_authors wa USING redirects r
+                WHERE wa.author_key = r.key AND r.target IS NULL;
+                """
+            )
+            pg_cursor.execute("DELETE FROM redirects WHERE target IS NULL;")
+
+            pg_cursor.execute(
+                """
+                DELETE FROM work_authors a USING work_authors b
+                WHERE a.work_key = b.work_key
+                AND a.author_key = b.author_key
+                AND a.ctid < b.ctid;
+                """
+            )
+
+            print("Adding author stubs...")
+            pg_cursor.execute(
+                """
+                INSERT INTO authors (author_key)
+                SELECT DISTINCT wa.author_key FROM work_authors wa
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM authors a WHERE a.author_key = wa.author_key
+                );
+                """
+            )
+
+            print("Switching tables to logged...")
+            for table_name, layout_changes in dict_layout_changes.items():
+                pg_cursor.execute(
+                    f"ALTER TABLE {table_name} SET LOGGED{layout_changes};"
+                )
+
+            pg_cursor.execute(
+                "ALTER TABLE redirects SET LOGGED, ALTER COLUMN target SET NOT NULL;"
+            )
+
+            print("Building keys and indexes...")
+            pg_cursor.execute("ALTER TABLE authors ADD PRIMARY KEY (author_key);")
+            pg_cursor.execute("ALTER TABLE works ADD PRIMARY KEY (work_key);")
+            pg_cursor.execute(
+                "ALTER TABLE work_authors ADD PRIMARY KEY (work_key, author_key);"
+            )
+            pg_cursor.execute(
+                """
+                CREATE INDEX IF NOT EXISTS work_authors_author_key_idx
+                ON work_authors (author_key);
+                """
+            )
+            pg_cursor.execute(
+                """
+                ALTER TABLE work_authors
+                ADD FOREIGN KEY (work_key) REFERENCES works(work_key) ON DELETE CASCADE,
+                ADD FOREIGN KEY (author_key) REFERENCES authors(author_key)
+                    ON DELETE CASCADE;
+                """
+            )
+
+            pg_cursor.execute("ALTER TABLE redirects ADD PRIMARY KEY (key);")
+            ensure_postgres_search_indexes(pg_cursor)
+
+            for table_name in ("authors", "works", "work_authors", "redirects"):
+                pg_cursor.execute(f"ANALYZE {table_name};")
+        pg_conn.commit()
+    finally:
+        release_connection(pg_conn)
+
+    print("Fresh build finalized.")
+
+
+# %%
+# Storage Layout Migration #
+
+
+def get_postgres_table_bytes(pg_cursor, table_names):
+    """Bytes of tables with their indexes and TOAST data, including partitions."""
+    total_bytes = 0
+    for table_name in table_names:
+        pg_cursor.execute(
+            """
+            SELECT COALESCE(SUM(pg_total_relation_size(relid)), 0)
+            FROM pg_partition_tree(%s::regclass);
+            """,
+            (table_name,),
+        )
+        total_bytes += int(pg_cursor.fetchone()[0])
+    return total_bytes
+
+
+def migrate_postgres_storage_layout():
+    """
+    Convert json layout `authors` and `works` tables to the compact layout.
+
+    `authors.source_records` becomes TEXT[], `works.covers` INTEGER[] and
+    `works.authors` is dropped, in one ALTER TABLE per table. Each table is
+    rewritten once by its column type change, which also clears the dropped
+    column, and holds an exclusive lock until the migration commits.
+
+    Returns:
+        dict or None: Bytes of the tables before and after and the bytes
+            saved, or None if the tables are already compact.
+    """
+    start_time = time.perf_counter()
+    pg_conn = get_connection()
+    try:
+        with pg_conn.cursor() as pg_cursor:
+            if get_storage_layout_postgres(pg_cursor) == "compact":
+                pg_conn.rollback()
+                print("Tables already use the compact layout")
+                return None
+
+            bytes_before = get_postgres_table_bytes(pg_cursor, ("authors", "works"))
+            ensure_postgres_layout_functions(pg_cursor)
+
+            print("Converting authors...")
+            pg_cursor.execute(
+                """
+                ALTER TABLE authors
+                ALTER COLUMN source_records TYPE TEXT[]
+                    USING json_to_text_array(source_records);
+                """
+            )
+            print("Converting works...")
+            pg_cursor.execute(
+                """
+                ALTER TABLE works
+                DROP COLUMN authors,
+                ALTER COLUMN covers TYPE INTEGER[] USING json_to_int_array(covers);
+                """
+            )
+            pg_conn.commit()
+
+            for table_name in ("authors", "works"):
+                pg_cursor.execute(f"ANALYZE {table_name};")
+            pg_conn.commit()
+            bytes_after = get_postgres_table_bytes(pg_cursor, ("authors", "works"))
+    finally:
+        release_connection(pg_conn)
+
+    return {
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_saved": bytes_before - bytes_after,
+        "percent_saved": round(100 * (bytes_before - bytes_after) / bytes_before, 1),
+        "seconds": round(time.perf_counter() - start_time, 2),
+    }
+
+
 # %%
 # Queries #
 
 
-def query_postgres(query):
-    """Executes a given SQL query and returns a Pandas DataFrame."""
+def query_postgres(query, params=None, output="dataframe"):
+    """
+    Executes a given SQL query and returns a Pandas DataFrame.
+
+    `params` are bound to the %s placeholders of the query by psycopg2.
+    `output` picks another shape from QUERY_OUTPUT_FORMATS, e.g. "column" for
+    the first column as a list without building a DataFrame.
+    """
+    check_query_output(output)
     pg_conn = None
     pg_cursor = None
     try:
         pg_conn = get_connection()
         pg_cursor = pg_conn.cursor()
 
-        pg_cursor.execute(query)
+        pg_cursor.execute(query, params)
 
         if not pg_cursor.description:
             raise ValueError("No data found or invalid query.")
@@ -142,10 +721,7 @@ def query_postgres(query):
         # Get column names
         columns = [desc[0] for desc in pg_cursor.description]
 
-        # Convert result to DataFrame
-        df = pd.DataFrame(pg_cursor.fetchall(), columns=columns)
-
-        return df
+        return format_query_result(pg_cursor.fetchall(), columns, output)
     finally:
         if pg_cursor:
             pg_cursor.close()
@@ -153,6 +729,62 @@ def query_postgres(query):
             release_connection(pg_conn)
 
 
+def iter_query_postgres(query, params=None, itersize=SERVER_CURSOR_ITERSIZE):
+    """
+    Executes a given SQL query and yields its rows in batches of tuples.
+
+    The rows are fetched `itersize` at a time from a named server-side cursor,
+    so only one batch is held in memory however large the result is. Use
+    query_postgres for small results that are wanted as a DataFrame, and
+    itertools.chain.from_iterable to iterate over single rows.
+
+    The connection stays checked out of the pool until the generator is
+    exhausted or closed.
+    """
+    pg_conn = get_connection()
+    try:
+        with pg_conn.cursor(name="iter_query") as pg_cursor:
+            pg_cursor.itersize = itersize
+            pg_cursor.execute(query, params)
+            while True:
+                rows = pg_cursor.fetchmany(itersize)
+                if not rows:
+                    break
+                yield rows
+    finally:
+        # ends the read transaction the named cursor lived in
+        pg_conn.rollback()
+        release_connection(pg_conn)
+
+
+def get_search_pattern(text):
+    """LIKE pattern matching `text` anywhere, with its LIKE wildcards escaped."""
+    escaped_text = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped_text}%"
+
+
+def get_search_condition(column_sql, search_string, match_words=True):
+    """
+    Build a case-insensitive substring search on a text column.
+
+    Each word of `search_string` must appear in the column, or the whole
+    string with `match_words=False`. The condition compares LOWER(column) so
+    it is answered by the trigram indexes of ensure_postgres_search_indexes.
+    The patterns are bound as parameters, never formatted into the SQL.
+
+    Returns:
+        tuple: (condition_sql, ls_params)
+    """
+    ls_parts = search_string.split() if match_words else [search_string]
+    ls_params = [get_search_pattern(part) for part in ls_parts if part]
+    if not ls_params:
+        return "TRUE", []
+    condition_sql = " AND ".join(
+        f"LOWER({column_sql}) LIKE LOWER(%s)" for _ in ls_params
+    )
+    return condition_sql, ls_params
+
+
 def get_authors_list():
     """
     Get a list of all authors
@@ -166,13 +798,12 @@ def get_authors_list():
     query = """
     SELECT DISTINCT LOWER(name) AS name, LENGTH(LOWER(name)) AS name_len
     FROM authors
+    WHERE name <> ''
     ORDER BY name_len DESC
     """
 
-    df_authors = query_postgres(query)
-    # fillna
-    df_authors = df_authors.fillna("")
-    ls_authors = df_authors["name"].tolist()
+    # streamed, so only the list of names is held and no DataFrame is built
+    ls_authors = [name for rows in iter_query_postgres(query) for name, _ in rows]
 
     dict_vars[key] = ls_authors.copy()
 
@@ -183,68 +814,71 @@ def get_series_by_author(author_name):
     """
     Fetches all works by a given author where the title contains a slash (/), indicating a series.
     """
+    author_condition, ls_params = get_search_condition(
+        "a.name", author_name, match_words=False
+    )
     query = f"""
-    SELECT w.work_key, w.title
+    SELECT w.title
     FROM works w
     JOIN work_authors wa ON w.work_key = wa.work_key
     JOIN authors a ON wa.author_key = a.author_key
-    WHERE a.name ILIKE '%{author_name}%' AND w.title LIKE '%/%'
+    WHERE {author_condition} AND w.title LIKE %s
     ORDER BY w.title;
     """
-    df = query_postgres(query)
-    return df["title"].tolist()
+    return query_postgres(query, ls_params + ["%/%"], output="column")
 
 
 def get_books_by_author(author_name):
     """
     Fetches all unique books by a given author.
     """
+    author_condition, ls_params = get_search_condition(
+        "a.name", author_name, match_words=False
+    )
     query = f"""
     SELECT DISTINCT w.title
     FROM works w
     JOIN work_authors wa ON w.work_key = wa.work_key
     JOIN authors a ON wa.author_key = a.author_key
-    WHERE a.name ILIKE '%{author_name}%'
+    WHERE {author_condition}
     ORDER BY w.title;
     """
 
-    df = query_postgres(query)
-    return df["title"].tolist()
-
-
-# %%
-# Book Data: Paths #
-
-
-def count_lines(file_path):
-    """Fast way to count total lines in a file."""
-    with open(file_path, "r", encoding="utf-8") as f:
-        num_lines = sum(1 for _ in f)
-
-    print(f"Total lines in {file_path}: {num_lines}")
-    return num_lines
+    return query_postgres(query, ls_params, output="column")
 
 
 # %%
 # Book Data: Authors #
 
 
-def load_db_authors_postgres(authors_text_file_path, max_rows_to_read=None):
-    row_counter = 0
+def load_db_authors_postgres(
+    authors_text_file_path, max_rows_to_read=None, resume=False
+):
+    start_time = time.perf_counter()
+    checkpoint_path = get_checkpoint_path(authors_text_file_path, "postgres_authors")
+    start_offset, row_counter = 0, 0
+    if resume:
+        start_offset, row_counter = load_checkpoint(
+            checkpoint_path, authors_text_file_path
+        )
+    resumed_row_counter = row_counter
     pg_conn = None
     pg_cursor = None
 
-    total_lines = count_lines(authors_text_file_path)
-    if max_rows_to_read:
-        total_lines = min(total_lines, max_rows_to_read)
-
     try:
         pg_conn = get_connection()
         pg_cursor = pg_conn.cursor()
+        ensure_postgres_staging_tables(pg_cursor)
+        _, ls_values = get_layout_column_sql(
+            AUTHORS_COLUMNS, get_storage_layout_postgres(pg_cursor), "%s"
+        )
+        dict_redirect_rows = {}
 
         # read the first few lines of the text file
-        with open(authors_text_file_path, "r") as f:
-            for line in tqdm(f, total=total_lines, desc="Processing Authors"):
+        with DumpFile(authors_text_file_path, start_offset) as dump_file:
+            resumed_bytes = dump_file.tell_bytes()
+            lines = iter_dump_lines_with_progress(dump_file, "Processing Authors")
+            for line in lines:
                 line = line.strip()
                 if not line:
                     continue
@@ -276,6 +910,15 @@ def load_db_authors_postgres(authors_text_file_path, max_rows_to_read=None):
 
                     pprint_dict(record)
 
+                if line_type in REDIRECT_LINE_TYPES:
+                    dict_redirect_rows[line_key] = (row_counter,) + get_redirect_row(
+                        line_type, line_key, record
+                    )
+                    continue
+                if line_type != DICT_RECORD_LINE_TYPES["authors"]:
+                    continue
+                dict_redirect_rows.pop(line_key, None)
+
                 name = record.get("name", "")
                 source_records = json.dumps(record.get("source_records", []))
                 latest_revision = record.get("latest_revision")
@@ -286,12 +929,12 @@ def load_db_authors_postgres(authors_text_file_path, max_rows_to_read=None):
                     print(f"source_records: {source_records}")
                     print(f"created: {created}")
 
-                query = """
+                query = f"""
                 INSERT INTO authors (
                     author_key, revision, last_modified, name, 
                     source_records, latest_revision, created
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                VALUES ({', '.join(ls_values)})
                 ON CONFLICT (author_key)
                 DO UPDATE SET
                     revision = EXCLUDED.revision,
@@ -321,13 +964,24 @@ def load_db_authors_postgres(authors_text_file_path, max_rows_to_read=None):
 
                 row_counter += 1
                 if row_counter % COMMIT_EVERY_ROW_NUM == 0:
+                    write_redirect_rows_postgres(
+                        pg_cursor, "authors", dict_redirect_rows
+                    )
                     pg_conn.commit()
+                    save_checkpoint(checkpoint_path, dump_file, row_counter)
                 if max_rows_to_read and row_counter >= max_rows_to_read:
                     break
 
+            bytes_read = dump_file.tell_bytes()
+
+        write_redirect_rows_postgres(pg_cursor, "authors", dict_redirect_rows)
         pg_conn.commit()
+        save_checkpoint(checkpoint_path, dump_file, row_counter)
 
         print("Authors row count updated: ", row_counter)
+        return get_load_stats(
+            row_counter - resumed_row_counter, bytes_read - resumed_bytes, start_time
+        )
     finally:
         if pg_cursor:
             pg_cursor.close()
@@ -339,22 +993,100 @@ def load_db_authors_postgres(authors_text_file_path, max_rows_to_read=None):
 # Book Data: Works #
 
 
-def load_db_works_postgres(works_text_file_path, max_rows_to_read=None, verbose=False):
-    row_counter = 0
+def write_redirect_rows_postgres(pg_cursor, dump_type, dict_redirect_rows):
+    """
+    Apply the redirect and delete lines collected by a row-by-row loader.
+
+    `dict_redirect_rows` maps a key to its last (line_number, key, target)
+    row. The loaders drop a key from it when a later record line of the key
+    is upserted, so an event never removes a newer record. The dict is
+    cleared for the next batch.
+    """
+    write_redirects_batch_copy(pg_cursor, dump_type, list(dict_redirect_rows.values()))
+    dict_redirect_rows.clear()
+
+
+def write_work_author_links(pg_cursor, author_keys, work_author_pairs):
+    """
+    Create the author stubs and `work_authors` links of a batch of works.
+
+    The keys and pairs are already deduplicated in sets. Each is written
+    sorted, in a single multi-row statement, instead of one round trip per
+    author of every work. Redirected authors are replaced by their target.
+    """
+    if not work_author_pairs:
+        return
+
+    ls_author_keys = [(author_key,) for author_key in sorted(author_keys)]
+    execute_values(
+        pg_cursor,
+        """
+        INSERT INTO authors (author_key)
+        SELECT COALESCE(r.target, v.author_key)
+        FROM (VALUES %s) AS v (author_key)
+        LEFT JOIN redirects r ON r.key = v.author_key
+        ON CONFLICT (author_key) DO NOTHING;
+        """,
+        ls_author_keys,
+        page_size=len(ls_author_keys),
+    )
+
+    ls_work_author_pairs = sorted(work_author_pairs)
+    execute_values(
+        pg_cursor,
+        """
+        INSERT INTO work_authors (work_key, author_key)
+        SELECT v.work_key, COALESCE(r.target, v.author_key)
+        FROM (VALUES %s) AS v (work_key, author_key)
+        LEFT JOIN redirects r ON r.key = v.author_key
+        ON CONFLICT (work_key, author_key) DO NOTHING;
+        """,
+        ls_work_author_pairs,
+        page_size=len(ls_work_author_pairs),
+    )
+
+
+def load_db_works_postgres(
+    works_text_file_path, max_rows_to_read=None, verbose=False, resume=False
+):
+    start_time = time.perf_counter()
+    checkpoint_path = get_checkpoint_path(works_text_file_path, "postgres_works")
+    start_offset, row_counter = 0, 0
+    if resume:
+        start_offset, row_counter = load_checkpoint(
+            checkpoint_path, works_text_file_path
+        )
+    resumed_row_counter = row_counter
     pg_conn = None
     pg_cursor = None
 
-    total_lines = count_lines(works_text_file_path)
-    if max_rows_to_read:
-        total_lines = min(total_lines, max_rows_to_read)
-
     try:
         pg_conn = get_connection()
         pg_cursor = pg_conn.cursor()
+        ensure_postgres_staging_tables(pg_cursor)
+
+        set_author_keys = set()
+        set_work_author_pairs = set()
+        dict_redirect_rows = {}
+
+        layout = get_storage_layout_postgres(pg_cursor)
+        works_columns, ls_values = get_layout_column_sql(WORKS_COLUMNS, layout, "%s")
+        set_clause = ",\n                        ".join(
+            f"{column} = EXCLUDED.{column}" for column in works_columns[1:]
+        )
+        works_query = f"""
+                    INSERT INTO works ({', '.join(works_columns)})
+                    VALUES ({', '.join(ls_values)})
+                    ON CONFLICT(work_key)
+                    DO UPDATE SET
+                        {set_clause};
+                    """
 
         # Read the first few lines of the text file
-        with open(works_text_file_path, "r") as f:
-            for line in tqdm(f, total=total_lines, desc="Processing Works"):
+        with DumpFile(works_text_file_path, start_offset) as dump_file:
+            resumed_bytes = dump_file.tell_bytes()
+            lines = iter_dump_lines_with_progress(dump_file, "Processing Works")
+            for line in lines:
                 line = line.strip()
                 if not line:
                     continue
@@ -383,86 +1115,703 @@ def load_db_works_postgres(works_text_file_path, max_rows_to_read=None, verbose=
                     print(f"JSON parse error for line_key: {line_key}: {e}")
                     continue
 
+                if line_type in REDIRECT_LINE_TYPES:
+                    dict_redirect_rows[line_key] = (row_counter,) + get_redirect_row(
+                        line_type, line_key, record
+                    )
+                    continue
+                if line_type != DICT_RECORD_LINE_TYPES["works"]:
+                    continue
+                dict_redirect_rows.pop(line_key, None)
+
                 title = record.get("title", "")
                 created = record.get("created", {}).get("value", "")
                 covers = json.dumps(record.get("covers", []))
                 latest_revision = record.get("latest_revision", "")
                 authors_list = record.get("authors", [])
 
-                # Ensure authors exist before inserting into `work_authors`
+                # Collect authors and links, written per batch before each commit
                 for author in authors_list:
-                    author_key = (
-                        author.get("author", {}).get("key")
-                        if isinstance(author.get("author", {}), dict)
-                        else author.get("author", {})
-                    )
+                    author_key = get_author_key_from_ref(author)
                     if author_key:
-                        pg_cursor.execute(
-                            """
-                            INSERT INTO authors (author_key)
-                            VALUES (%s)
-                            ON CONFLICT (author_key) DO NOTHING;
-                            """,
-                            (author_key,),
-                        )
+                        set_author_keys.add(author_key)
+                        set_work_author_pairs.add((line_key, author_key))
 
                 # Insert work into `works`
-                pg_cursor.execute(
-                    """
-                    INSERT INTO works (
-                        work_key, revision, last_modified, title, 
-                        created, covers, latest_revision, authors
+                work_row = (
+                    line_key,
+                    line_revision,
+                    line_last_modified,
+                    title,
+                    created,
+                    covers,
+                    latest_revision,
+                    json.dumps(authors_list),
+                )
+                pg_cursor.execute(works_query, work_row[: len(works_columns)])
+
+                row_counter += 1
+                if row_counter % COMMIT_EVERY_ROW_NUM == 0:
+                    write_work_author_links(
+                        pg_cursor, set_author_keys, set_work_author_pairs
                     )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT(work_key)
-                    DO UPDATE SET
-                        revision = EXCLUDED.revision,
-                        last_modified = EXCLUDED.last_modified,
-                        title = EXCLUDED.title,
-                        created = EXCLUDED.created,
-                        covers = EXCLUDED.covers,
-                        latest_revision = EXCLUDED.latest_revision,
-                        authors = EXCLUDED.authors;
-                    """,
-                    (
-                        line_key,
-                        line_revision,
-                        line_last_modified,
-                        title,
-                        created,
-                        covers,
-                        latest_revision,
-                        json.dumps(authors_list),
-                    ),
-                )
+                    write_redirect_rows_postgres(pg_cursor, "works", dict_redirect_rows)
+                    pg_conn.commit()
+                    save_checkpoint(checkpoint_path, dump_file, row_counter)
+                    set_author_keys.clear()
+                    set_work_author_pairs.clear()
 
-                # Insert relationships into `work_authors`
-                for author in authors_list:
-                    author_key = (
-                        author.get("author", {}).get("key")
-                        if isinstance(author.get("author", {}), dict)
-                        else author.get("author", {})
+                if max_rows_to_read and row_counter >= max_rows_to_read:
+                    break
+
+            bytes_read = dump_file.tell_bytes()
+
+        write_work_author_links(pg_cursor, set_author_keys, set_work_author_pairs)
+        write_redirect_rows_postgres(pg_cursor, "works", dict_redirect_rows)
+        pg_conn.commit()
+        save_checkpoint(checkpoint_path, dump_file, row_counter)
+
+        print("Works row count updated:", row_counter)
+        return get_load_stats(
+            row_counter - resumed_row_counter, bytes_read - resumed_bytes, start_time
+        )
+    finally:
+        if pg_cursor:
+            pg_cursor.close()
+        if pg_conn:
+            release_connection(pg_conn)
+
+
+# %%
+# Book Data: Bulk COPY Loaders #
+
+
+EDITIONS_COLUMNS = (
+    "edition_key",
+    "revision",
+    "last_modified",
+    "title",
+    "work_key",
+    "publish_date",
+    "publishers",
+    "number_of_pages",
+    "covers",
+)
+
+EDITION_ISBNS_COLUMNS = ("isbn", "edition_key")
+
+
+def ensure_postgres_staging_tables(pg_cursor):
+    """
+    Create the session-local staging tables used by the COPY loaders.
+
+    The tables are temporary and emptied on every commit, so each committed
+    batch starts from empty staging tables. `line_number` keeps the dump order
+    so that the last occurrence of a key wins, like the row-by-row upserts.
+    """
+    pg_cursor.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS authors_staging (
+            line_number BIGINT,
+            author_key TEXT,
+            revision INTEGER,
+            last_modified TIMESTAMP WITHOUT TIME ZONE,
+            name TEXT,
+            source_records TEXT,
+            latest_revision INTEGER,
+            created TIMESTAMP WITHOUT TIME ZONE
+        ) ON COMMIT DELETE ROWS;
+        """
+    )
+
+    pg_cursor.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS works_staging (
+            line_number BIGINT,
+            work_key TEXT,
+            revision INTEGER,
+            last_modified TIMESTAMP WITHOUT TIME ZONE,
+            title TEXT,
+            created TIMESTAMP WITHOUT TIME ZONE,
+            covers TEXT,
+            latest_revision INTEGER,
+            authors TEXT
+        ) ON COMMIT DELETE ROWS;
+        """
+    )
+
+    pg_cursor.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS work_authors_staging (
+            work_key TEXT,
+            author_key TEXT
+        ) ON COMMIT DELETE ROWS;
+        """
+    )
+
+    pg_cursor.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS editions_staging (
+            line_number BIGINT,
+            edition_key TEXT,
+            revision INTEGER,
+            last_modified TIMESTAMP WITHOUT TIME ZONE,
+            title TEXT,
+            work_key TEXT,
+            publish_date TEXT,
+            publishers TEXT,
+            number_of_pages INTEGER,
+            covers TEXT
+        ) ON COMMIT DELETE ROWS;
+        """
+    )
+
+    pg_cursor.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS edition_isbns_staging (
+            isbn TEXT,
+            edition_key TEXT
+        ) ON COMMIT DELETE ROWS;
+        """
+    )
+
+    # redirect and delete lines, deletes have a NULL target
+    pg_cursor.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS redirects_staging (
+            line_number BIGINT,
+            key TEXT,
+            target TEXT
+        ) ON COMMIT DELETE ROWS;
+        """
+    )
+
+
+def copy_rows(pg_cursor, table_name, columns, rows):
+    """Stream rows into a table with COPY FROM STDIN."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(format_copy_line(row))
+    buffer.seek(0)
+
+    pg_cursor.copy_expert(
+        f"COPY {table_name} ({', '.join(columns)}) FROM STDIN", buffer
+    )
+
+
+def merge_authors_staging(pg_cursor):
+    """Upsert the staged authors into `authors`, keeping the last line per key."""
+    _, ls_values = get_layout_column_sql(
+        AUTHORS_COLUMNS, get_storage_layout_postgres(pg_cursor)
+    )
+    pg_cursor.execute(
+        f"""
+        INSERT INTO authors (
+            author_key, revision, last_modified, name,
+            source_records, latest_revision, created
+        )
+        SELECT DISTINCT ON (author_key)
+            {', '.join(ls_values)}
+        FROM authors_staging
+        ORDER BY author_key, line_number DESC
+        ON CONFLICT (author_key)
+        DO UPDATE SET
+            revision = EXCLUDED.revision,
+            last_modified = EXCLUDED.last_modified,
+            name = EXCLUDED.name,
+            source_records = EXCLUDED.source_records,
+            latest_revision = EXCLUDED.latest_revision,
+            created = EXCLUDED.created;
+        """
+    )
+
+
+def merge_works_staging(pg_cursor, delete_removed_links=False, partition=None):
+    """
+    Upsert the staged works into `works` and link them in `work_authors`.
+
+    Authors referenced by a work are created as stubs first so the
+    `work_authors` foreign keys hold, as in the row-by-row loader. Links to a
+    redirected author are pointed at its target beforehand. Keys are
+    inserted in sorted order so concurrent writers take row locks in the same
+    order. With `delete_removed_links`, links of the staged works that are no
+    longer in the dump are deleted. With `partition`, every staged work must
+    belong to that partition and is written straight into it.
+    """
+    works_table = get_partition_table_name("works", partition)
+    work_authors_table = get_partition_table_name("work_authors", partition)
+    works_columns, ls_values = get_layout_column_sql(
+        WORKS_COLUMNS, get_storage_layout_postgres(pg_cursor)
+    )
+    set_clause = ",\n            ".join(
+        f"{column} = EXCLUDED.{column}" for column in works_columns[1:]
+    )
+
+    # link merged authors to the author they were merged into
+    pg_cursor.execute(
+        """
+        UPDATE work_authors_staging was SET author_key = r.target
+        FROM redirects r
+        WHERE r.key = was.author_key;
+        """
+    )
+
+    pg_cursor.execute(
+        """
+        INSERT INTO authors (author_key)
+        SELECT DISTINCT author_key FROM work_authors_staging
+        ORDER BY author_key
+        ON CONFLICT (author_key) DO NOTHING;
+        """
+    )
+
+    pg_cursor.execute(
+        f"""
+        INSERT INTO {works_table} ({', '.join(works_columns)})
+        SELECT DISTINCT ON (work_key)
+            {', '.join(ls_values)}
+        FROM works_staging
+        ORDER BY work_key, line_number DESC
+        ON CONFLICT (work_key)
+        DO UPDATE SET
+            {set_clause};
+        """
+    )
+
+    if delete_removed_links:
+        pg_cursor.execute(
+            f"""
+            DELETE FROM {work_authors_table} wa
+            USING works_staging ws
+            WHERE wa.work_key = ws.work_key
+            AND NOT EXISTS (
+                SELECT 1 FROM work_authors_staging was
+                WHERE was.work_key = wa.work_key
+                AND was.author_key = wa.author_key
+            );
+            """
+        )
+
+    pg_cursor.execute(
+        f"""
+        INSERT INTO {work_authors_table} (work_key, author_key)
+        SELECT DISTINCT work_key, author_key FROM work_authors_staging
+        ORDER BY work_key, author_key
+        ON CONFLICT (work_key, author_key) DO NOTHING;
+        """
+    )
+
+
+def merge_redirects_staging(pg_cursor, dump_type, partition=None):
+    """
+    Apply the staged redirect and delete lines of a batch of a dump type.
+
+    Runs after the records of the batch are merged. The last line of a key
+    wins, so events followed by a record line of the same key are dropped, and
+    keys that are records again lose their redirect. Redirected and deleted
+    keys are removed from their table, which cascades to their links. Links
+    to a redirected author are first pointed at its target, so the works keep
+    their author.
+
+    The author lookups of work_authors, and the cascade from `authors`, rely
+    on work_authors_author_key_idx, created by both ensure_postgres_tables
+    and finalize_postgres_fresh_build. Without it every batch of a refresh
+    scans the whole link table.
+    """
+    table_name = get_partition_table_name(dump_type, partition)
+    key_column = DICT_KEY_COLUMNS[dump_type]
+
+    pg_cursor.execute(
+        f"""
+        DELETE FROM redirects_staging rs
+        WHERE EXISTS (
+            SELECT 1 FROM redirects_staging later
+            WHERE later.key = rs.key AND later.line_number > rs.line_number
+        )
+        OR EXISTS (
+            SELECT 1 FROM {dump_type}_staging s
+            WHERE s.{key_column} = rs.key AND s.line_number > rs.line_number
+        );
+        """
+    )
+    pg_cursor.execute(
+        f"""
+        DELETE FROM redirects r
+        USING {dump_type}_staging s
+        WHERE r.key = s.{key_column};
+        """
+    )
+
+    if dump_type == "authors":
+        pg_cursor.execute(
+            """
+            INSERT INTO authors (author_key)
+            SELECT DISTINCT rs.target FROM redirects_staging rs
+            WHERE rs.target IS NOT NULL
+            AND EXISTS (SELECT 1 FROM work_authors wa WHERE wa.author_key = rs.key)
+            ORDER BY rs.target
+            ON CONFLICT (author_key) DO NOTHING;
+            """
+        )
+        pg_cursor.execute(
+            """
+            INSERT INTO work_authors (work_key, author_key)
+            SELECT DISTINCT wa.work_key, rs.target
+            FROM work_authors wa
+            JOIN redirects_staging rs ON rs.key = wa.author_key
+            WHERE rs.target IS NOT NULL
+            ORDER BY wa.work_key, rs.target
+            ON CONFLICT (work_key, author_key) DO NOTHING;
+            """
+        )
+
+    pg_cursor.execute(
+        f"""
+        DELETE FROM {table_name} t
+        USING redirects_staging rs
+        WHERE t.{key_column} = rs.key;
+        """
+    )
+    pg_cursor.execute(
+        """
+        DELETE FROM redirects r
+        USING redirects_staging rs
+        WHERE r.key = rs.key AND rs.target IS NULL;
+        """
+    )
+    pg_cursor.execute(
+        """
+        INSERT INTO redirects (key, target)
+        SELECT key, target FROM redirects_staging
+        WHERE target IS NOT NULL
+        ORDER BY key
+        ON CONFLICT (key) DO UPDATE SET target = EXCLUDED.target;
+        """
+    )
+
+
+def write_redirects_batch_copy(pg_cursor, dump_type, redirect_rows, partition=None):
+    """
+    COPY a batch of (line_number, key, target) rows and merge them, see
+    merge_redirects_staging. Runs after the records of the batch are staged.
+    """
+    if not redirect_rows:
+        return
+    copy_rows(
+        pg_cursor,
+        "redirects_staging",
+        ("line_number",) + REDIRECTS_COLUMNS,
+        redirect_rows,
+    )
+    merge_redirects_staging(pg_cursor, dump_type, partition)
+
+
+def write_authors_batch_copy(
+    pg_cursor, author_rows, fresh_build=False, redirect_rows=()
+):
+    """
+    COPY a batch of (line_number, *author_row) rows and merge it into `authors`.
+
+    `redirect_rows` are the (line_number, key, target) rows of the redirect
+    and delete lines of the batch. The caller commits, which also empties the
+    staging tables. With `fresh_build` the rows are copied straight into the
+    unconstrained tables and the redirects are applied by
+    finalize_postgres_fresh_build.
+    """
+    if fresh_build:
+        copy_rows(
+            pg_cursor, "authors", AUTHORS_COLUMNS, (row[1:] for row in author_rows)
+        )
+        copy_rows(
+            pg_cursor,
+            "redirects",
+            REDIRECTS_COLUMNS,
+            (row[1:] for row in redirect_rows),
+        )
+        return
+
+    copy_rows(
+        pg_cursor, "authors_staging", ("line_number",) + AUTHORS_COLUMNS, author_rows
+    )
+    merge_authors_staging(pg_cursor)
+    write_redirects_batch_copy(pg_cursor, "authors", redirect_rows)
+
+
+def write_works_batch_copy(
+    pg_cursor,
+    work_rows,
+    work_author_rows,
+    delete_removed_links=False,
+    fresh_build=False,
+    partition=None,
+    redirect_rows=(),
+):
+    """
+    COPY a batch of (line_number, *work_row) rows and their (work_key, author_key)
+    links and merge them into `authors`, `works` and `work_authors`.
+
+    `redirect_rows` are applied like in write_authors_batch_copy. The caller
+    commits, which also empties the staging tables. With `fresh_build` the
+    rows are copied straight into the unconstrained tables and author stubs
+    and redirects are left to finalize_postgres_fresh_build. `partition` is
+    passed on to merge_works_staging.
+    """
+    if fresh_build:
+        copy_rows(pg_cursor, "works", WORKS_COLUMNS, (row[1:] for row in work_rows))
+        copy_rows(pg_cursor, "work_authors", WORK_AUTHORS_COLUMNS, work_author_rows)
+        copy_rows(
+            pg_cursor,
+            "redirects",
+            REDIRECTS_COLUMNS,
+            (row[1:] for row in redirect_rows),
+        )
+        return
+
+    copy_rows(pg_cursor, "works_staging", ("line_number",) + WORKS_COLUMNS, work_rows)
+    copy_rows(
+        pg_cursor, "work_authors_staging", WORK_AUTHORS_COLUMNS, work_author_rows
+    )
+    merge_works_staging(pg_cursor, delete_removed_links, partition)
+    write_redirects_batch_copy(pg_cursor, "works", redirect_rows, partition)
+
+
+def get_revision_map_postgres(table_name, key_column):
+    """
+    Build a RevisionMap of the rows stored in a table.
+
+    The rows are streamed through a server-side cursor in key length then key
+    order, so the map is filled without holding the result set in memory.
+    """
+    pg_conn = get_connection()
+    try:
+        with pg_conn.cursor(name=f"{table_name}_revisions") as pg_cursor:
+            pg_cursor.itersize = SERVER_CURSOR_ITERSIZE
+            pg_cursor.execute(
+                f"""
+                SELECT {key_column}, revision
+                FROM {table_name}
+                WHERE revision IS NOT NULL
+                ORDER BY LENGTH({key_column}), {key_column}
+                """
+            )
+            revision_map = RevisionMap(pg_cursor)
+        pg_conn.commit()
+    finally:
+        release_connection(pg_conn)
+
+    print(f"Stored revisions in {table_name}: {len(revision_map)}")
+    return revision_map
+
+
+def load_db_authors_postgres_copy(
+    authors_text_file_path,
+    max_rows_to_read=None,
+    incremental=False,
+    resume=False,
+    fresh_build=False,
+):
+    """
+    Bulk load the authors dump with COPY into a staging table.
+
+    Every COMMIT_EVERY_ROW_NUM rows the staged batch is merged into `authors`
+    with a single set-based upsert and committed. With `incremental`, lines
+    whose revision is already stored are skipped before their JSON is decoded,
+    so a refresh from a new dump only writes new and changed authors. With
+    `fresh_build`, rows are copied straight into the tables created by
+    ensure_postgres_fresh_build_tables.
+
+    Returns:
+        dict: Rows loaded and rows/sec and MB/sec throughput.
+    """
+    check_fresh_build_resume(resume, fresh_build)
+    start_time = time.perf_counter()
+    checkpoint_path = get_checkpoint_path(authors_text_file_path, "postgres_authors")
+    start_offset, row_counter = 0, 0
+    if resume:
+        start_offset, row_counter = load_checkpoint(
+            checkpoint_path, authors_text_file_path
+        )
+    resumed_row_counter = row_counter
+    pg_conn = None
+    pg_cursor = None
+
+    if incremental and fresh_build:
+        raise ValueError("A fresh build cannot be incremental")
+
+    revision_map = None
+    if incremental:
+        revision_map = get_revision_map_postgres("authors", "author_key")
+
+    try:
+        pg_conn = get_connection()
+        pg_cursor = pg_conn.cursor()
+        ensure_postgres_staging_tables(pg_cursor)
+
+        ls_author_rows = []
+        ls_redirect_rows = []
+        # Orders record and redirect lines of a batch, records alone are counted
+        line_number = 0
+
+        with DumpFile(authors_text_file_path, start_offset) as dump_file:
+            resumed_bytes = dump_file.tell_bytes()
+            lines = iter_dump_lines_with_progress(dump_file, "Processing Authors")
+            records = iter_dump_records(lines, revision_map)
+            for line_type, line_key, line_revision, line_last_modified, record in records:
+                line_number += 1
+                if line_type in REDIRECT_LINE_TYPES:
+                    ls_redirect_rows.append(
+                        (line_number,) + get_redirect_row(line_type, line_key, record)
                     )
-                    if author_key:
-                        pg_cursor.execute(
-                            """
-                            INSERT INTO work_authors (work_key, author_key) 
-                            VALUES (%s, %s)
-                            ON CONFLICT (work_key, author_key) DO NOTHING;
-                            """,
-                            (line_key, author_key),
-                        )
+                    continue
+                if line_type != DICT_RECORD_LINE_TYPES["authors"]:
+                    continue
+                author_row = get_author_row(
+                    line_key, line_revision, line_last_modified, record
+                )
+                ls_author_rows.append((line_number,) + author_row)
 
                 row_counter += 1
                 if row_counter % COMMIT_EVERY_ROW_NUM == 0:
+                    write_authors_batch_copy(
+                        pg_cursor, ls_author_rows, fresh_build, ls_redirect_rows
+                    )
                     pg_conn.commit()
+                    save_checkpoint(checkpoint_path, dump_file, row_counter)
+                    ls_author_rows.clear()
+                    ls_redirect_rows.clear()
+                if max_rows_to_read and row_counter >= max_rows_to_read:
+                    break
+
+            bytes_read = dump_file.tell_bytes()
+
+        write_authors_batch_copy(
+            pg_cursor, ls_author_rows, fresh_build, ls_redirect_rows
+        )
+        pg_conn.commit()
+        save_checkpoint(checkpoint_path, dump_file, row_counter)
+
+        print("Authors row count updated: ", row_counter)
+        dict_stats = get_load_stats(
+            row_counter - resumed_row_counter, bytes_read - resumed_bytes, start_time
+        )
+        if revision_map is not None:
+            dict_stats["unchanged_rows"] = revision_map.unchanged_count
+        return dict_stats
+    finally:
+        if pg_cursor:
+            pg_cursor.close()
+        if pg_conn:
+            release_connection(pg_conn)
+
+
+def load_db_works_postgres_copy(
+    works_text_file_path,
+    max_rows_to_read=None,
+    incremental=False,
+    resume=False,
+    fresh_build=False,
+):
+    """
+    Bulk load the works dump with COPY into staging tables.
+
+    Every COMMIT_EVERY_ROW_NUM rows the staged batch is merged into `authors`,
+    `works` and `work_authors` with set-based upserts and committed. With
+    `incremental`, only new and changed works are written, and the links of a
+    changed work that are no longer in the dump are deleted. With
+    `fresh_build`, rows are copied straight into the tables created by
+    ensure_postgres_fresh_build_tables.
+
+    Returns:
+        dict: Rows loaded and rows/sec and MB/sec throughput.
+    """
+    check_fresh_build_resume(resume, fresh_build)
+    start_time = time.perf_counter()
+    checkpoint_path = get_checkpoint_path(works_text_file_path, "postgres_works")
+    start_offset, row_counter = 0, 0
+    if resume:
+        start_offset, row_counter = load_checkpoint(
+            checkpoint_path, works_text_file_path
+        )
+    resumed_row_counter = row_counter
+    pg_conn = None
+    pg_cursor = None
+
+    if incremental and fresh_build:
+        raise ValueError("A fresh build cannot be incremental")
+
+    revision_map = None
+    if incremental:
+        revision_map = get_revision_map_postgres("works", "work_key")
 
+    try:
+        pg_conn = get_connection()
+        pg_cursor = pg_conn.cursor()
+        ensure_postgres_staging_tables(pg_cursor)
+
+        ls_work_rows = []
+        ls_work_author_rows = []
+        ls_redirect_rows = []
+        # Orders record and redirect lines of a batch, records alone are counted
+        line_number = 0
+
+        with DumpFile(works_text_file_path, start_offset) as dump_file:
+            resumed_bytes = dump_file.tell_bytes()
+            lines = iter_dump_lines_with_progress(dump_file, "Processing Works")
+            records = iter_dump_records(lines, revision_map)
+            for line_type, line_key, line_revision, line_last_modified, record in records:
+                line_number += 1
+                if line_type in REDIRECT_LINE_TYPES:
+                    ls_redirect_rows.append(
+                        (line_number,) + get_redirect_row(line_type, line_key, record)
+                    )
+                    continue
+                if line_type != DICT_RECORD_LINE_TYPES["works"]:
+                    continue
+                work_row, author_keys = get_work_row_and_author_keys(
+                    line_key, line_revision, line_last_modified, record
+                )
+                ls_work_rows.append((line_number,) + work_row)
+                for author_key in author_keys:
+                    ls_work_author_rows.append((line_key, author_key))
+
+                row_counter += 1
+                if row_counter % COMMIT_EVERY_ROW_NUM == 0:
+                    write_works_batch_copy(
+                        pg_cursor,
+                        ls_work_rows,
+                        ls_work_author_rows,
+                        incremental,
+                        fresh_build,
+                        redirect_rows=ls_redirect_rows,
+                    )
+                    pg_conn.commit()
+                    save_checkpoint(checkpoint_path, dump_file, row_counter)
+                    ls_work_rows.clear()
+                    ls_work_author_rows.clear()
+                    ls_redirect_rows.clear()
                 if max_rows_to_read and row_counter >= max_rows_to_read:
                     break
 
+            bytes_read = dump_file.tell_bytes()
+
+        write_works_batch_copy(
+            pg_cursor,
+            ls_work_rows,
+            ls_work_author_rows,
+            incremental,
+            fresh_build,
+            redirect_rows=ls_redirect_rows,
+        )
         pg_conn.commit()
+        save_checkpoint(checkpoint_path, dump_file, row_counter)
 
         print("Works row count updated:", row_counter)
+        dict_stats = get_load_stats(
+            row_counter - resumed_row_counter, bytes_read - resumed_bytes, start_time
+        )
+        if revision_map is not None:
+            dict_stats["unchanged_rows"] = revision_map.unchanged_count
+        return dict_stats
     finally:
         if pg_cursor:
             pg_cursor.close()
@@ -470,4 +1819,904 @@ def load_db_works_postgres(works_text_file_path, max_rows_to_read=None, verbose=
             release_connection(pg_conn)
 
 
+# %%
+# Book Data: Partitioned Loaders #
+
+
+def get_partition_table_name(table_name, partition):
+    """Name of a partition of a hash-partitioned table, or the table itself."""
+    if partition is None:
+        return table_name
+    return f"{table_name}_p{partition}"
+
+
+def get_works_partition_count():
+    """Number of hash partitions of `works`, 0 if it is not partitioned."""
+    pg_conn = get_connection()
+    try:
+        with pg_conn.cursor() as pg_cursor:
+            pg_cursor.execute(
+                """
+                SELECT COUNT(*) FROM pg_inherits
+                WHERE inhparent = to_regclass('works');
+                """
+            )
+            num_partitions = pg_cursor.fetchone()[0]
+        pg_conn.commit()
+        return num_partitions
+    finally:
+        release_connection(pg_conn)
+
+
+def get_work_partitions(pg_cursor, work_keys, num_partitions):
+    """
+    Ask Postgres which partition of `works` each work key belongs to.
+
+    Uses the same hash function as the partition constraints, so rows routed
+    with it are accepted when written straight into their partition.
+
+    Returns:
+        dict: work_key to partition number.
+    """
+    pg_cursor.execute(
+        """
+        SELECT work_key, partition
+        FROM UNNEST(%s::TEXT[]) AS work_key
+        CROSS JOIN GENERATE_SERIES(0, %s - 1) AS partition
+        WHERE satisfies_hash_partition('works'::regclass, %s, partition, work_key);
+        """,
+        (list(work_keys), num_partitions, num_partitions),
+    )
+    return dict(pg_cursor.fetchall())
+
+
+def load_db_works_postgres_partitioned(
+    works_text_file_path, max_rows_to_read=None, num_writers=4
+):
+    """
+    Load the works dump into hash-partitioned `works` and `work_authors` tables
+    with one connection writing each group of partitions.
+
+    Batches from run_dump_pipeline are split by partition, and partition p is
+    always written by writer p % num_writers. Writers never touch the same
+    partition, so they do not contend on the same tables and indexes. Each
+    partition still receives its batches in file order, so the last
+    occurrence of a key wins. Only the shared author stubs can deadlock, which
+    write_batch_copy_with_retry handles.
+
+    Needs tables created with ensure_postgres_tables(num_partitions=...).
+    The partitioned load does not checkpoint, because writers commit
+    independently and no single line offset is safe to resume from.
+
+    Returns:
+        dict: Rows loaded, rows/sec and MB/sec throughput and per stage stats.
+    """
+    start_time = time.perf_counter()
+    num_partitions = get_works_partition_count()
+    if not num_partitions:
+        raise ValueError(
+            "works is not partitioned, create it with "
+            "ensure_postgres_tables(num_partitions=...)"
+        )
+    num_writers = min(num_writers, num_partitions)
+
+    router_conn = get_connection()
+    ls_writer_conns = []
+    ls_write_pools = []
+    write_futures = deque()
+    try:
+        for _ in range(num_writers):
+            pg_conn = get_connection()
+            ls_writer_conns.append(pg_conn)
+            with pg_conn.cursor() as pg_cursor:
+                ensure_postgres_staging_tables(pg_cursor)
+            pg_conn.commit()
+            # one thread per writer keeps each partition's batches in order
+            ls_write_pools.append(ThreadPoolExecutor(1))
+
+        def write_batch(rows, work_author_rows, redirect_rows, line_offset):
+            # redirected and deleted works are removed from their partition
+            with router_conn.cursor() as pg_cursor:
+                dict_partitions = get_work_partitions(
+                    pg_cursor,
+                    {row[1] for row in rows} | {row[1] for row in redirect_rows},
+                    num_partitions,
+                )
+            router_conn.commit()
+
+            ls_partition_rows = [[] for _ in range(num_partitions)]
+            ls_partition_links = [[] for _ in range(num_partitions)]
+            ls_partition_redirects = [[] for _ in range(num_partitions)]
+            for row in rows:
+                ls_partition_rows[dict_partitions[row[1]]].append(row)
+            for link in work_author_rows:
+                ls_partition_links[dict_partitions[link[0]]].append(link)
+            for row in redirect_rows:
+                ls_partition_redirects[dict_partitions[row[1]]].append(row)
+
+            for partition in range(num_partitions):
+                if not (
+                    ls_partition_rows[partition] or ls_partition_redirects[partition]
+                ):
+                    continue
+                writer = partition % num_writers
+                write_futures.append(
+                    ls_write_pools[writer].submit(
+                        write_batch_copy_with_retry,
+                        ls_writer_conns[writer],
+                        "works",
+                        ls_partition_rows[partition],
+                        ls_partition_links[partition],
+                        ls_partition_redirects[partition],
+                        partition=partition,
+                    )
+                )
+
+            while len(write_futures) > num_partitions * PARTITION_WRITES_IN_FLIGHT:
+                write_futures.popleft().result()
+
+        with DumpFile(works_text_file_path) as dump_file:
+            row_counter, bytes_read, dict_stage_stats = run_dump_pipeline(
+                "works",
+                dump_file,
+                write_batch,
+                COMMIT_EVERY_ROW_NUM,
+                max_rows_to_read=max_rows_to_read,
+            )
+
+        while write_futures:
+            write_futures.popleft().result()
+
+        print("Works row count updated: ", row_counter)
+        dict_stats = get_load_stats(row_counter, bytes_read, start_time)
+        dict_stats["partitions"] = num_partitions
+        dict_stats["stages"] = dict_stage_stats
+        return dict_stats
+    finally:
+        for write_pool in ls_write_pools:
+            write_pool.shutdown(cancel_futures=True)
+        for pg_conn in ls_writer_conns:
+            release_connection(pg_conn)
+        release_connection(router_conn)
+
+
+# %%
+# Book Data: Pipeline Loaders #
+
+
+def load_dump_postgres_pipeline(
+    dump_type,
+    dump_file_path,
+    max_rows_to_read=None,
+    resume=False,
+    fresh_build=False,
+):
+    """
+    Load an authors or works dump through the bounded reader -> parser ->
+    batcher -> writer pipeline of run_dump_pipeline.
+
+    Batches are written with COPY in file order on one connection, so the
+    checkpoints are shared with the "copy" loaders and either can resume the
+    other's load. The returned stats include the stall time and queue depth
+    of every stage.
+
+    Parameters:
+        dump_type (str): "authors" or "works".
+        dump_file_path (str): The path to the .txt or .txt.gz dump.
+        max_rows_to_read (int): Stop after this many rows. Defaults to all rows.
+        resume (bool): Continue from the last checkpoint of this dump file.
+        fresh_build (bool): Copy straight into the tables created by
+            ensure_postgres_fresh_build_tables.
+
+    Returns:
+        dict: Rows loaded, rows/sec and MB/sec throughput and per stage stats.
+    """
+    check_fresh_build_resume(resume, fresh_build)
+    start_time = time.perf_counter()
+    checkpoint_path = get_checkpoint_path(dump_file_path, f"postgres_{dump_type}")
+    start_offset, row_counter = 0, 0
+    if resume:
+        start_offset, row_counter = load_checkpoint(checkpoint_path, dump_file_path)
+
+    pg_conn = get_connection()
+    try:
+        with pg_conn.cursor() as pg_cursor:
+            ensure_postgres_staging_tables(pg_cursor)
+        pg_conn.commit()
+
+        def write_batch(rows, work_author_rows, redirect_rows, line_offset):
+            nonlocal row_counter
+
+            write_batch_copy_with_retry(
+                pg_conn, dump_type, rows, work_author_rows, redirect_rows, fresh_build
+            )
+            row_counter += len(rows)
+            if line_offset is not None:
+                save_checkpoint(
+                    checkpoint_path, dump_file, row_counter, line_offset=line_offset
+                )
+
+        with DumpFile(dump_file_path, start_offset) as dump_file:
+            resumed_bytes = dump_file.tell_bytes()
+            rows_loaded, bytes_read, dict_stage_stats = run_dump_pipeline(
+                dump_type,
+                dump_file,
+                write_batch,
+                COMMIT_EVERY_ROW_NUM,
+                max_rows_to_read=max_rows_to_read,
+            )
+
+        print(f"{dump_type.title()} row count updated: ", row_counter)
+        dict_stats = get_load_stats(rows_loaded, bytes_read - resumed_bytes, start_time)
+        dict_stats["stages"] = dict_stage_stats
+        return dict_stats
+    finally:
+        release_connection(pg_conn)
+
+
+def load_db_authors_postgres_pipeline(
+    authors_text_file_path, max_rows_to_read=None, resume=False, fresh_build=False
+):
+    return load_dump_postgres_pipeline(
+        "authors",
+        authors_text_file_path,
+        max_rows_to_read=max_rows_to_read,
+        resume=resume,
+        fresh_build=fresh_build,
+    )
+
+
+def load_db_works_postgres_pipeline(
+    works_text_file_path, max_rows_to_read=None, resume=False, fresh_build=False
+):
+    return load_dump_postgres_pipeline(
+        "works",
+        works_text_file_path,
+        max_rows_to_read=max_rows_to_read,
+        resume=resume,
+        fresh_build=fresh_build,
+    )
+
+
+# %%
+# Book Data: COPY Shard Loaders #
+
+
+def insert_staging_rows(pg_cursor, table_name, columns):
+    """Append the staged rows to a fresh build table as they are."""
+    pg_cursor.execute(
+        f"""
+        INSERT INTO {table_name} ({', '.join(columns)})
+        SELECT {', '.join(columns)} FROM {table_name}_staging;
+        """
+    )
+
+
+def load_copy_shard_postgres(pg_conn, dict_manifest, export_dir, shard, fresh_build):
+    """
+    COPY one shard of every table of an export into staging and merge it.
+
+    The shard files are streamed to the server as they are, no rows are parsed
+    in Python. Each shard is one transaction, retried on deadlocks on shared
+    author stubs like write_batch_copy_with_retry.
+    """
+    for attempt in range(DEADLOCK_RETRIES):
+        try:
+            with pg_conn.cursor() as pg_cursor:
+                for table_name, dict_table in dict_manifest["tables"].items():
+                    shard_path = os.path.join(
+                        export_dir, dict_table["shards"][shard]["file"]
+                    )
+                    with gzip.open(shard_path, "rb") as shard_file:
+                        pg_cursor.copy_expert(
+                            f"COPY {table_name}_staging "
+                            f"({', '.join(dict_table['columns'])}) FROM STDIN",
+                            shard_file,
+                        )
+
+                if fresh_build and dict_manifest["dump_type"] == "authors":
+                    insert_staging_rows(pg_cursor, "authors", AUTHORS_COLUMNS)
+                elif fresh_build:
+                    insert_staging_rows(pg_cursor, "works", WORKS_COLUMNS)
+                    insert_staging_rows(
+                        pg_cursor, "work_authors", WORK_AUTHORS_COLUMNS
+                    )
+                elif dict_manifest["dump_type"] == "authors":
+                    merge_authors_staging(pg_cursor)
+                else:
+                    merge_works_staging(pg_cursor)
+
+                # exports made before redirects were routed have no redirects
+                if "redirects" in dict_manifest["tables"] and fresh_build:
+                    insert_staging_rows(pg_cursor, "redirects", REDIRECTS_COLUMNS)
+                elif "redirects" in dict_manifest["tables"]:
+                    merge_redirects_staging(pg_cursor, dict_manifest["dump_type"])
+            pg_conn.commit()
+            return
+        except errors.DeadlockDetected:
+            pg_conn.rollback()
+            if attempt == DEADLOCK_RETRIES - 1:
+                raise
+            print(f"Deadlock loading shard {shard}, retrying")
+
+
+def load_copy_shards_postgres(manifest_path, num_writers=4, fresh_build=False):
+    """
+    Load a dump exported with copy_shards.export_copy_shards.
+
+    Shards hold disjoint keys, so they are loaded in parallel on `num_writers`
+    connections from POSTGRES_POOL without any JSON parsing, and all lines of
+    a key are written by one transaction in dump order, which a fresh build
+    relies on to keep the last redirect line of a key. The same export can be
+    loaded into any number of databases.
+
+    Parameters:
+        manifest_path (str): The manifest.json of the export.
+        num_writers (int): Concurrent writer connections.
+        fresh_build (bool): Append to the tables created by
+            ensure_postgres_fresh_build_tables instead of upserting.
+
+    Returns:
+        dict: Rows loaded and rows/sec and MB/sec throughput, where the bytes
+            are those of the compressed shard files.
+    """
+    start_time = time.perf_counter()
+    dict_manifest = load_copy_shards_manifest(manifest_path)
+    export_dir = os.path.dirname(manifest_path)
+    num_shards = dict_manifest["num_shards"]
+    if not dict_manifest["complete"]:
+        print(f"{manifest_path} is a partial export of {dict_manifest['rows']} rows")
+
+    writer_conns = queue.Queue()
+    ls_pg_conns = []
+    try:
+        for _ in range(min(num_writers, num_shards)):
+            pg_conn = get_connection()
+            ls_pg_conns.append(pg_conn)
+            with pg_conn.cursor() as pg_cursor:
+                ensure_postgres_staging_tables(pg_cursor)
+            pg_conn.commit()
+            writer_conns.put(pg_conn)
+
+        def load_shard(shard):
+            pg_conn = writer_conns.get()
+            try:
+                load_copy_shard_postgres(
+                    pg_conn, dict_manifest, export_dir, shard, fresh_build
+                )
+            finally:
+                writer_conns.put(pg_conn)
+
+        with ThreadPoolExecutor(len(ls_pg_conns)) as write_pool:
+            ls_futures = [
+                write_pool.submit(load_shard, shard) for shard in range(num_shards)
+            ]
+            with tqdm(
+                total=num_shards,
+                unit="shard",
+                desc=f"Loading {dict_manifest['dump_type'].title()} shards",
+            ) as progress_bar:
+                for future in as_completed(ls_futures):
+                    future.result()
+                    progress_bar.update(1)
+
+        bytes_read = sum(
+            dict_shard["bytes"]
+            for dict_table in dict_manifest["tables"].values()
+            for dict_shard in dict_table["shards"]
+        )
+        print(
+            f"{dict_manifest['dump_type'].title()} row count updated: ",
+            dict_manifest["rows"],
+        )
+        return get_load_stats(dict_manifest["rows"], bytes_read, start_time)
+    finally:
+        for pg_conn in ls_pg_conns:
+            release_connection(pg_conn)
+
+
+# %%
+# Book Data: Editions #
+
+
+def merge_editions_staging(pg_cursor):
+    """
+    Upsert the staged editions and replace the ISBNs of every staged edition.
+
+    ISBNs that are no longer listed on an edition are deleted, so a reload
+    keeps the lookup table in sync with the dump.
+    """
+    pg_cursor.execute(
+        """
+        INSERT INTO editions (
+            edition_key, revision, last_modified, title, work_key,
+            publish_date, publishers, number_of_pages, covers
+        )
+        SELECT DISTINCT ON (edition_key)
+            edition_key, revision, last_modified, title, work_key,
+            publish_date, publishers, number_of_pages, covers
+        FROM editions_staging
+        ORDER BY edition_key, line_number DESC
+        ON CONFLICT (edition_key)
+        DO UPDATE SET
+            revision = EXCLUDED.revision,
+            last_modified = EXCLUDED.last_modified,
+            title = EXCLUDED.title,
+            work_key = EXCLUDED.work_key,
+            publish_date = EXCLUDED.publish_date,
+            publishers = EXCLUDED.publishers,
+            number_of_pages = EXCLUDED.number_of_pages,
+            covers = EXCLUDED.covers;
+        """
+    )
+
+    pg_cursor.execute(
+        """
+        DELETE FROM edition_isbns ei
+        USING editions_staging es
+        WHERE ei.edition_key = es.edition_key
+        AND NOT EXISTS (
+            SELECT 1 FROM edition_isbns_staging eis
+            WHERE eis.edition_key = ei.edition_key
+            AND eis.isbn = ei.isbn
+        );
+        """
+    )
+
+    pg_cursor.execute(
+        """
+        INSERT INTO edition_isbns (isbn, edition_key)
+        SELECT DISTINCT isbn, edition_key FROM edition_isbns_staging
+        ORDER BY isbn, edition_key
+        ON CONFLICT (isbn, edition_key) DO NOTHING;
+        """
+    )
+
+
+def write_editions_batch_copy(
+    pg_cursor, edition_rows, edition_isbn_rows, redirect_rows=()
+):
+    """
+    COPY a batch of (line_number, *edition_row) rows and their (isbn, edition_key)
+    rows and merge them into `editions` and `edition_isbns`.
+
+    `redirect_rows` are applied like in write_authors_batch_copy. The caller
+    commits, which also empties the staging tables.
+    """
+    copy_rows(
+        pg_cursor, "editions_staging", ("line_number",) + EDITIONS_COLUMNS, edition_rows
+    )
+    copy_rows(
+        pg_cursor, "edition_isbns_staging", EDITION_ISBNS_COLUMNS, edition_isbn_rows
+    )
+    merge_editions_staging(pg_cursor)
+    write_redirects_batch_copy(pg_cursor, "editions", redirect_rows)
+
+
+def load_db_editions_postgres_copy(
+    editions_text_file_path, max_rows_to_read=None, resume=False
+):
+    """
+    Bulk load the editions dump with COPY into staging tables.
+
+    Every COMMIT_EVERY_ROW_NUM rows the staged batch is merged into `editions`
+    and `edition_isbns` and committed, with a checkpoint to resume from.
+
+    Returns:
+        dict: Rows loaded and rows/sec and MB/sec throughput.
+    """
+    start_time = time.perf_counter()
+    checkpoint_path = get_checkpoint_path(editions_text_file_path, "postgres_editions")
+    start_offset, row_counter = 0, 0
+    if resume:
+        start_offset, row_counter = load_checkpoint(
+            checkpoint_path, editions_text_file_path
+        )
+    resumed_row_counter = row_counter
+    pg_conn = None
+    pg_cursor = None
+
+    try:
+        pg_conn = get_connection()
+        pg_cursor = pg_conn.cursor()
+        ensure_postgres_staging_tables(pg_cursor)
+
+        ls_edition_rows = []
+        ls_edition_isbn_rows = []
+        ls_redirect_rows = []
+        # Orders record and redirect lines of a batch, records alone are counted
+        line_number = 0
+
+        with DumpFile(editions_text_file_path, start_offset) as dump_file:
+            resumed_bytes = dump_file.tell_bytes()
+            lines = iter_dump_lines_with_progress(dump_file, "Processing Editions")
+            records = iter_dump_records(lines)
+            for line_type, line_key, line_revision, line_last_modified, record in records:
+                line_number += 1
+                if line_type in REDIRECT_LINE_TYPES:
+                    ls_redirect_rows.append(
+                        (line_number,) + get_redirect_row(line_type, line_key, record)
+                    )
+                    continue
+                if line_type != DICT_RECORD_LINE_TYPES["editions"]:
+                    continue
+                edition_row, isbns = get_edition_row_and_isbns(
+                    line_key, line_revision, line_last_modified, record
+                )
+                ls_edition_rows.append((line_number,) + edition_row)
+                for isbn in isbns:
+                    ls_edition_isbn_rows.append((isbn, line_key))
+
+                row_counter += 1
+                if row_counter % COMMIT_EVERY_ROW_NUM == 0:
+                    write_editions_batch_copy(
+                        pg_cursor,
+                        ls_edition_rows,
+                        ls_edition_isbn_rows,
+                        ls_redirect_rows,
+                    )
+                    pg_conn.commit()
+                    save_checkpoint(checkpoint_path, dump_file, row_counter)
+                    ls_edition_rows.clear()
+                    ls_edition_isbn_rows.clear()
+                    ls_redirect_rows.clear()
+                if max_rows_to_read and row_counter >= max_rows_to_read:
+                    break
+
+            bytes_read = dump_file.tell_bytes()
+
+        write_editions_batch_copy(
+            pg_cursor, ls_edition_rows, ls_edition_isbn_rows, ls_redirect_rows
+        )
+        pg_conn.commit()
+        save_checkpoint(checkpoint_path, dump_file, row_counter)
+
+        print("Editions row count updated:", row_counter)
+        return get_load_stats(
+            row_counter - resumed_row_counter, bytes_read - resumed_bytes, start_time
+        )
+    finally:
+        if pg_cursor:
+            pg_cursor.close()
+        if pg_conn:
+            release_connection(pg_conn)
+
+
+def get_book_info_by_isbn_local(isbn, use_api_fallback=True):
+    """
+    Look up a book by ISBN in the local editions tables.
+
+    The ISBN is normalized like the loaded ones, so ISBN-10 and ISBN-13 forms
+    both hit the `edition_isbns` primary key. An edition of a work that was
+    merged into another one gets the work and authors it was merged into. The
+    result uses the same keys as the Open Library books API for the fields
+    stored locally. On a miss the
+    API is queried with get_book_info_by_isbn, unless `use_api_fallback` is
+    False.
+
+    Parameters:
+        isbn (str): The ISBN of the book.
+        use_api_fallback (bool): Query the Open Library API on a local miss.
+
+    Returns:
+        dict or None: The book data if found, otherwise None.
+    """
+    normalized_isbn = normalize_isbn(isbn)
+
+    row = None
+    if normalized_isbn:
+        pg_conn = get_connection()
+        try:
+            with pg_conn.cursor() as pg_cursor:
+                pg_cursor.execute(
+                    """
+                    SELECT
+                        e.edition_key, e.title, e.publish_date, e.publishers,
+                        e.number_of_pages, e.covers,
+                        COALESCE(r.target, e.work_key),
+                        COALESCE(
+                            ARRAY_AGG(a.author_key ORDER BY a.author_key)
+                            FILTER (WHERE a.author_key IS NOT NULL),
+                            '{}'
+                        ),
+                        COALESCE(
+                            ARRAY_AGG(COALESCE(a.name, '') ORDER BY a.author_key)
+                            FILTER (WHERE a.author_key IS NOT NULL),
+                            '{}'
+                        )
+                    FROM edition_isbns ei
+                    JOIN editions e ON e.edition_key = ei.edition_key
+                    LEFT JOIN redirects r ON r.key = e.work_key
+                    LEFT JOIN work_authors wa
+                        ON wa.work_key = COALESCE(r.target, e.work_key)
+                    LEFT JOIN authors a ON a.author_key = wa.author_key
+                    WHERE ei.isbn = %s
+                    GROUP BY e.edition_key, r.target
+                    ORDER BY e.edition_key
+                    LIMIT 1;
+                    """,
+                    (normalized_isbn,),
+                )
+                row = pg_cursor.fetchone()
+            pg_conn.commit()
+        finally:
+            release_connection(pg_conn)
+
+    if row is None:
+        if use_api_fallback:
+            return get_book_info_by_isbn(isbn)
+        return None
+
+    (
+        edition_key,
+        title,
+        publish_date,
+        publishers,
+        number_of_pages,
+        covers,
+        work_key,
+        ls_author_keys,
+        ls_author_names,
+    ) = row
+
+    return {
+        "key": edition_key,
+        "title": title,
+        "publish_date": publish_date,
+        "publishers": [{"name": publisher} for publisher in json.loads(publishers)],
+        "number_of_pages": number_of_pages,
+        "covers": json.loads(covers),
+        "works": [{"key": work_key}] if work_key else [],
+        "authors": [
+            {"key": author_key, "name": name}
+            for author_key, name in zip(ls_author_keys, ls_author_names)
+        ],
+        "identifiers": {"isbn_13": [normalized_isbn]},
+    }
+
+
+# %%
+# Book Data: Parallel Loaders #
+
+
+def write_batch_copy_with_retry(
+    pg_conn,
+    dump_type,
+    rows,
+    work_author_rows,
+    redirect_rows=(),
+    fresh_build=False,
+    partition=None,
+):
+    """
+    Write and commit one parsed batch on a dedicated writer connection.
+
+    Concurrent writers can deadlock on shared author stubs, in which case the
+    batch is rolled back and written again. `partition` routes a works batch
+    straight into one partition, see load_db_works_postgres_partitioned.
+    """
+    for attempt in range(DEADLOCK_RETRIES):
+        try:
+            with pg_conn.cursor() as pg_cursor:
+                if dump_type == "authors":
+                    write_authors_batch_copy(
+                        pg_cursor,
+                        rows,
+                        fresh_build=fresh_build,
+                        redirect_rows=redirect_rows,
+                    )
+                else:
+                    write_works_batch_copy(
+                        pg_cursor,
+                        rows,
+                        work_author_rows,
+                        fresh_build=fresh_build,
+                        partition=partition,
+                        redirect_rows=redirect_rows,
+                    )
+            pg_conn.commit()
+            return
+        except errors.DeadlockDetected:
+            pg_conn.rollback()
+            if attempt == DEADLOCK_RETRIES - 1:
+                raise
+            print(f"Deadlock writing {dump_type} batch, retrying")
+
+
+def split_batch_by_key_shard(rows, work_author_rows, redirect_rows, num_shards):
+    """
+    Split a parsed batch into `num_shards` batches by get_key_shard of its keys.
+
+    A work and its links land in the same batch. Rows keep their order.
+
+    Returns:
+        list: (rows, work_author_rows, redirect_rows) of every shard.
+    """
+    ls_shard_batches = [([], [], []) for _ in range(num_shards)]
+    for row in rows:
+        ls_shard_batches[get_key_shard(row[1], num_shards)][0].append(row)
+    for link in work_author_rows:
+        ls_shard_batches[get_key_shard(link[0], num_shards)][1].append(link)
+    for row in redirect_rows:
+        ls_shard_batches[get_key_shard(row[1], num_shards)][2].append(row)
+    return ls_shard_batches
+
+
+def load_dump_postgres_parallel(
+    dump_type,
+    dump_file_path,
+    max_rows_to_read=None,
+    num_parse_processes=None,
+    num_writers=2,
+    fresh_build=False,
+):
+    """
+    Load an authors or works dump with a process pool parsing and several COPY writers.
+
+    The dump is split into byte ranges on line boundaries (or line groups for
+    gzip input) that are parsed in worker processes. Results are consumed in
+    file order, so `max_rows_to_read` keeps the first rows of the dump like the
+    serial loaders. Each parsed batch is split by key hash over `num_writers`
+    connections taken from POSTGRES_POOL, with one thread per connection, so
+    every key is always written by the same writer in file order and the last
+    occurrence of a key wins across batches as in the serial loaders.
+
+    The parallel load does not checkpoint, because writers commit
+    independently and no single line offset is safe to resume from.
+
+    Parameters:
+        dump_type (str): "authors" or "works".
+        dump_file_path (str): The path to the .txt or .txt.gz dump.
+        max_rows_to_read (int): Stop after this many rows. Defaults to all rows.
+        num_parse_processes (int): Parse workers. Defaults to the CPU count.
+        num_writers (int): Concurrent writer connections.
+        fresh_build (bool): Copy straight into the tables created by
+            ensure_postgres_fresh_build_tables.
+
+    Returns:
+        dict: Rows loaded and rows/sec and MB/sec throughput.
+    """
+    row_counter = 0
+    bytes_read = 0
+    reached_end = False
+    start_time = time.perf_counter()
+    max_parse_in_flight = (num_parse_processes or os.cpu_count() or 1) * 2
+    max_writes_in_flight = num_writers * 2
+
+    ls_pg_conns = []
+    ls_write_pools = []
+    try:
+        for _ in range(num_writers):
+            pg_conn = get_connection()
+            ls_pg_conns.append(pg_conn)
+            with pg_conn.cursor() as pg_cursor:
+                ensure_postgres_staging_tables(pg_cursor)
+            pg_conn.commit()
+            # one thread per writer keeps each key's batches in order
+            ls_write_pools.append(ThreadPoolExecutor(1))
+
+        def write_batch(rows, work_author_rows, redirect_rows):
+            ls_shard_batches = split_batch_by_key_shard(
+                rows, work_author_rows, redirect_rows, num_writers
+            )
+            for writer, shard_batch in enumerate(ls_shard_batches):
+                writer_rows, writer_links, writer_redirects = shard_batch
+                if not (writer_rows or writer_redirects):
+                    continue
+                write_futures.append(
+                    ls_write_pools[writer].submit(
+                        write_batch_copy_with_retry,
+                        ls_pg_conns[writer],
+                        dump_type,
+                        writer_rows,
+                        writer_links,
+                        writer_redirects,
+                        fresh_build,
+                    )
+                )
+
+        parse_futures = deque()
+        write_futures = deque()
+
+        with (
+            ProcessPoolExecutor(num_parse_processes) as parse_pool,
+            tqdm(
+                total=os.path.getsize(dump_file_path),
+                unit="B",
+                unit_scale=True,
+                desc=f"Processing {dump_type.title()}",
+            ) as progress_bar,
+        ):
+
+            def consume_parsed_batch():
+                nonlocal row_counter, bytes_read, reached_end
+
+                parse_future, task_bytes_read = parse_futures.popleft()
+                rows, work_author_rows, redirect_rows, reached_end = (
+                    parse_future.result()
+                )
+
+                rows, work_author_rows, redirect_rows, reached_limit = (
+                    limit_parsed_rows(
+                        rows,
+                        work_author_rows,
+                        redirect_rows,
+                        row_counter,
+                        max_rows_to_read,
+                    )
+                )
+                reached_end = reached_end or reached_limit
+
+                row_counter += len(rows)
+                bytes_read = task_bytes_read
+                progress_bar.update(bytes_read - progress_bar.n)
+                if not (rows or redirect_rows):
+                    return
+
+                write_batch(rows, work_author_rows, redirect_rows)
+                while len(write_futures) >= max_writes_in_flight:
+                    write_futures.popleft().result()
+
+            for parse_function, args, task_bytes_read in iter_dump_parse_tasks(
+                dump_type, dump_file_path, COMMIT_EVERY_ROW_NUM
+            ):
+                parse_futures.append(
+                    (parse_pool.submit(parse_function, *args), task_bytes_read)
+                )
+                if len(parse_futures) >= max_parse_in_flight:
+                    consume_parsed_batch()
+                if reached_end:
+                    break
+
+            while parse_futures and not reached_end:
+                consume_parsed_batch()
+
+            parse_pool.shutdown(cancel_futures=True)
+
+            while write_futures:
+                write_futures.popleft().result()
+
+        print(f"{dump_type.title()} row count updated: ", row_counter)
+        return get_load_stats(row_counter, bytes_read, start_time)
+    finally:
+        for write_pool in ls_write_pools:
+            write_pool.shutdown(cancel_futures=True)
+        for pg_conn in ls_pg_conns:
+            release_connection(pg_conn)
+
+
+def load_db_authors_postgres_parallel(
+    authors_text_file_path,
+    max_rows_to_read=None,
+    num_parse_processes=None,
+    num_writers=2,
+    fresh_build=False,
+):
+    return load_dump_postgres_parallel(
+        "authors",
+        authors_text_file_path,
+        max_rows_to_read=max_rows_to_read,
+        num_parse_processes=num_parse_processes,
+        num_writers=num_writers,
+        fresh_build=fresh_build,
+    )
+
+
+def load_db_works_postgres_parallel(
+    works_text_file_path,
+    max_rows_to_read=None,
+    num_parse_processes=None,
+    num_writers=2,
+    fresh_build=False,
+):
+    return load_dump_postgres_parallel(
+        "works",
+        works_text_file_path,
+        max_rows_to_read=max_rows_to_read,
+        num_parse_processes=num_parse_processes,
+        num_writers=num_writers,
+        fresh_build=fresh_build,
+    )
+
+
 # %%
@@ -4,9 +4,37 @@
 import json
 import os
 import sqlite3
+import time
+from contextlib import contextmanager
 
 import pandas as pd
 
+from open_library_dump import (
+    DICT_KEY_COLUMNS,
+    DICT_RECORD_LINE_TYPES,
+    REDIRECT_LINE_TYPES,
+    STORAGE_LAYOUT,
+    WORKS_COLUMNS,
+    DumpFile,
+    RevisionMap,
+    decode_covers,
+    decode_source_records,
+    decode_timestamp,
+    encode_author_row_compact,
+    encode_covers_compact,
+    encode_source_records_compact,
+    encode_timestamp_compact,
+    encode_work_row_compact,
+    get_author_key_from_ref,
+    get_author_row,
+    get_key_number,
+    get_layout_columns,
+    get_load_stats,
+    get_redirect_row,
+    get_work_row_and_author_keys,
+    iter_dump_records,
+)
+from query_results import check_query_output, format_query_result
 from utils.display_tools import pprint_df, pprint_dict, pprint_ls  # noqa
 
 # %%
@@ -19,19 +47,66 @@ print(book_data_dir)
 verbose = False
 data_dumps_url = "https://openlibrary.org/developers/dumps"
 
+# Set SQLITE_DB_PATH to load into another database file, e.g. for benchmarks
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", os.path.join(book_data_dir, "book_data.db"))
+
+BULK_BATCH_ROW_NUM = 100000
+BULK_CACHE_SIZE_KIB = 1024 * 1024  # 1 GiB page cache while bulk loading
+
+# FTS5 search indexes of each table: (fts table, key column, indexed column).
+# Their rowid is the key number, as the compact tables have no rowid.
+DICT_SEARCH_INDEXES = {
+    "authors": ("authors_fts", "author_key", "name"),
+    "works": ("works_fts", "work_key", "title"),
+}
+SEARCH_INDEX_TOKENIZE = "unicode61 remove_diacritics 2"
+SEARCH_RESULT_LIMIT = 50
+
 # %%
 # Generate sqlite database #
 
 
-def get_sqlite_db_conn_cursor():
-    sqlite_file_path = os.path.join(book_data_dir, "book_data.db")
-    conn = sqlite3.connect(sqlite_file_path)
-    cursor = conn.cursor()
+def create_sqlite_main_tables(cursor, layout, suffix=""):
+    """
+    Create `authors` and `works` in a storage layout if they do not exist.
 
-    # ensure tables
-    cursor.execute(
+    The compact layout stores timestamps as integer microseconds since the
+    epoch, covers as packed int32s and source records as newline separated
+    text, drops `works.authors`, and makes both tables WITHOUT ROWID so the
+    text key is not stored a second time in a separate primary key index.
+    """
+    if layout == "compact":
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS authors{suffix} (
+                author_key TEXT PRIMARY KEY,
+                revision INTEGER,
+                last_modified INTEGER,
+                name TEXT,
+                source_records TEXT,
+                latest_revision INTEGER,
+                created INTEGER
+            ) WITHOUT ROWID
+        """
+        )
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS works{suffix} (
+                work_key TEXT PRIMARY KEY,
+                revision INTEGER,
+                last_modified INTEGER,
+                title TEXT,
+                created INTEGER,
+                covers BLOB,
+                latest_revision INTEGER
+            ) WITHOUT ROWID
         """
-        CREATE TABLE IF NOT EXISTS authors (
+        )
+        return
+
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS authors{suffix} (
             author_key TEXT PRIMARY KEY,
             revision INTEGER,
             last_modified TEXT,
@@ -42,11 +117,10 @@ def get_sqlite_db_conn_cursor():
         )
     """
     )
-    conn.commit()
 
     cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS works (
+        f"""
+        CREATE TABLE IF NOT EXISTS works{suffix} (
             work_key TEXT PRIMARY KEY,
             revision INTEGER,
             last_modified TEXT,
@@ -59,6 +133,103 @@ def get_sqlite_db_conn_cursor():
     """
     )
 
+
+def create_sqlite_search_tables(cursor):
+    """Create the FTS5 search indexes over authors.name and works.title."""
+    for fts_table, key_column, text_column in DICT_SEARCH_INDEXES.values():
+        cursor.execute(
+            f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                {text_column},
+                {key_column} UNINDEXED,
+                tokenize = '{SEARCH_INDEX_TOKENIZE}'
+            )
+            """
+        )
+
+
+def rebuild_sqlite_search_index(dump_type, conn=None):
+    """
+    Rebuild the FTS5 search index of `authors` or `works` from the table.
+
+    The index is dropped and filled with a single INSERT ... SELECT, which is
+    much faster than keeping it in sync row by row during a full load, and
+    then merged into as few b-trees as possible for the queries.
+    """
+    conn = conn or sqlite_conn
+    fts_table, key_column, text_column = DICT_SEARCH_INDEXES[dump_type]
+    start_time = time.perf_counter()
+
+    conn.create_function("key_number", 1, get_key_number, deterministic=True)
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {fts_table}")
+    create_sqlite_search_tables(cursor)
+    cursor.execute(
+        f"""
+        INSERT OR REPLACE INTO {fts_table} (rowid, {key_column}, {text_column})
+        SELECT key_number({key_column}), {key_column}, {text_column}
+        FROM {dump_type}
+        WHERE {text_column} <> '' AND key_number({key_column}) IS NOT NULL
+        """
+    )
+    cursor.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('optimize')")
+    conn.commit()
+    cursor.close()
+
+    print(f"Rebuilt {fts_table} in {time.perf_counter() - start_time:.1f}s")
+
+
+def fill_empty_sqlite_search_indexes(conn):
+    """
+    Rebuild the search indexes that are empty while their table has rows.
+
+    A database loaded before the indexes were added gets them created empty,
+    and the loaders only keep them in sync from then on.
+    """
+    for dump_type, (fts_table, _, text_column) in DICT_SEARCH_INDEXES.items():
+        if conn.execute(f"SELECT 1 FROM {fts_table} LIMIT 1").fetchone():
+            continue
+        query = f"SELECT 1 FROM {dump_type} WHERE {text_column} <> '' LIMIT 1"
+        if conn.execute(query).fetchone():
+            rebuild_sqlite_search_index(dump_type, conn)
+
+
+def get_storage_layout_sqlite(conn):
+    """Storage layout of the existing tables, "compact" if works has no authors."""
+    ls_columns = [row[1] for row in conn.execute("PRAGMA table_info(works)")]
+    return "json" if "authors" in ls_columns else "compact"
+
+
+def get_works_upsert_query_sqlite(layout):
+    """Upsert statement for works rows of a storage layout."""
+    columns = get_layout_columns(WORKS_COLUMNS, layout)
+    set_clause = ",\n            ".join(
+        f"{column} = excluded.{column}" for column in columns[1:]
+    )
+    return f"""
+        INSERT INTO works ({', '.join(columns)})
+        VALUES ({', '.join('?' for _ in columns)})
+        ON CONFLICT(work_key)
+        DO UPDATE SET
+            {set_clause}
+        """
+
+
+# Links to a redirected author are stored under its target, one hop is followed
+WORK_AUTHORS_INSERT_QUERY_SQLITE = """
+    INSERT INTO work_authors (work_key, author_key)
+    VALUES (?, COALESCE((SELECT target FROM redirects WHERE key = ?), ?))
+    ON CONFLICT(work_key, author_key) DO NOTHING
+    """
+
+
+def get_sqlite_db_conn_cursor(layout=STORAGE_LAYOUT):
+    conn = sqlite3.connect(SQLITE_DB_PATH)
+    cursor = conn.cursor()
+
+    # ensure tables, new tables are created in `layout`
+    create_sqlite_main_tables(cursor, layout)
+
     # create authors works table
     cursor.execute(
         """
@@ -72,8 +243,30 @@ def get_sqlite_db_conn_cursor():
     """
     )
 
+    # the primary key only serves lookups by work
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS work_authors_author_key_idx
+        ON work_authors (author_key);
+    """
+    )
+
+    # keys merged into another key, deleted keys are only removed
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS redirects (
+            key TEXT PRIMARY KEY,
+            target TEXT NOT NULL
+        ) WITHOUT ROWID;
+    """
+    )
+
+    create_sqlite_search_tables(cursor)
+
     conn.commit()
 
+    fill_empty_sqlite_search_indexes(conn)
+
     return conn, cursor
 
 
@@ -86,9 +279,11 @@ sqlite_conn, sqlite_cursor = get_sqlite_db_conn_cursor()
 
 def load_db_authors_sqlite(authors_text_file_path, max_rows_to_read=None):
     row_counter = 0
+    dict_redirect_rows = {}
+    layout = get_storage_layout_sqlite(sqlite_conn)
     # read the first few lines of the text file
-    with open(authors_text_file_path, "r") as f:
-        for line in f:
+    with DumpFile(authors_text_file_path) as dump_file:
+        for line in dump_file:
             line = line.strip()
             if not line:
                 continue
@@ -126,6 +321,15 @@ def load_db_authors_sqlite(authors_text_file_path, max_rows_to_read=None):
 
                 pprint_dict(record)
 
+            if line_type in REDIRECT_LINE_TYPES:
+                dict_redirect_rows[line_key] = get_redirect_row(
+                    line_type, line_key, record
+                )
+                continue
+            if line_type != DICT_RECORD_LINE_TYPES["authors"]:
+                continue
+            dict_redirect_rows.pop(line_key, None)
+
             name = record.get("name", "")
             source_records = json.dumps(record.get("source_records", []))
             latest_revision = record.get("latest_revision", "")
@@ -156,41 +360,66 @@ def load_db_authors_sqlite(authors_text_file_path, max_rows_to_read=None):
                 print("query")
                 print(query)
 
-            sqlite_cursor.execute(
-                query,
-                (
-                    line_key,
-                    line_revision,
-                    line_last_modified,
-                    name,
-                    source_records,
-                    latest_revision,
-                    created,
-                ),
+            author_row = (
+                line_key,
+                line_revision,
+                line_last_modified,
+                name,
+                source_records,
+                latest_revision,
+                created,
             )
+            if layout == "compact":
+                author_row = encode_author_row_compact(author_row)
+            sqlite_cursor.execute(query, author_row)
+            sqlite_cursor.execute("DELETE FROM redirects WHERE key = ?", (line_key,))
 
             row_counter += 1
             if row_counter % 10000 == 0:
-                print(f"Authors row count: {row_counter}")
+                print(
+                    f"Authors row count: {row_counter} "
+                    f"({dump_file.tell_bytes() / dump_file.total_bytes:.1%} of file read)"
+                )
             if row_counter % 10000 == 0:
-                sqlite_conn.commit()
+                # Commits the records of the batch with its redirect lines
+                write_redirects_batch_sqlite(
+                    "authors", list(dict_redirect_rows.values())
+                )
+                dict_redirect_rows.clear()
             if max_rows_to_read and row_counter >= max_rows_to_read:
                 break
 
-        sqlite_conn.commit()
+        write_redirects_batch_sqlite("authors", list(dict_redirect_rows.values()))
 
         print("Authors row count updated: ", row_counter)
 
+    rebuild_sqlite_search_index("authors")
+
 
 # %%
 # Book Data: Works #
 
 
+def write_work_author_links_sqlite(work_key, authors_list):
+    """
+    Link a work to the authors of its dump `authors` list, as either form of
+    reference, see get_author_key_from_ref.
+    """
+    ls_params = []
+    for author_ref in authors_list:
+        author_key = get_author_key_from_ref(author_ref)
+        if author_key:
+            ls_params.append((work_key, author_key, author_key))
+    sqlite_cursor.executemany(WORK_AUTHORS_INSERT_QUERY_SQLITE, ls_params)
+
+
 def load_db_works_sqlite(works_text_file_path, max_rows_to_read=None):
     row_counter = 0
+    dict_redirect_rows = {}
+    layout = get_storage_layout_sqlite(sqlite_conn)
     # read the first few lines of the text file
-    with open(works_text_file_path, "r") as f:
-        for line in f:
+    with DumpFile(works_text_file_path) as dump_file:
+        for line in dump_file:
             line = line.strip()
             if not line:
                 continue
@@ -228,30 +457,22 @@ def load_db_works_sqlite(works_text_file_path, max_rows_to_read=None):
 
                 pprint_dict(record)
 
+            if line_type in REDIRECT_LINE_TYPES:
+                dict_redirect_rows[line_key] = get_redirect_row(
+                    line_type, line_key, record
+                )
+                continue
+            if line_type != DICT_RECORD_LINE_TYPES["works"]:
+                continue
+            dict_redirect_rows.pop(line_key, None)
+
             title = record.get("title", "")
             created = record.get("created", {}).get("value", "")
             covers = json.dumps(record.get("covers", []))
             latest_revision = record.get("latest_revision", "")
             authors = json.dumps(record.get("authors", []))
 
-            authors_list = record.get("authors", [])
-
-            for author in authors_list:
-                # if authors list is string
-                if isinstance(author.get("author", {}), str):
-                    print(f"author is string: {author.get('author', {})}")
-                    author_key = author.get("author", {})
-                else:
-                    author_key = author.get("author", {}).get("key")
-                if author_key:
-                    sqlite_cursor.execute(
-                        """
-                        INSERT INTO work_authors (work_key, author_key) 
-                        VALUES (?, ?)
-                        ON CONFLICT(work_key, author_key) DO NOTHING
-                        """,
-                        (line_key, author_key),
-                    )
+            write_work_author_links_sqlite(line_key, record.get("authors", []))
 
             if verbose:
                 print(f"title: {title}")
@@ -260,58 +481,599 @@ def load_db_works_sqlite(works_text_file_path, max_rows_to_read=None):
                 print(f"latest_revision: {latest_revision}")
                 print(f"authors: {authors}")
 
-            query = """
-            INSERT INTO works (
-                work_key, revision, last_modified, title,
-                created, covers, latest_revision, authors
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(work_key)
-            DO UPDATE SET
-                revision = excluded.revision,
-                last_modified = excluded.last_modified,
-                title = excluded.title,
-                created = excluded.created,
-                covers = excluded.covers,
-                latest_revision = excluded.latest_revision,
-                authors = excluded.authors
-            """
+            query = get_works_upsert_query_sqlite(layout)
 
             if verbose:
                 print("Executing query:")
                 print(query)
 
-            sqlite_cursor.execute(
-                query,
-                (
-                    line_key,
-                    line_revision,
-                    line_last_modified,
-                    title,
-                    created,
-                    covers,
-                    latest_revision,
-                    authors,
-                ),
+            work_row = (
+                line_key,
+                line_revision,
+                line_last_modified,
+                title,
+                created,
+                covers,
+                latest_revision,
+                authors,
             )
+            if layout == "compact":
+                work_row = encode_work_row_compact(work_row)
+            sqlite_cursor.execute(query, work_row)
+            sqlite_cursor.execute("DELETE FROM redirects WHERE key = ?", (line_key,))
 
             row_counter += 1
             if row_counter % 1000 == 0:
-                print(f"Works row count: {row_counter}")
+                print(
+                    f"Works row count: {row_counter} "
+                    f"({dump_file.tell_bytes() / dump_file.total_bytes:.1%} of file read)"
+                )
             if row_counter % 10000 == 0:
-                sqlite_conn.commit()
+                # Commits the records of the batch with its redirect lines
+                write_redirects_batch_sqlite("works", list(dict_redirect_rows.values()))
+                dict_redirect_rows.clear()
             if max_rows_to_read and row_counter >= max_rows_to_read:
                 break
 
-        sqlite_conn.commit()
+        write_redirects_batch_sqlite("works", list(dict_redirect_rows.values()))
 
         print("Works row count updated: ", row_counter)
 
+    rebuild_sqlite_search_index("works")
+
+
+# %%
+# Book Data: Bulk Loaders #
+
+
+@contextmanager
+def sqlite_bulk_load_pragmas(conn, journal_mode="WAL"):
+    """
+    Apply loader-only PRAGMAs for the duration of a bulk load.
+
+    Journaling is switched to `journal_mode` ("WAL" or "OFF"), syncs are
+    disabled, the page cache is enlarged and temp data is kept in memory. The
+    previous settings are restored afterwards, even if the load fails.
+    """
+    conn.commit()
+    cursor = conn.cursor()
+
+    dict_previous_pragmas = {
+        pragma: cursor.execute(f"PRAGMA {pragma}").fetchone()[0]
+        for pragma in ("journal_mode", "synchronous", "cache_size", "temp_store")
+    }
+
+    cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute(f"PRAGMA cache_size=-{BULK_CACHE_SIZE_KIB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+
+    try:
+        yield
+    finally:
+        conn.commit()
+        for pragma, value in dict_previous_pragmas.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.close()
+
+
+def write_authors_batch_sqlite(author_rows, layout="json", update_search_index=False):
+    """
+    Upsert a batch of author rows, stored in `layout`, and commit.
+
+    With `update_search_index`, the rows are also replaced in `authors_fts`.
+    """
+    if update_search_index:
+        update_sqlite_search_index(
+            "authors", [(row[0], row[3]) for row in author_rows]
+        )
+
+    if layout == "compact":
+        author_rows = [encode_author_row_compact(row) for row in author_rows]
+
+    sqlite_cursor.executemany(
+        """
+        INSERT INTO authors (
+            author_key, revision, last_modified, name,
+            source_records, latest_revision, created
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(author_key)
+        DO UPDATE SET
+            revision = excluded.revision,
+            last_modified = excluded.last_modified,
+            name = excluded.name,
+            source_records = excluded.source_records,
+            latest_revision = excluded.latest_revision,
+            created = excluded.created
+        """,
+        author_rows,
+    )
+    sqlite_conn.commit()
+
+
+def write_works_batch_sqlite(
+    work_rows,
+    work_author_rows,
+    delete_removed_links=False,
+    layout="json",
+    update_search_index=False,
+):
+    """
+    Upsert a batch of work rows and their author links with executemany and commit.
+
+    With `delete_removed_links`, the existing links of the batch's works are
+    replaced by the links in the batch. Rows are stored in `layout`. With
+    `update_search_index`, the rows are also replaced in `works_fts`.
+    """
+    if update_search_index:
+        update_sqlite_search_index("works", [(row[0], row[3]) for row in work_rows])
+
+    if delete_removed_links:
+        sqlite_cursor.executemany(
+            "DELETE FROM work_authors WHERE work_key = ?",
+            [(work_row[0],) for work_row in work_rows],
+        )
+
+    if layout == "compact":
+        work_rows = [encode_work_row_compact(row) for row in work_rows]
+
+    sqlite_cursor.executemany(get_works_upsert_query_sqlite(layout), work_rows)
+    sqlite_cursor.executemany(
+        WORK_AUTHORS_INSERT_QUERY_SQLITE,
+        [
+            (work_key, author_key, author_key)
+            for work_key, author_key in work_author_rows
+        ],
+    )
+    sqlite_conn.commit()
+
+
+def write_redirects_batch_sqlite(dump_type, redirect_rows, record_keys=()):
+    """
+    Apply a batch of (key, target) rows of redirect and delete lines and commit.
+
+    Runs after the records of the batch are written, `record_keys` are their
+    keys, which are no longer redirected. Redirected and deleted keys are
+    removed with their `work_authors` links and search index rows, after the
+    links to a redirected author are pointed at its target. The keys are
+    staged in a temp table so each step is a single statement.
+    """
+    sqlite_cursor.executemany(
+        "DELETE FROM redirects WHERE key = ?", [(key,) for key in record_keys]
+    )
+    if not redirect_rows:
+        sqlite_conn.commit()
+        return
+
+    key_column = DICT_KEY_COLUMNS[dump_type]
+    sqlite_cursor.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS redirects_batch (
+            key TEXT PRIMARY KEY,
+            target TEXT
+        )
+        """
+    )
+    sqlite_cursor.execute("DELETE FROM temp.redirects_batch")
+    sqlite_cursor.executemany(
+        "INSERT OR REPLACE INTO temp.redirects_batch (key, target) VALUES (?, ?)",
+        redirect_rows,
+    )
+
+    if dump_type == "authors":
+        sqlite_cursor.execute(
+            """
+            UPDATE OR IGNORE work_authors
+            SET author_key = (
+                SELECT target FROM temp.redirects_batch
+                WHERE key = work_authors.author_key
+            )
+            WHERE author_key IN (
+                SELECT key FROM temp.redirects_batch WHERE target IS NOT NULL
+            )
+            """
+        )
+        link_key_column = "author_key"
+    else:
+        link_key_column = "work_key"
+
+    # links left behind by UPDATE OR IGNORE already exist under the target
+    sqlite_cursor.execute(
+        f"""
+        DELETE FROM work_authors
+        WHERE {link_key_column} IN (SELECT key FROM temp.redirects_batch)
+        """
+    )
+    sqlite_cursor.execute(
+        f"""
+        DELETE FROM {dump_type}
+        WHERE {key_column} IN (SELECT key FROM temp.redirects_batch)
+        """
+    )
+    update_sqlite_search_index(dump_type, [(key, None) for key, _ in redirect_rows])
+    sqlite_cursor.execute(
+        """
+        DELETE FROM redirects
+        WHERE key IN (SELECT key FROM temp.redirects_batch WHERE target IS NULL)
+        """
+    )
+    sqlite_cursor.execute(
+        """
+        INSERT INTO redirects (key, target)
+        SELECT key, target FROM temp.redirects_batch WHERE target IS NOT NULL
+        ON CONFLICT(key) DO UPDATE SET target = excluded.target
+        """
+    )
+    sqlite_conn.commit()
+
+
+def get_revision_map_sqlite(table_name, key_column):
+    """Build a RevisionMap of the rows stored in a table."""
+    cursor = sqlite_conn.execute(
+        f"""
+        SELECT {key_column}, revision
+        FROM {table_name}
+        WHERE revision IS NOT NULL
+        ORDER BY LENGTH({key_column}), {key_column}
+        """
+    )
+    revision_map = RevisionMap(cursor)
+    cursor.close()
+
+    print(f"Stored revisions in {table_name}: {len(revision_map)}")
+    return revision_map
+
+
+def load_db_authors_sqlite_bulk(
+    authors_text_file_path,
+    max_rows_to_read=None,
+    journal_mode="WAL",
+    incremental=False,
+):
+    """
+    Bulk load the authors dump in executemany batches under loader-only PRAGMAs.
+
+    With `incremental`, lines whose revision is already stored are skipped
+    before their JSON is decoded, so a refresh only writes new and changed rows,
+    and `authors_fts` is updated batch by batch. Otherwise it is rebuilt once
+    the load is complete.
+
+    Returns:
+        dict: Rows loaded and rows/sec and MB/sec throughput.
+    """
+    row_counter = 0
+    start_time = time.perf_counter()
+    ls_author_rows = []
+    dict_redirect_rows = {}
+
+    layout = get_storage_layout_sqlite(sqlite_conn)
+    revision_map = None
+    if incremental:
+        revision_map = get_revision_map_sqlite("authors", "author_key")
+
+    with sqlite_bulk_load_pragmas(sqlite_conn, journal_mode):
+        with DumpFile(authors_text_file_path) as dump_file:
+            records = iter_dump_records(dump_file, revision_map)
+            for line_type, line_key, line_revision, line_last_modified, record in records:
+                if line_type in REDIRECT_LINE_TYPES:
+                    dict_redirect_rows[line_key] = get_redirect_row(
+                        line_type, line_key, record
+                    )
+                    continue
+                if line_type != DICT_RECORD_LINE_TYPES["authors"]:
+                    continue
+                dict_redirect_rows.pop(line_key, None)
+                ls_author_rows.append(
+                    get_author_row(
+                        line_key,
+                        line_revision,
+                        line_last_modified,
+                        record,
+                        missing_value="",
+                    )
+                )
+
+                row_counter += 1
+                if row_counter % BULK_BATCH_ROW_NUM == 0:
+                    write_authors_batch_sqlite(ls_author_rows, layout, incremental)
+                    write_redirects_batch_sqlite(
+                        "authors",
+                        list(dict_redirect_rows.values()),
+                        [row[0] for row in ls_author_rows],
+                    )
+                    ls_author_rows.clear()
+                    dict_redirect_rows.clear()
+                    print(
+                        f"Authors row count: {row_counter} "
+                        f"({dump_file.tell_bytes() / dump_file.total_bytes:.1%} of file read)"
+                    )
+                if max_rows_to_read and row_counter >= max_rows_to_read:
+                    break
+
+            bytes_read = dump_file.tell_bytes()
+
+        write_authors_batch_sqlite(ls_author_rows, layout, incremental)
+        write_redirects_batch_sqlite(
+            "authors",
+            list(dict_redirect_rows.values()),
+            [row[0] for row in ls_author_rows],
+        )
+        if not incremental:
+            rebuild_sqlite_search_index("authors")
+
+    print("Authors row count updated: ", row_counter)
+    dict_stats = get_load_stats(row_counter, bytes_read, start_time)
+    if revision_map is not None:
+        dict_stats["unchanged_rows"] = revision_map.unchanged_count
+    return dict_stats
+
+
+def load_db_works_sqlite_bulk(
+    works_text_file_path,
+    max_rows_to_read=None,
+    journal_mode="WAL",
+    incremental=False,
+):
+    """
+    Bulk load the works dump in executemany batches under loader-only PRAGMAs.
+
+    With `incremental`, only new and changed works are written, the links of
+    a changed work are replaced by the ones in the dump, and `works_fts` is
+    updated batch by batch. Otherwise it is rebuilt once the load is complete.
+
+    Returns:
+        dict: Rows loaded and rows/sec and MB/sec throughput.
+    """
+    row_counter = 0
+    start_time = time.perf_counter()
+    ls_work_rows = []
+    ls_work_author_rows = []
+    dict_redirect_rows = {}
+
+    layout = get_storage_layout_sqlite(sqlite_conn)
+    revision_map = None
+    if incremental:
+        revision_map = get_revision_map_sqlite("works", "work_key")
+
+    with sqlite_bulk_load_pragmas(sqlite_conn, journal_mode):
+        with DumpFile(works_text_file_path) as dump_file:
+            records = iter_dump_records(dump_file, revision_map)
+            for line_type, line_key, line_revision, line_last_modified, record in records:
+                if line_type in REDIRECT_LINE_TYPES:
+                    dict_redirect_rows[line_key] = get_redirect_row(
+                        line_type, line_key, record
+                    )
+                    continue
+                if line_type != DICT_RECORD_LINE_TYPES["works"]:
+                    continue
+                dict_redirect_rows.pop(line_key, None)
+                work_row, author_keys = get_work_row_and_author_keys(
+                    line_key,
+                    line_revision,
+                    line_last_modified,
+                    record,
+                    missing_value="",
+                )
+                ls_work_rows.append(work_row)
+                for author_key in author_keys:
+                    ls_work_author_rows.append((line_key, author_key))
+
+                row_counter += 1
+                if row_counter % BULK_BATCH_ROW_NUM == 0:
+                    write_works_batch_sqlite(
+                        ls_work_rows,
+                        ls_work_author_rows,
+                        incremental,
+                        layout,
+                        update_search_index=incremental,
+                    )
+                    write_redirects_batch_sqlite(
+                        "works",
+                        list(dict_redirect_rows.values()),
+                        [row[0] for row in ls_work_rows],
+                    )
+                    ls_work_rows.clear()
+                    ls_work_author_rows.clear()
+                    dict_redirect_rows.clear()
+                    print(
+                        f"Works row count: {row_counter} "
+                        f"({dump_file.tell_bytes() / dump_file.total_bytes:.1%} of file read)"
+                    )
+                if max_rows_to_read and row_counter >= max_rows_to_read:
+                    break
+
+            bytes_read = dump_file.tell_bytes()
+
+        write_works_batch_sqlite(
+            ls_work_rows,
+            ls_work_author_rows,
+            incremental,
+            layout,
+            update_search_index=incremental,
+        )
+        write_redirects_batch_sqlite(
+            "works",
+            list(dict_redirect_rows.values()),
+            [row[0] for row in ls_work_rows],
+        )
+        if not incremental:
+            rebuild_sqlite_search_index("works")
+
+    print("Works row count updated: ", row_counter)
+    dict_stats = get_load_stats(row_counter, bytes_read, start_time)
+    if revision_map is not None:
+        dict_stats["unchanged_rows"] = revision_map.unchanged_count
+    return dict_stats
+
+
+# %%
+# Search Index #
+
+
+def update_sqlite_search_index(dump_type, key_text_rows):
+    """
+    Replace the search index rows of a batch of (key, text) rows.
+
+    Rows are looked up by their key number rowid, so an update never scans
+    the index. Rows with an empty text or None are only removed. Keys without
+    a key number cannot be indexed.
+    """
+    fts_table, key_column, text_column = DICT_SEARCH_INDEXES[dump_type]
+    ls_rows = [
+        (get_key_number(key), key, text)
+        for key, text in key_text_rows
+        if get_key_number(key) is not None
+    ]
+    sqlite_cursor.executemany(
+        f"DELETE FROM {fts_table} WHERE rowid = ?", [(row[0],) for row in ls_rows]
+    )
+    sqlite_cursor.executemany(
+        f"""
+        INSERT INTO {fts_table} (rowid, {key_column}, {text_column})
+        VALUES (?, ?, ?)
+        """,
+        [row for row in ls_rows if row[2]],
+    )
+
+
+def get_search_match_query(search_query):
+    """
+    FTS5 query matching every word of a search query, each as a prefix.
+
+    Words are quoted, so FTS5 operators in the input are searched for as text.
+    """
+    return " ".join(
+        '"' + word.replace('"', '""') + '"*' for word in search_query.split()
+    )
+
+
+# %%
+# Storage Layout Migration #
+
+
+def get_sqlite_db_bytes(conn):
+    """Size of the database in pages in use, without free pages."""
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return (page_count - freelist_count) * page_size
+
+
+def migrate_sqlite_storage_layout(conn):
+    """
+    Convert json layout `authors` and `works` tables to the compact layout.
+
+    Each table is copied into a compact table in key order, the old table is
+    dropped and the copy renamed, then the file is vacuumed so the freed pages
+    are returned to the file system.
+
+    Returns:
+        dict or None: Bytes of the database before and after and the bytes
+            saved, or None if the tables are already compact.
+    """
+    if get_storage_layout_sqlite(conn) == "compact":
+        print("Tables already use the compact layout")
+        return None
+
+    bytes_before = get_sqlite_db_bytes(conn)
+    start_time = time.perf_counter()
+
+    for function_name, function in (
+        ("encode_timestamp", encode_timestamp_compact),
+        ("encode_covers", encode_covers_compact),
+        ("encode_source_records", encode_source_records_compact),
+    ):
+        conn.create_function(function_name, 1, function, deterministic=True)
+
+    cursor = conn.cursor()
+    create_sqlite_main_tables(cursor, "compact", suffix="_compact")
+    print("Converting authors...")
+    cursor.execute(
+        """
+        INSERT INTO authors_compact
+        SELECT
+            author_key, revision, encode_timestamp(last_modified), name,
+            encode_source_records(COALESCE(source_records, '[]')),
+            NULLIF(latest_revision, ''), encode_timestamp(created)
+        FROM authors
+        ORDER BY author_key
+        """
+    )
+    print("Converting works...")
+    cursor.execute(
+        """
+        INSERT INTO works_compact
+        SELECT
+            work_key, revision, encode_timestamp(last_modified), title,
+            encode_timestamp(created), encode_covers(COALESCE(covers, '[]')),
+            NULLIF(latest_revision, '')
+        FROM works
+        ORDER BY work_key
+        """
+    )
+    for table_name in ("authors", "works"):
+        cursor.execute(f"DROP TABLE {table_name}")
+        cursor.execute(f"ALTER TABLE {table_name}_compact RENAME TO {table_name}")
+    conn.commit()
+
+    print("Vacuuming...")
+    cursor.execute("VACUUM")
+    cursor.close()
+
+    bytes_after = get_sqlite_db_bytes(conn)
+    dict_stats = {
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_saved": bytes_before - bytes_after,
+        "percent_saved": round(100 * (bytes_before - bytes_after) / bytes_before, 1),
+        "seconds": round(time.perf_counter() - start_time, 2),
+    }
+    return dict_stats
+
 
 # %%
 # Query Data #
 
 
+def query_sqlite(conn, query, params=(), output="dataframe"):
+    """
+    Executes a given SQL query and returns a Pandas DataFrame.
+
+    `params` are bound to the ? placeholders of the query. `output` picks
+    another shape from QUERY_OUTPUT_FORMATS, like query_postgres. A statement
+    without a result set, e.g. an UPDATE or DDL, is committed and returns None.
+    """
+    check_query_output(output)
+    cursor = conn.execute(query, params)
+    try:
+        if cursor.description is None:
+            conn.commit()
+            return None
+        columns = [desc[0] for desc in cursor.description]
+        return format_query_result(cursor.fetchall(), columns, output)
+    finally:
+        cursor.close()
+
+
+def decode_storage_columns(df):
+    """
+    Decode the covers, source_records and timestamp columns of a query result.
+
+    Both storage layouts read back as lists of cover ids and source records
+    and as datetimes.
+    """
+    for column, decode in (
+        ("covers", decode_covers),
+        ("source_records", decode_source_records),
+        ("last_modified", decode_timestamp),
+        ("created", decode_timestamp),
+    ):
+        if column in df.columns:
+            df[column] = df[column].map(decode)
+    return df
+
+
 def get_authors_sample(conn):
     # select all authors
     sql_authors = """
@@ -323,7 +1085,7 @@ def get_authors_sample(conn):
         10
     """
 
-    authors_df = pd.read_sql_query(sql_authors, conn)
+    authors_df = decode_storage_columns(pd.read_sql_query(sql_authors, conn))
     print("Authors")
     pprint_df(authors_df.head())
 
@@ -340,7 +1102,7 @@ def get_works_sample(conn):
     LIMIT 10
     """
 
-    works_df = pd.read_sql_query(sql_works, conn)
+    works_df = decode_storage_columns(pd.read_sql_query(sql_works, conn))
     print("Works")
     pprint_df(works_df.head())
 
@@ -379,96 +1141,108 @@ def get_works_authors_sample(conn):
     return works_authors_df
 
 
-def get_books_for_author_id(conn, author_id):
-    # get all works by a specefic author
-    sql_works_by_author = f"""
+def get_books_for_author_id(conn, author_id, output="dataframe"):
+    # get all works by a specefic author, following a redirect of the author
+    sql_works_by_author = """
     SELECT w.work_key, w.title
     FROM works w
     JOIN work_authors wa ON w.work_key = wa.work_key
-    WHERE wa.author_key = '{author_id}'
+    WHERE wa.author_key = COALESCE(
+        (SELECT target FROM redirects WHERE key = ?), ?
+    )
     """
-    works_by_author_df = pd.read_sql_query(sql_works_by_author, conn)
-
-    return works_by_author_df
+    return query_sqlite(
+        conn, sql_works_by_author, (author_id, author_id), output=output
+    )
 
 
 def get_authors_for_book_id(conn, work_id):
-    # find all authors of a specific work
-    sql_authors_by_work = f"""
+    # find all authors of a specific work, following a redirect of the work
+    sql_authors_by_work = """
     SELECT a.author_key, a.name
     FROM authors a
     JOIN work_authors wa ON a.author_key = wa.author_key
-    WHERE wa.work_key = '{work_id}'
+    WHERE wa.work_key = COALESCE(
+        (SELECT target FROM redirects WHERE key = ?), ?
+    )
     """
-    authors_by_work_df = pd.read_sql_query(sql_authors_by_work, conn)
+    authors_by_work_df = pd.read_sql_query(
+        sql_authors_by_work, conn, params=(work_id, work_id)
+    )
     print("Authors of Work")
     pprint_df(authors_by_work_df.head())
 
     return authors_by_work_df
 
 
-def find_authors_by_work_title(conn, search_query):
-    """Find authors for works whose title contains all words in the search query."""
+def find_authors_by_work_title(
+    conn, search_query, limit=SEARCH_RESULT_LIMIT, output="dataframe"
+):
+    """
+    Find authors for works whose title has words starting with all words in
+    the search query.
 
-    # Split input into keywords (assuming input is space-separated words)
-    keywords = search_query.split()
+    The `limit` best matching works by BM25 rank are looked up in `works_fts`,
+    then joined to their authors, best match first. `output` is passed to
+    query_sqlite.
+    """
+    match_query = get_search_match_query(search_query)
+    if not match_query:
+        return format_query_result(
+            [], ["author_key", "name", "work_key", "title"], output
+        )
 
-    # Start SQL query
     sql_authors_by_work = """
     SELECT a.author_key, a.name, w.work_key, w.title
-    FROM authors a
-    JOIN work_authors wa ON a.author_key = wa.author_key
-    JOIN works w ON wa.work_key = w.work_key
-    WHERE
+    FROM (
+        SELECT work_key, bm25(works_fts) AS rank
+        FROM works_fts
+        WHERE works_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+    ) m
+    JOIN works w ON w.work_key = m.work_key
+    JOIN work_authors wa ON wa.work_key = w.work_key
+    JOIN authors a ON a.author_key = wa.author_key
+    ORDER BY m.rank;
     """
 
-    # Dynamically add LIKE conditions for each keyword
-    conditions = " AND ".join(["w.title LIKE ?" for _ in keywords])
+    return query_sqlite(conn, sql_authors_by_work, (match_query, limit), output)
 
-    sql_authors_by_work += conditions  # Append conditions to SQL
-    sql_authors_by_work += ";"  # End SQL query
 
-    # Prepare wildcard parameters for LIKE queries
-    like_params = [f"%{word}%" for word in keywords]
-
-    # Execute query and return DataFrame
-    authors_by_work_df = pd.read_sql_query(
-        sql_authors_by_work, conn, params=like_params
-    )
-
-    return authors_by_work_df
-
-
-def find_works_by_author_name(conn, search_query):
-    """Find works by authors whose name contains all words in the search query."""
+def find_works_by_author_name(
+    conn, search_query, limit=SEARCH_RESULT_LIMIT, output="dataframe"
+):
+    """
+    Find works by authors whose name has words starting with all words in the
+    search query.
 
-    # Split input into keywords (assuming input is space-separated words)
-    keywords = search_query.split()
+    The `limit` best matching authors by BM25 rank are looked up in
+    `authors_fts`, then joined to their works, best match first. `output` is
+    passed to query_sqlite.
+    """
+    match_query = get_search_match_query(search_query)
+    if not match_query:
+        return format_query_result(
+            [], ["work_key", "title", "author_key", "name"], output
+        )
 
-    # Start SQL query
     sql_works_by_author = """
     SELECT w.work_key, w.title, a.author_key, a.name
-    FROM works w
-    JOIN work_authors wa ON w.work_key = wa.work_key
-    JOIN authors a ON wa.author_key = a.author_key
-    WHERE
+    FROM (
+        SELECT author_key, bm25(authors_fts) AS rank
+        FROM authors_fts
+        WHERE authors_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+    ) m
+    JOIN authors a ON a.author_key = m.author_key
+    JOIN work_authors wa ON wa.author_key = a.author_key
+    JOIN works w ON w.work_key = wa.work_key
+    ORDER BY m.rank, w.title;
     """
 
-    # Dynamically add LIKE conditions for each keyword
-    conditions = " AND ".join(["a.name LIKE ?" for _ in keywords])
-
-    sql_works_by_author += conditions  # Append conditions to SQL
-    sql_works_by_author += ";"  # End SQL query
-
-    # Prepare wildcard parameters for LIKE queries
-    like_params = [f"%{word}%" for word in keywords]
-
-    # Execute query and return DataFrame
-    works_by_author_df = pd.read_sql_query(
-        sql_works_by_author, conn, params=like_params
-    )
-
-    return works_by_author_df
+    return query_sqlite(conn, sql_works_by_author, (match_query, limit), output)
 
 
 # %%
@@ -480,8 +1254,8 @@ def find_works_by_author_name(conn, search_query):
 
 if __name__ == "__main__":
     max_rows_to_read = None
-    # load_db_authors(authors_text_file_path, max_rows_to_read=max_rows_to_read)
-    # load_db_works(works_text_file_path, max_rows_to_read=max_rows_to_read)
+    # load_db_authors_sqlite_bulk(authors_text_file_path, max_rows_to_read=max_rows_to_read)
+    # load_db_works_sqlite_bulk(works_text_file_path, max_rows_to_read=max_rows_to_read)
 
 
 # %%
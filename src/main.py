@@ -1,7 +1,7 @@
 # %%
 # Imports #
 
-from local_database_postgres import query_postgres
+from local_database_postgres import get_search_condition, query_postgres
 from utils.display_tools import pprint_df, pprint_dict, pprint_ls  # noqa
 
 # %%
@@ -30,17 +30,17 @@ def get_authors_from_string_parts(search_string):
     Gets a result of authors where each part of string parts is in the author name
     """
 
-    # generate query where each part of string is in a like statemnt
-    ls_string_parts = search_string.split(" ")
+    # each part of the string must be in the name, answered by the trigram index
+    name_condition, ls_params = get_search_condition("name", search_string)
 
     query = f"""
     SELECT * FROM authors
-    WHERE {' AND '.join([f"name ILIKE '%{part}%'" for part in ls_string_parts])}
+    WHERE {name_condition}
     """
 
-    print(query)
+    print(query, ls_params)
 
-    return query_postgres(query)
+    return query_postgres(query, ls_params)
 
 
 search_string = "orson scott card"
@@ -61,16 +61,16 @@ def get_books_from_string_parts(search_string):
     Gets a result of books where each part of string parts is in the title
     """
 
-    ls_string_parts = [part.replace("'", "''") for part in search_string.split(" ")]
+    title_condition, ls_params = get_search_condition("title", search_string)
 
     query = f"""
     SELECT * FROM works
-    WHERE {' AND '.join([f"title ILIKE '%%{part}%%'" for part in ls_string_parts])}
+    WHERE {title_condition}
     """
 
-    print(query)
+    print(query, ls_params)
 
-    return query_postgres(query)
+    return query_postgres(query, ls_params)
 
 
 search_string = "ender's game"
@@ -90,22 +90,21 @@ def get_books_with_authors_by_title(search_string):
     Fetches books matching the search string in their title,
     along with their respective authors.
     """
-    ls_string_parts = [
-        part.replace("'", "''") for part in search_string.split(" ")
-    ]  # Escape single quotes
+    # the parts are bound as parameters, so quotes need no escaping
+    title_condition, ls_params = get_search_condition("w.title", search_string)
 
     query = f"""
     SELECT DISTINCT w.work_key, w.title, a.author_key, a.name
     FROM works w
     JOIN work_authors wa ON w.work_key = wa.work_key
     JOIN authors a ON wa.author_key = a.author_key
-    WHERE {' AND '.join([f"w.title ILIKE '%%{part}%%'" for part in ls_string_parts])}
+    WHERE {title_condition}
     ORDER BY w.title, a.name;
     """
 
-    print(query)
+    print(query, ls_params)
 
-    return query_postgres(query)
+    return query_postgres(query, ls_params)
 
 
 # Example usage
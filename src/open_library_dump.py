@@ -0,0 +1,1288 @@
+# %%
+# Imports #
+
+import datetime
+import gzip
+import io
+import json
+import os
+import queue
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from tqdm import tqdm
+
+from utils.display_tools import pprint_df, pprint_dict, pprint_ls  # noqa
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib decoder is used instead
+    orjson = None
+
+# %%
+# Variables #
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHECKPOINT_DIR = os.path.join(project_root, "data", "checkpoints")
+
+# The dump files are tab-separated. The columns are:
+# 0: Type (e.g. /type/work)
+# 1: Key (e.g. /works/OL10000278W)
+# 2: Revision number (e.g. 3)
+# 3: Timestamp (e.g. 2021-12-26T21:22:34.663256)
+# 4: JSON blob with the record details
+DUMP_COLUMN_COUNT = 5
+
+# Columns of the rows built by get_author_row and get_work_row_and_author_keys,
+# and of the (work_key, author_key) links
+AUTHORS_COLUMNS = (
+    "author_key",
+    "revision",
+    "last_modified",
+    "name",
+    "source_records",
+    "latest_revision",
+    "created",
+)
+
+WORKS_COLUMNS = (
+    "work_key",
+    "revision",
+    "last_modified",
+    "title",
+    "created",
+    "covers",
+    "latest_revision",
+    "authors",
+)
+
+WORK_AUTHORS_COLUMNS = ("work_key", "author_key")
+
+# Line types of the records loaded into the main tables of each dump type.
+# Redirect and delete lines replace a key instead: a redirect points it at the
+# key that superseded it, a delete removes it. They become (key, target)
+# `redirects` rows, with a target of None for a delete.
+DICT_RECORD_LINE_TYPES = {
+    "authors": "/type/author",
+    "works": "/type/work",
+    "editions": "/type/edition",
+}
+REDIRECT_LINE_TYPE = "/type/redirect"
+DELETE_LINE_TYPE = "/type/delete"
+REDIRECT_LINE_TYPES = (REDIRECT_LINE_TYPE, DELETE_LINE_TYPE)
+REDIRECTS_COLUMNS = ("key", "target")
+DICT_KEY_COLUMNS = {
+    "authors": "author_key",
+    "works": "work_key",
+    "editions": "edition_key",
+}
+
+# "json" stores covers, source_records and the works.authors blob as JSON text.
+# "compact" stores covers and source_records as typed arrays (Postgres) or
+# packed values (SQLite), keeps timestamps native and drops works.authors,
+# whose links are already in work_authors.
+STORAGE_LAYOUTS = ("json", "compact")
+STORAGE_LAYOUT = os.getenv("STORAGE_LAYOUT", "json")
+COMPACT_DROPPED_COLUMNS = ("authors",)
+
+# Markers returned by parse_dump_line for lines that carry no record
+DUMP_LINE_SKIP = "skip"
+DUMP_LINE_END = "end"
+
+# Items waiting between two stages of run_dump_pipeline, bounding its memory use
+PIPELINE_QUEUE_SIZE = 4
+PIPELINE_LINES_PER_CHUNK = 10000
+# Marker put on a pipeline queue after the last item
+PIPELINE_END = "end"
+
+# Large buffers keep the decompressor and the disk reads busy with few syscalls
+READ_BUFFER_SIZE = 16 * 1024 * 1024
+
+# Size of the byte ranges handed to each parse worker
+PARSE_CHUNK_BYTES = 32 * 1024 * 1024
+
+# JSON decoders for the record blobs, the fastest installed one is used by default
+DICT_JSON_DECODERS = {"json": json.loads}
+if orjson is not None:
+    DICT_JSON_DECODERS["orjson"] = orjson.loads
+
+JSON_DECODER = os.getenv("JSON_DECODER", "orjson" if orjson is not None else "json")
+if JSON_DECODER not in DICT_JSON_DECODERS:
+    raise ValueError(
+        f"Unknown or uninstalled JSON_DECODER {JSON_DECODER!r}, "
+        f"expected one of {list(DICT_JSON_DECODERS)}"
+    )
+decode_json = DICT_JSON_DECODERS[JSON_DECODER]
+
+# Keys like /works/OL123W are stored in a RevisionMap as 123 << REVISION_BITS | rev
+REVISION_BITS = 24
+
+
+# %%
+# Dump Files #
+
+
+class DumpFile:
+    """
+    Read a plain text or gzip compressed dump file line by line.
+
+    `.gz` paths are decompressed on the fly instead of being extracted to disk.
+    `tell_bytes` reports how many bytes of the file on disk have been consumed,
+    which for gzip input is the compressed position. `line_offset` is the exact
+    offset in the (decompressed) text just after the last line read, which is
+    where a resumed load can start again.
+    """
+
+    def __init__(self, file_path, start_offset=0):
+        self.file_path = file_path
+        self.is_gzip = file_path.endswith(".gz")
+        self.total_bytes = os.path.getsize(file_path)
+        self.line_offset = 0
+
+        self._raw_file = open(file_path, "rb", buffering=READ_BUFFER_SIZE)
+        if self.is_gzip:
+            self._stream = io.BufferedReader(
+                gzip.GzipFile(fileobj=self._raw_file, mode="rb"),
+                buffer_size=READ_BUFFER_SIZE,
+            )
+        else:
+            self._stream = self._raw_file
+
+        if start_offset:
+            self.skip_to(start_offset)
+
+    def __iter__(self):
+        for raw_line in self._stream:
+            self.line_offset += len(raw_line)
+            yield raw_line.decode("utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def skip_to(self, line_offset):
+        """
+        Move to a line offset of the text.
+
+        Plain text files seek straight there, gzip files have to decompress
+        and discard everything before it.
+        """
+        if not self.is_gzip:
+            self._raw_file.seek(line_offset)
+        else:
+            remaining = line_offset - self.line_offset
+            while remaining > 0:
+                skipped = self._stream.read(min(remaining, READ_BUFFER_SIZE))
+                if not skipped:
+                    break
+                remaining -= len(skipped)
+        self.line_offset = line_offset
+
+    def tell_bytes(self):
+        """Bytes of the file on disk consumed so far."""
+        return self._raw_file.tell()
+
+    def close(self):
+        self._stream.close()
+        self._raw_file.close()
+
+
+# %%
+# Dump Lines #
+
+
+def parse_dump_line(line, revision_map=None, line_types=None, keys=None):
+    """
+    Parse one line of an Open Library dump file.
+
+    The type, key and revision columns are checked before the JSON blob is
+    decoded, so filtered out and unchanged lines cost no JSON work.
+
+    Parameters:
+        line (str): The raw dump line.
+        revision_map (RevisionMap): Stored revisions. Lines whose revision is
+            already stored are skipped.
+        line_types (set): Only decode lines of these types, e.g. {"/type/work"}.
+        keys (set): Only decode lines with these keys.
+
+    Returns:
+        tuple or str: (line_type, line_key, line_revision, line_last_modified,
+            record), DUMP_LINE_SKIP for empty, filtered out or unchanged lines
+            and JSON parse errors, or DUMP_LINE_END for a line with too few
+            columns.
+    """
+    line = line.strip()
+    if not line:
+        return DUMP_LINE_SKIP
+
+    parts = line.split("\t")
+    if len(parts) < DUMP_COLUMN_COUNT:
+        return DUMP_LINE_END
+
+    line_type = parts[0]
+    line_key = parts[1]
+    line_revision = parts[2]
+    line_last_modified = parts[3]
+    line_json_blob = parts[4]
+
+    if line_types is not None and line_type not in line_types:
+        return DUMP_LINE_SKIP
+    if keys is not None and line_key not in keys:
+        return DUMP_LINE_SKIP
+    if revision_map is not None and revision_map.is_unchanged(line_key, line_revision):
+        return DUMP_LINE_SKIP
+
+    try:
+        record = decode_json(line_json_blob)
+    except Exception as e:
+        print(f"JSON parse error for line_key: {line_key}: {e}")
+        return DUMP_LINE_SKIP
+
+    return line_type, line_key, line_revision, line_last_modified, record
+
+
+def iter_dump_records(file_obj, revision_map=None, line_types=None, keys=None):
+    """
+    Iterate over the parsed records of an Open Library dump file.
+
+    Empty lines are skipped, lines with a JSON parse error are reported and
+    skipped, and a line with too few columns ends the iteration, matching the
+    row-by-row loaders.
+
+    Parameters:
+        file_obj (iterable): An open text file, DumpFile or any iterable of dump
+            lines.
+        revision_map (RevisionMap): If given, lines whose revision is already
+            stored are skipped.
+        line_types (set): If given, only lines of these types are decoded.
+        keys (set): If given, only lines with these keys are decoded.
+
+    Yields:
+        tuple: (line_type, line_key, line_revision, line_last_modified, record)
+    """
+    for line in file_obj:
+        dump_record = parse_dump_line(line, revision_map, line_types, keys)
+        if dump_record is DUMP_LINE_END:
+            break
+        if dump_record is DUMP_LINE_SKIP:
+            continue
+
+        yield dump_record
+
+
+def iter_dump_lines_with_progress(dump_file, desc):
+    """
+    Iterate over the lines of a DumpFile with a progress bar in bytes on disk.
+
+    Parameters:
+        dump_file (DumpFile): The open dump file.
+        desc (str): Progress bar description.
+
+    Yields:
+        str: The raw dump lines.
+    """
+    with tqdm(
+        total=dump_file.total_bytes,
+        initial=dump_file.tell_bytes(),
+        unit="B",
+        unit_scale=True,
+        desc=desc,
+    ) as progress_bar:
+        for line in dump_file:
+            bytes_read = dump_file.tell_bytes()
+            if bytes_read != progress_bar.n:
+                progress_bar.update(bytes_read - progress_bar.n)
+            yield line
+
+
+def get_load_stats(row_counter, bytes_read, start_time):
+    """
+    Summarise the throughput of a finished load.
+
+    Parameters:
+        row_counter (int): Rows loaded.
+        bytes_read (int): Bytes of the dump file consumed on disk.
+        start_time (float): time.perf_counter() value when the load started.
+
+    Returns:
+        dict: rows, bytes_read, seconds, rows_per_sec and mb_per_sec.
+    """
+    seconds = max(time.perf_counter() - start_time, 1e-9)
+    dict_stats = {
+        "rows": row_counter,
+        "bytes_read": bytes_read,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(row_counter / seconds, 1),
+        "mb_per_sec": round(bytes_read / seconds / (1024 * 1024), 2),
+    }
+    print(
+        f"Loaded {row_counter} rows in {seconds:.1f}s: "
+        f"{dict_stats['rows_per_sec']} rows/sec, {dict_stats['mb_per_sec']} MB/sec"
+    )
+    return dict_stats
+
+
+# %%
+# COPY Format #
+
+
+def format_copy_value(value):
+    """Format a single value for COPY text format."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def format_copy_line(row):
+    """Format a row as one line of COPY text format."""
+    return "\t".join(format_copy_value(value) for value in row) + "\n"
+
+
+# %%
+# Checkpoints #
+
+
+def get_file_identity(file_path):
+    """Identify a dump file by its path, size and modification time."""
+    file_stat = os.stat(file_path)
+    return {
+        "file_path": os.path.abspath(file_path),
+        "size": file_stat.st_size,
+        "mtime": int(file_stat.st_mtime),
+    }
+
+
+def get_checkpoint_path(file_path, target):
+    """Get the checkpoint file for loading a dump file into a target table."""
+    return os.path.join(
+        CHECKPOINT_DIR, f"{target}_{os.path.basename(file_path)}.checkpoint.json"
+    )
+
+
+def save_checkpoint(checkpoint_path, dump_file, row_counter, line_offset=None):
+    """
+    Record how far a load has committed.
+
+    Call this right after a commit. The file is replaced atomically so a crash
+    never leaves a half written checkpoint behind. `line_offset` defaults to
+    the position of `dump_file`, pass it when the reader is ahead of the
+    committed rows.
+    """
+    dict_checkpoint = {
+        **get_file_identity(dump_file.file_path),
+        "line_offset": dump_file.line_offset if line_offset is None else line_offset,
+        "row_count": row_counter,
+    }
+
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    temp_path = checkpoint_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(dict_checkpoint, f)
+    os.replace(temp_path, checkpoint_path)
+
+
+def load_checkpoint(checkpoint_path, file_path):
+    """
+    Get the (line_offset, row_count) to resume a load from.
+
+    Returns (0, 0) when there is no checkpoint or it belongs to a different
+    version of the dump file.
+    """
+    if not os.path.exists(checkpoint_path):
+        print(f"No checkpoint found at {checkpoint_path}, starting from the top")
+        return 0, 0
+
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        dict_checkpoint = json.load(f)
+
+    dict_identity = get_file_identity(file_path)
+    if any(dict_checkpoint.get(key) != value for key, value in dict_identity.items()):
+        print(f"Checkpoint {checkpoint_path} is for another file, starting from the top")
+        return 0, 0
+
+    print(
+        f"Resuming {file_path} after row {dict_checkpoint['row_count']} "
+        f"at offset {dict_checkpoint['line_offset']}"
+    )
+    return dict_checkpoint["line_offset"], dict_checkpoint["row_count"]
+
+
+# %%
+# Revisions #
+
+
+def get_key_number(key):
+    """Get the number of an Open Library key like /works/OL123W, or None."""
+    start = key.rfind("/OL")
+    if start < 0:
+        return None
+    digits = key[start + 3 : -1]
+    if not digits.isdigit() or not key[-1].isalpha():
+        return None
+    return int(digits)
+
+
+class RevisionMap:
+    """
+    Compact key to revision map of the rows already stored in a table.
+
+    Standard keys are packed with their revision into one sorted array of
+    64 bit integers (8 bytes per row) and looked up with bisect. Keys that do
+    not follow the /type/OL<number><letter> form are kept in a plain dict.
+    """
+
+    def __init__(self, key_revision_rows):
+        """
+        Parameters:
+            key_revision_rows (iterable): (key, revision) rows. Rows ordered by
+                key length then key avoid a final sort. Rows without a
+                revision, such as author stubs, are left out so they reload.
+        """
+        self._packed = array("q")
+        self._other_revisions = {}
+        self.unchanged_count = 0
+
+        is_sorted = True
+        for key, revision in key_revision_rows:
+            if revision is None:
+                continue
+            revision = int(revision)
+            key_number = get_key_number(key)
+            if key_number is None or revision >> REVISION_BITS:
+                self._other_revisions[key] = revision
+                continue
+
+            packed = key_number << REVISION_BITS | revision
+            if is_sorted and self._packed and packed < self._packed[-1]:
+                is_sorted = False
+            self._packed.append(packed)
+
+        if not is_sorted:
+            self._packed = array("q", sorted(self._packed))
+
+    def __len__(self):
+        return len(self._packed) + len(self._other_revisions)
+
+    def get(self, key):
+        """Get the stored revision of a key, or None."""
+        key_number = get_key_number(key)
+        if key_number is None:
+            return self._other_revisions.get(key)
+
+        index = bisect_left(self._packed, key_number << REVISION_BITS)
+        if (
+            index < len(self._packed)
+            and self._packed[index] >> REVISION_BITS == key_number
+        ):
+            return self._packed[index] & ((1 << REVISION_BITS) - 1)
+        return self._other_revisions.get(key)
+
+    def is_unchanged(self, key, revision):
+        """Check if a dump line's revision is already stored, counting the hits."""
+        if not revision.isdigit() or self.get(key) != int(revision):
+            return False
+
+        self.unchanged_count += 1
+        return True
+
+
+# %%
+# Records #
+
+
+def get_author_key_from_ref(author_ref):
+    """
+    Get the author key from an entry of a work's `authors` list.
+
+    The dump stores the reference either as {"author": {"key": ...}} or as
+    {"author": "/authors/..."}.
+    """
+    author = author_ref.get("author", {})
+    if isinstance(author, dict):
+        return author.get("key")
+    return author
+
+
+def get_author_row(
+    line_key, line_revision, line_last_modified, record, missing_value=None
+):
+    """
+    Build an `authors` row from a parsed dump line.
+
+    `missing_value` fills `latest_revision` and `created` when the record has
+    none; the SQLite loaders store "" where Postgres needs NULL.
+
+    Returns:
+        tuple: (author_key, revision, last_modified, name, source_records,
+            latest_revision, created)
+    """
+    return (
+        line_key,
+        line_revision,
+        line_last_modified,
+        record.get("name", ""),
+        json.dumps(record.get("source_records", [])),
+        record.get("latest_revision", missing_value),
+        record.get("created", {}).get("value", missing_value),
+    )
+
+
+def get_work_row_and_author_keys(
+    line_key, line_revision, line_last_modified, record, missing_value=None
+):
+    """
+    Build a `works` row and the list of linked author keys from a parsed dump line.
+
+    `missing_value` fills `created` and `latest_revision` as in get_author_row.
+
+    Returns:
+        tuple: (work_row, author_keys) where work_row is (work_key, revision,
+            last_modified, title, created, covers, latest_revision, authors)
+    """
+    authors_list = record.get("authors", [])
+
+    author_keys = []
+    for author_ref in authors_list:
+        author_key = get_author_key_from_ref(author_ref)
+        if author_key:
+            author_keys.append(author_key)
+
+    work_row = (
+        line_key,
+        line_revision,
+        line_last_modified,
+        record.get("title", ""),
+        record.get("created", {}).get("value", missing_value),
+        json.dumps(record.get("covers", [])),
+        record.get("latest_revision", missing_value),
+        json.dumps(authors_list),
+    )
+
+    return work_row, author_keys
+
+
+def get_redirect_row(line_type, line_key, record):
+    """
+    Build a `redirects` row from a redirect or delete line.
+
+    Returns:
+        tuple: (key, target) where target is the key the record now lives
+            under, or None if it was deleted.
+    """
+    if line_type == REDIRECT_LINE_TYPE:
+        target = record.get("location")
+        if target and target != line_key:
+            return line_key, target
+    return line_key, None
+
+
+def get_isbn13_check_digit(core):
+    """Check digit of the first 12 digits of an ISBN-13."""
+    weighted_sum = sum(
+        int(digit) * (1 if position % 2 == 0 else 3)
+        for position, digit in enumerate(core)
+    )
+    return str((10 - weighted_sum % 10) % 10)
+
+
+def is_isbn10_check_digit_valid(characters):
+    """True if the weighted sum of an ISBN-10, with X as 10, is divisible by 11."""
+    weighted_sum = sum(
+        (10 - position) * int(digit) for position, digit in enumerate(characters[:9])
+    )
+    weighted_sum += 10 if characters[9] == "X" else int(characters[9])
+    return weighted_sum % 11 == 0
+
+
+def normalize_isbn(isbn):
+    """
+    Normalize an ISBN-10 or ISBN-13 to the 13 digits of its ISBN-13 form.
+
+    Hyphens and spaces are ignored. ISBN-10s get the 978 prefix and a new
+    check digit, so both forms of a book's ISBN look up the same value.
+    Values whose check digit is wrong are not ISBNs.
+
+    Returns:
+        str or None: The ISBN-13 digits, or None if it is not a valid ISBN.
+    """
+    characters = "".join(
+        character for character in str(isbn).upper() if character.isalnum()
+    )
+
+    if len(characters) == 13 and characters.isdigit():
+        if characters[12] != get_isbn13_check_digit(characters[:12]):
+            return None
+        return characters
+
+    if (
+        len(characters) == 10
+        and characters[:9].isdigit()
+        and (characters[9].isdigit() or characters[9] == "X")
+    ):
+        if not is_isbn10_check_digit_valid(characters):
+            return None
+        core = "978" + characters[:9]
+        return core + get_isbn13_check_digit(core)
+
+    return None
+
+
+def get_edition_row_and_isbns(
+    line_key, line_revision, line_last_modified, record, missing_value=None
+):
+    """
+    Build an `editions` row and the normalized ISBNs of an editions dump line.
+
+    Returns:
+        tuple: (edition_row, isbns) where edition_row is (edition_key, revision,
+            last_modified, title, work_key, publish_date, publishers,
+            number_of_pages, covers) and isbns is a sorted list of ISBN-13s
+    """
+    works = record.get("works", [])
+    work_key = None
+    if works and isinstance(works[0], dict):
+        work_key = works[0].get("key")
+
+    number_of_pages = record.get("number_of_pages")
+    if not isinstance(number_of_pages, int):
+        number_of_pages = missing_value
+
+    set_isbns = set()
+    for isbn in record.get("isbn_10", []) + record.get("isbn_13", []):
+        normalized_isbn = normalize_isbn(isbn)
+        if normalized_isbn:
+            set_isbns.add(normalized_isbn)
+
+    edition_row = (
+        line_key,
+        line_revision,
+        line_last_modified,
+        record.get("title", ""),
+        work_key,
+        record.get("publish_date", missing_value),
+        json.dumps(record.get("publishers", [])),
+        number_of_pages,
+        json.dumps(record.get("covers", [])),
+    )
+
+    return edition_row, sorted(set_isbns)
+
+
+# %%
+# Storage Layouts #
+
+
+TIMESTAMP_EPOCH = datetime.datetime(1970, 1, 1)
+TIMESTAMP_UNIT = datetime.timedelta(microseconds=1)
+
+
+def get_layout_columns(columns, layout):
+    """Columns of a table's rows that are stored in a layout."""
+    if layout == "compact":
+        return tuple(
+            column for column in columns if column not in COMPACT_DROPPED_COLUMNS
+        )
+    return columns
+
+
+def encode_timestamp_compact(value):
+    """
+    Encode a dump timestamp as integer microseconds since the epoch, for SQLite.
+
+    Empty values become None, and text that is not an ISO timestamp is kept as
+    it is rather than lost.
+    """
+    if value in (None, ""):
+        return None
+    try:
+        return (datetime.datetime.fromisoformat(value) - TIMESTAMP_EPOCH) // (
+            TIMESTAMP_UNIT
+        )
+    except (TypeError, ValueError):
+        return value
+
+
+def encode_covers_compact(covers_json):
+    """Pack JSON cover ids as little-endian int32s, None when there are none."""
+    covers = [cover for cover in json.loads(covers_json) if isinstance(cover, int)]
+    if not covers:
+        return None
+    return struct.pack(f"<{len(covers)}i", *covers)
+
+
+def encode_source_records_compact(source_records_json):
+    """Join JSON source records with newlines, None when there are none."""
+    source_records = json.loads(source_records_json)
+    if not source_records:
+        return None
+    return "\n".join(str(source_record) for source_record in source_records)
+
+
+def encode_author_row_compact(author_row):
+    """Convert a get_author_row row to the compact SQLite layout."""
+    (
+        author_key,
+        revision,
+        last_modified,
+        name,
+        source_records,
+        latest_revision,
+        created,
+    ) = author_row
+    return (
+        author_key,
+        revision,
+        encode_timestamp_compact(last_modified),
+        name,
+        encode_source_records_compact(source_records),
+        latest_revision if latest_revision != "" else None,
+        encode_timestamp_compact(created),
+    )
+
+
+def encode_work_row_compact(work_row):
+    """Convert a get_work_row_and_author_keys row to the compact SQLite layout."""
+    (
+        work_key,
+        revision,
+        last_modified,
+        title,
+        created,
+        covers,
+        latest_revision,
+        _,
+    ) = work_row
+    return (
+        work_key,
+        revision,
+        encode_timestamp_compact(last_modified),
+        title,
+        encode_timestamp_compact(created),
+        encode_covers_compact(covers),
+        latest_revision if latest_revision != "" else None,
+    )
+
+
+def decode_timestamp(value):
+    """Read a stored timestamp of either layout as a datetime, or None."""
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, int):
+        return TIMESTAMP_EPOCH + value * TIMESTAMP_UNIT
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def decode_covers(value):
+    """Read stored covers of either layout as a list of cover ids."""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, (bytes, memoryview)):
+        return list(struct.unpack(f"<{len(value) // 4}i", value))
+    return json.loads(value)
+
+
+def decode_source_records(value):
+    """Read stored source records of either layout as a list."""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    if value.startswith("["):
+        return json.loads(value)
+    return value.split("\n")
+
+
+# %%
+# Parallel Parsing #
+
+
+def get_dump_chunk_ranges(file_path, chunk_bytes=PARSE_CHUNK_BYTES):
+    """
+    Split a plain text dump into byte ranges that start and end on line boundaries.
+
+    Parameters:
+        file_path (str): The path to the text dump.
+        chunk_bytes (int): The approximate size of each range.
+
+    Returns:
+        list: (start, end) byte offsets covering the whole file in order.
+    """
+    total_bytes = os.path.getsize(file_path)
+
+    ls_ranges = []
+    with open(file_path, "rb") as f:
+        start = 0
+        while start < total_bytes:
+            end = start + chunk_bytes
+            if end >= total_bytes:
+                end = total_bytes
+            else:
+                # move the boundary forward to the start of the next line
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            ls_ranges.append((start, end))
+            start = end
+
+    return ls_ranges
+
+
+def parse_numbered_dump_lines(dump_type, numbered_lines):
+    """
+    Parse dump lines into table rows, in a worker process or inline.
+
+    Each row is prefixed with the line number it came from so that the writer
+    can keep the last occurrence of a key, whatever order batches arrive in.
+    Redirect and delete lines become redirect rows, lines of other types are
+    skipped.
+
+    Parameters:
+        dump_type (str): "authors" or "works".
+        numbered_lines (iterable): (line_number, line) pairs in file order.
+
+    Returns:
+        tuple: (rows, work_author_rows, redirect_rows, reached_end) where rows
+            are (line_number, *author_row) or (line_number, *work_row),
+            work_author_rows are (work_key, author_key) links for works,
+            redirect_rows are (line_number, key, target) and reached_end is
+            True if a line with too few columns ended the data.
+    """
+    ls_rows = []
+    ls_work_author_rows = []
+    ls_redirect_rows = []
+    record_line_type = DICT_RECORD_LINE_TYPES[dump_type]
+
+    for line_number, line in numbered_lines:
+        dump_record = parse_dump_line(line)
+        if dump_record is DUMP_LINE_END:
+            return ls_rows, ls_work_author_rows, ls_redirect_rows, True
+        if dump_record is DUMP_LINE_SKIP:
+            continue
+
+        line_type, line_key, _, _, record = dump_record
+        if line_type in REDIRECT_LINE_TYPES:
+            ls_redirect_rows.append(
+                (line_number,) + get_redirect_row(line_type, line_key, record)
+            )
+        elif line_type != record_line_type:
+            continue
+        elif dump_type == "authors":
+            ls_rows.append((line_number,) + get_author_row(*dump_record[1:]))
+        else:
+            work_row, author_keys = get_work_row_and_author_keys(*dump_record[1:])
+            ls_rows.append((line_number,) + work_row)
+            for author_key in author_keys:
+                ls_work_author_rows.append((work_row[0], author_key))
+
+    return ls_rows, ls_work_author_rows, ls_redirect_rows, False
+
+
+def parse_dump_chunk(dump_type, file_path, start, end):
+    """
+    Parse the lines of a plain text dump between two byte offsets.
+
+    The byte offset of each line is used as its line number.
+    """
+
+    def iter_numbered_lines(f):
+        position = start
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            yield position, line.decode("utf-8")
+            position += len(line)
+
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        return parse_numbered_dump_lines(dump_type, iter_numbered_lines(f))
+
+
+def iter_dump_parse_tasks(dump_type, file_path, lines_per_task):
+    """
+    Split a dump into parse tasks that can run in a process pool.
+
+    Plain text dumps are split into byte ranges so workers read the file
+    themselves. Gzip dumps cannot be split, so their lines are decompressed
+    here and shipped to the workers in groups of `lines_per_task`.
+
+    Yields:
+        tuple: (function, args, bytes_read) in file order, where bytes_read is
+            the position on disk reached once the task is done.
+    """
+    if not file_path.endswith(".gz"):
+        for start, end in get_dump_chunk_ranges(file_path):
+            yield parse_dump_chunk, (dump_type, file_path, start, end), end
+        return
+
+    with DumpFile(file_path) as dump_file:
+        ls_numbered_lines = []
+        for line_number, line in enumerate(dump_file):
+            ls_numbered_lines.append((line_number, line))
+            if len(ls_numbered_lines) >= lines_per_task:
+                args = (dump_type, ls_numbered_lines)
+                yield parse_numbered_dump_lines, args, dump_file.tell_bytes()
+                ls_numbered_lines = []
+
+        if ls_numbered_lines:
+            args = (dump_type, ls_numbered_lines)
+            yield parse_numbered_dump_lines, args, dump_file.tell_bytes()
+
+
+# %%
+# Pipeline #
+
+
+class PipelineStopped(Exception):
+    """Raised in a pipeline stage when another stage failed or finished early."""
+
+
+class StageQueue:
+    """
+    Bounded queue between two stages of run_dump_pipeline.
+
+    A full queue blocks the stage feeding it, which is the backpressure that
+    keeps memory flat. The time each side spends blocked and the queue depth
+    seen by the producer are recorded to find the bottleneck stage.
+    """
+
+    def __init__(self, maxsize, stop_event):
+        self._queue = queue.Queue(maxsize)
+        self._stop_event = stop_event
+        self.put_count = 0
+        self.max_depth = 0
+        self.depth_total = 0
+        self.put_stall_seconds = 0.0
+        self.get_stall_seconds = 0.0
+
+    def put(self, item):
+        depth = self._queue.qsize()
+        self.put_count += 1
+        self.max_depth = max(self.max_depth, depth)
+        self.depth_total += depth
+
+        start_time = time.perf_counter()
+        while True:
+            try:
+                self._queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                if self._stop_event.is_set():
+                    raise PipelineStopped
+        self.put_stall_seconds += time.perf_counter() - start_time
+
+    def get(self):
+        start_time = time.perf_counter()
+        while True:
+            try:
+                item = self._queue.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    raise PipelineStopped
+        self.get_stall_seconds += time.perf_counter() - start_time
+        return item
+
+    def get_mean_depth(self):
+        return self.depth_total / self.put_count if self.put_count else 0.0
+
+
+def get_pipeline_stage_stats(stage_seconds, input_queue, output_queue):
+    """
+    Summarise one pipeline stage.
+
+    `wait_input_seconds` is time starved by the stage before it and
+    `wait_output_seconds` time blocked by the stage after it, so the
+    bottleneck is the stage that is busy while its neighbours wait on it.
+    """
+    wait_input_seconds = input_queue.get_stall_seconds if input_queue else 0.0
+    wait_output_seconds = output_queue.put_stall_seconds if output_queue else 0.0
+    dict_stats = {
+        "seconds": round(stage_seconds, 3),
+        "busy_seconds": round(
+            max(stage_seconds - wait_input_seconds - wait_output_seconds, 0.0), 3
+        ),
+        "wait_input_seconds": round(wait_input_seconds, 3),
+        "wait_output_seconds": round(wait_output_seconds, 3),
+    }
+    if output_queue:
+        dict_stats["output_queue_max_depth"] = output_queue.max_depth
+        dict_stats["output_queue_mean_depth"] = round(output_queue.get_mean_depth(), 2)
+    return dict_stats
+
+
+def limit_parsed_rows(
+    rows, work_author_rows, redirect_rows, row_counter, max_rows_to_read
+):
+    """
+    Cut a parsed batch at `max_rows_to_read` rows in total.
+
+    Only record rows count toward the limit, redirect and delete lines do
+    not, in every loader. The links of dropped works and the redirect rows
+    after the last kept row are dropped with them.
+
+    Returns:
+        tuple: (rows, work_author_rows, redirect_rows, reached_limit)
+    """
+    if not max_rows_to_read or row_counter + len(rows) < max_rows_to_read:
+        return rows, work_author_rows, redirect_rows, False
+
+    rows = rows[: max_rows_to_read - row_counter]
+    kept_keys = {row[1] for row in rows}
+    work_author_rows = [link for link in work_author_rows if link[0] in kept_keys]
+    last_line_number = rows[-1][0] if rows else -1
+    redirect_rows = [row for row in redirect_rows if row[0] < last_line_number]
+    return rows, work_author_rows, redirect_rows, True
+
+
+def run_pipeline_stage(
+    stage_function, args, output_queue, stop_event, ls_errors, dict_stage_seconds
+):
+    """
+    Run one stage of run_dump_pipeline in its thread and time it.
+
+    The end marker is put on `output_queue` when the stage finishes. An error
+    is kept in `ls_errors` and stops the other stages.
+    """
+    start_time = time.perf_counter()
+    try:
+        stage_function(*args)
+        output_queue.put(PIPELINE_END)
+    except PipelineStopped:
+        pass
+    except Exception as e:
+        ls_errors.append(e)
+        stop_event.set()
+    finally:
+        dict_stage_seconds[stage_function.__name__] = time.perf_counter() - start_time
+
+
+def read_pipeline_chunks(dump_file, line_queue, lines_per_chunk):
+    """Reader stage: put chunks of (line_number, line) pairs on `line_queue`."""
+    line_number = 0
+    ls_numbered_lines = []
+    for line in dump_file:
+        ls_numbered_lines.append((line_number, line))
+        line_number += 1
+        if len(ls_numbered_lines) >= lines_per_chunk:
+            line_queue.put(
+                (ls_numbered_lines, dump_file.line_offset, dump_file.tell_bytes())
+            )
+            ls_numbered_lines = []
+    if ls_numbered_lines:
+        line_queue.put(
+            (ls_numbered_lines, dump_file.line_offset, dump_file.tell_bytes())
+        )
+
+
+def parse_pipeline_chunks(dump_type, line_queue, parsed_queue):
+    """Parser stage: parse the chunks of `line_queue` onto `parsed_queue`."""
+    while (chunk := line_queue.get()) != PIPELINE_END:
+        ls_numbered_lines, line_offset, bytes_read = chunk
+        parsed_rows = parse_numbered_dump_lines(dump_type, ls_numbered_lines)
+        parsed_queue.put(parsed_rows + (line_offset, bytes_read))
+        if parsed_rows[3]:
+            return
+
+
+def batch_pipeline_rows(
+    parsed_queue, batch_queue, stop_event, batch_row_num, max_rows_to_read
+):
+    """
+    Batcher stage: gather parsed chunks into batches of `batch_row_num` rows
+    and redirect rows on `batch_queue`, cut at `max_rows_to_read` rows.
+
+    Ends the pipeline itself, as the reader and parser may still be running
+    when the data ended early.
+    """
+    row_counter = 0
+    ls_rows = []
+    ls_work_author_rows = []
+    ls_redirect_rows = []
+    line_offset = bytes_read = None
+
+    while (parsed := parsed_queue.get()) != PIPELINE_END:
+        (
+            rows,
+            work_author_rows,
+            redirect_rows,
+            reached_end,
+            line_offset,
+            bytes_read,
+        ) = parsed
+        num_chunk_lines = len(rows) + len(redirect_rows)
+        rows, work_author_rows, redirect_rows, reached_limit = limit_parsed_rows(
+            rows, work_author_rows, redirect_rows, row_counter, max_rows_to_read
+        )
+        # the chunk's offset is only past the kept lines if none were cut
+        if len(rows) + len(redirect_rows) < num_chunk_lines:
+            line_offset = None
+
+        row_counter += len(rows)
+        ls_rows.extend(rows)
+        ls_work_author_rows.extend(work_author_rows)
+        ls_redirect_rows.extend(redirect_rows)
+        if len(ls_rows) + len(ls_redirect_rows) >= batch_row_num:
+            batch = (ls_rows, ls_work_author_rows, ls_redirect_rows)
+            batch_queue.put(batch + (line_offset, bytes_read))
+            ls_rows = []
+            ls_work_author_rows = []
+            ls_redirect_rows = []
+        if reached_end or reached_limit:
+            break
+
+    if ls_rows or ls_redirect_rows:
+        batch = (ls_rows, ls_work_author_rows, ls_redirect_rows)
+        batch_queue.put(batch + (line_offset, bytes_read))
+    batch_queue.put(PIPELINE_END)
+    stop_event.set()
+    raise PipelineStopped
+
+
+def run_dump_pipeline(
+    dump_type,
+    dump_file,
+    write_batch,
+    batch_row_num,
+    max_rows_to_read=None,
+    queue_size=PIPELINE_QUEUE_SIZE,
+    lines_per_chunk=PIPELINE_LINES_PER_CHUNK,
+):
+    """
+    Load a dump through reader -> parser -> batcher -> writer stages.
+
+    The reader, parser and batcher run in threads connected by bounded
+    StageQueues, and the writer runs in the calling thread. Disk reads and
+    decompression, JSON decoding and database waits overlap, while at most
+    `queue_size` chunks or batches wait between two stages whatever the size
+    of the dump.
+
+    Parameters:
+        dump_type (str): "authors" or "works".
+        dump_file (DumpFile): The open dump file, read from its current line.
+        write_batch (callable): Called as write_batch(rows, work_author_rows,
+            redirect_rows, line_offset) in file order, with rows as returned
+            by parse_numbered_dump_lines. `line_offset` is where a resumed
+            load can continue once the batch is committed, or None if the
+            batch was cut short by `max_rows_to_read`.
+        batch_row_num (int): Rows and redirect rows per written batch.
+        max_rows_to_read (int): Stop after this many record rows, see
+            limit_parsed_rows. Defaults to all rows.
+        queue_size (int): Items each queue holds before its producer blocks.
+        lines_per_chunk (int): Lines read and parsed together.
+
+    Returns:
+        tuple: (row_counter, bytes_read, dict_stage_stats) where row_counter
+            counts record rows and bytes_read is the position on disk of the
+            last written batch.
+    """
+    stop_event = threading.Event()
+    line_queue = StageQueue(queue_size, stop_event)
+    parsed_queue = StageQueue(queue_size, stop_event)
+    batch_queue = StageQueue(queue_size, stop_event)
+    dict_stage_seconds = {}
+    ls_errors = []
+
+    ls_threads = [
+        threading.Thread(
+            target=run_pipeline_stage,
+            args=(
+                stage_function,
+                args,
+                output_queue,
+                stop_event,
+                ls_errors,
+                dict_stage_seconds,
+            ),
+            name=f"dump_pipeline_{stage_function.__name__}",
+            daemon=True,
+        )
+        for stage_function, args, output_queue in (
+            (
+                read_pipeline_chunks,
+                (dump_file, line_queue, lines_per_chunk),
+                line_queue,
+            ),
+            (
+                parse_pipeline_chunks,
+                (dump_type, line_queue, parsed_queue),
+                parsed_queue,
+            ),
+            (
+                batch_pipeline_rows,
+                (
+                    parsed_queue,
+                    batch_queue,
+                    stop_event,
+                    batch_row_num,
+                    max_rows_to_read,
+                ),
+                batch_queue,
+            ),
+        )
+    ]
+
+    row_counter = 0
+    bytes_read = dump_file.tell_bytes()
+    writer_start_time = time.perf_counter()
+    try:
+        for thread in ls_threads:
+            thread.start()
+
+        with tqdm(
+            total=dump_file.total_bytes,
+            initial=bytes_read,
+            unit="B",
+            unit_scale=True,
+            desc=f"Processing {dump_type.title()}",
+        ) as progress_bar:
+            while (batch := batch_queue.get()) != PIPELINE_END:
+                rows, work_author_rows, redirect_rows, line_offset, bytes_read = batch
+                write_batch(rows, work_author_rows, redirect_rows, line_offset)
+                row_counter += len(rows)
+                progress_bar.update(bytes_read - progress_bar.n)
+    except PipelineStopped:
+        pass
+    finally:
+        stop_event.set()
+        for thread in ls_threads:
+            thread.join()
+    writer_seconds = time.perf_counter() - writer_start_time
+
+    if ls_errors:
+        raise ls_errors[0]
+
+    dict_stage_stats = {
+        "reader": get_pipeline_stage_stats(
+            dict_stage_seconds["read_pipeline_chunks"], None, line_queue
+        ),
+        "parser": get_pipeline_stage_stats(
+            dict_stage_seconds["parse_pipeline_chunks"], line_queue, parsed_queue
+        ),
+        "batcher": get_pipeline_stage_stats(
+            dict_stage_seconds["batch_pipeline_rows"], parsed_queue, batch_queue
+        ),
+        "writer": get_pipeline_stage_stats(writer_seconds, batch_queue, None),
+    }
+    return row_counter, bytes_read, dict_stage_stats
+
+
+# %%
@@ -1,14 +1,34 @@
 # %%
 # Imports #
-import glob
-import gzip
 import os
-import shutil
 
+from copy_shards import (
+    export_copy_shards,
+    get_copy_shards_manifest_path,
+    is_copy_shards_export_current,
+)
+from dump_catalog import get_dump_file_path, get_dump_load, record_dump_load
+from dump_sample import write_sampled_dumps, write_sampled_editions_dump
 from local_database_postgres import (
+    POSTGRES_DB,
+    POSTGRES_PORT,
+    POSTGRES_URL,
+    ensure_postgres_editions_tables,
+    ensure_postgres_fresh_build_tables,
     ensure_postgres_tables,
+    finalize_postgres_fresh_build,
+    load_copy_shards_postgres,
     load_db_authors_postgres,
+    load_db_authors_postgres_copy,
+    load_db_authors_postgres_parallel,
+    load_db_authors_postgres_pipeline,
+    load_db_editions_postgres_copy,
     load_db_works_postgres,
+    load_db_works_postgres_copy,
+    load_db_works_postgres_parallel,
+    load_db_works_postgres_partitioned,
+    load_db_works_postgres_pipeline,
+    migrate_postgres_storage_layout,
 )
 from utils.display_tools import pprint_df, pprint_dict, pprint_ls  # noqa
 
@@ -20,93 +40,205 @@ data_dumps_url = "https://openlibrary.org/developers/dumps"
 book_data_dir = os.path.join("F:\\", "book-data")
 
 MAX_ROWS_TO_READ = None  # Set to None to read all rows
+# Build a small database from a sample of works and exactly the authors they
+# reference, instead of the first MAX_ROWS_TO_READ rows (e.g. 0.01 or 50000)
+SAMPLE_FRACTION = None
+SAMPLE_SIZE = None
+# "parallel" parses in a process pool and writes with COPY on several connections,
+# "pipeline" overlaps reading, parsing and COPY writes in bounded stages,
+# "shards" exports the dump once to COPY-ready shard files and loads those,
+# "copy" streams COPY batches from one process, "upsert" inserts row by row
+LOADER_MODE = "copy"
+# Only write new and changed rows when refreshing from a newer dump ("copy" mode)
+INCREMENTAL_REFRESH = False
+# Continue an interrupted "pipeline", "copy" or "upsert" load from its checkpoint
+RESUME_LOAD = False
+# Load an empty database into unlogged, unindexed tables and build the keys at the end
+FRESH_BUILD = False
+# Hash-partition works and work_authors into this many partitions when creating
+# them, works are then loaded with one writer connection per group of partitions
+WORKS_PARTITIONS = None
+# "compact" stores covers and source_records as arrays and drops works.authors,
+# existing json layout tables are migrated in place before loading
+STORAGE_LAYOUT = "json"
+# Load the editions dump into the local ISBN lookup tables
+LOAD_EDITIONS = True
+EXTRACT_GZ_FILES = False  # Set to True to extract .gz dumps to .txt before loading
+# Load dumps again even if the catalog says they are already in the database
+FORCE_RELOAD = False
+
+# Name the catalog records loads under
+DATABASE_NAME = f"postgres://{POSTGRES_URL}:{POSTGRES_PORT}/{POSTGRES_DB}"
 
 # %%
 # Book Data #
 
 
-def extract_gz_file(file_path):
-    """
-    Extract a gzip file to a text file.
+def get_authors_text_file_path():
+    return get_dump_file_path(book_data_dir, "authors", extract=EXTRACT_GZ_FILES)
 
-    Parameters:
-        file_path (str): The path to the gzip file.
 
-    Returns:
-        str: The path to the extracted text file.
-    """
-    with gzip.open(file_path, "rb") as f_in:
-        with open(file_path.replace(".gz", ""), "wb") as f_out:
-            shutil.copyfileobj(f_in, f_out)
-    return file_path.replace(".gz", "")
+def get_works_text_file_path():
+    return get_dump_file_path(book_data_dir, "works", extract=EXTRACT_GZ_FILES)
 
 
-# %%
-# Extract or Load Authors Data #
+def get_editions_text_file_path():
+    return get_dump_file_path(book_data_dir, "editions", extract=EXTRACT_GZ_FILES)
 
 
-def get_authors_text_file_path():
-    ls_authors_files_in_book_data = glob.glob(
-        os.path.join(book_data_dir, "ol_dump_authors*.txt")
-    )
-
-    # if text file exists use it
-    if len(ls_authors_files_in_book_data) > 0:
-        print("Found text file for authors, skipping extraction")
-        authors_text_file_path = sorted(ls_authors_files_in_book_data)[0]
-        print(f"Text file path: {authors_text_file_path}")
-        return authors_text_file_path
-    else:
-        ls_gz_files = glob.glob(os.path.join(book_data_dir, "*.gz"))
-        if len(ls_gz_files) > 0:
-            gzip_path = sorted(ls_gz_files)[0]
-            print(f"Gzip path is: {gzip_path}")
-            authors_text_file_path = extract_gz_file(gzip_path)
-            print(f"Extraction complete. Text file path: {authors_text_file_path}")
-            return authors_text_file_path
-        else:
-            raise ValueError("Missing any file type")
+# %%
+# Load Data #
 
 
-# %%
-# Extract or Load Works Data #
+def load_dump(dump_type, dump_file_path):
+    """
+    Load a dump into Postgres with the loader selected by LOADER_MODE.
 
+    Skipped when the catalog shows this exact file was already fully loaded
+    into DATABASE_NAME, unless FORCE_RELOAD is set or it is a fresh build.
+    Complete loads are recorded in the catalog.
 
-def get_works_text_file_path():
-    ls_works_files_in_book_data = glob.glob(
-        os.path.join(book_data_dir, "ol_dump_works*.txt")
-    )
-
-    # if text file exists use it
-    if len(ls_works_files_in_book_data) > 0:
-        print("Found text file for works, skipping extraction")
-        works_text_file_path = sorted(ls_works_files_in_book_data)[0]
-        print(f"works_text_file_path: {works_text_file_path}")
-        return works_text_file_path
+    Returns:
+        dict or None: The load stats, None if the load was skipped.
+    """
+    dict_load = get_dump_load(dump_file_path, DATABASE_NAME)
+    if dict_load and not (FORCE_RELOAD or FRESH_BUILD):
+        print(
+            f"Skipping {dump_file_path}, loaded into {DATABASE_NAME} "
+            f"at {dict_load['loaded_at']}"
+        )
+        return None
+
+    if dump_type == "editions":
+        dict_stats = load_db_editions_postgres_copy(
+            dump_file_path,
+            max_rows_to_read=MAX_ROWS_TO_READ,
+            resume=RESUME_LOAD,
+        )
+    elif dump_type == "works" and WORKS_PARTITIONS:
+        dict_stats = load_db_works_postgres_partitioned(
+            dump_file_path, max_rows_to_read=MAX_ROWS_TO_READ
+        )
+    elif LOADER_MODE == "shards":
+        if not is_copy_shards_export_current(dump_file_path):
+            export_copy_shards(dump_type, dump_file_path)
+        dict_stats = load_copy_shards_postgres(
+            get_copy_shards_manifest_path(dump_file_path), fresh_build=FRESH_BUILD
+        )
+    elif LOADER_MODE == "parallel":
+        load_function = {
+            "authors": load_db_authors_postgres_parallel,
+            "works": load_db_works_postgres_parallel,
+        }[dump_type]
+        dict_stats = load_function(
+            dump_file_path,
+            max_rows_to_read=MAX_ROWS_TO_READ,
+            fresh_build=FRESH_BUILD,
+        )
+    elif LOADER_MODE == "pipeline":
+        load_function = {
+            "authors": load_db_authors_postgres_pipeline,
+            "works": load_db_works_postgres_pipeline,
+        }[dump_type]
+        dict_stats = load_function(
+            dump_file_path,
+            max_rows_to_read=MAX_ROWS_TO_READ,
+            resume=RESUME_LOAD,
+            fresh_build=FRESH_BUILD,
+        )
+    elif LOADER_MODE == "copy":
+        load_function = {
+            "authors": load_db_authors_postgres_copy,
+            "works": load_db_works_postgres_copy,
+        }[dump_type]
+        dict_stats = load_function(
+            dump_file_path,
+            max_rows_to_read=MAX_ROWS_TO_READ,
+            incremental=INCREMENTAL_REFRESH,
+            resume=RESUME_LOAD,
+            fresh_build=FRESH_BUILD,
+        )
     else:
-        ls_gz_files = glob.glob(os.path.join(book_data_dir, "*.gz"))
-        if len(ls_gz_files) > 0:
-            gzip_path = sorted(ls_gz_files)[0]
-            print(f"Gzip path is: {gzip_path}")
-            works_text_file_path = extract_gz_file(gzip_path)
-            print(f"Extraction complete. Text file path: {works_text_file_path}")
-            return works_text_file_path
-        else:
-            raise ValueError("Missing any file type")
+        load_function = {
+            "authors": load_db_authors_postgres,
+            "works": load_db_works_postgres,
+        }[dump_type]
+        dict_stats = load_function(
+            dump_file_path,
+            max_rows_to_read=MAX_ROWS_TO_READ,
+            resume=RESUME_LOAD,
+        )
+
+    if MAX_ROWS_TO_READ is None:
+        record_dump_load(dump_file_path, DATABASE_NAME, dict_stats)
+    return dict_stats
 
 
 # %%
 # Main #
 
 if __name__ == "__main__":
+    if RESUME_LOAD and LOADER_MODE in ("parallel", "shards"):
+        raise ValueError(f'The "{LOADER_MODE}" loader cannot resume a load')
+    if RESUME_LOAD and FRESH_BUILD:
+        raise ValueError("A fresh build cannot resume, start it again from the top")
+    if INCREMENTAL_REFRESH and (LOADER_MODE != "copy" or WORKS_PARTITIONS):
+        raise ValueError(
+            'INCREMENTAL_REFRESH needs the "copy" loader and unpartitioned works'
+        )
+
     authors_text_file_path = get_authors_text_file_path()
     works_text_file_path = get_works_text_file_path()
 
-    ensure_postgres_tables()
-
-    load_db_authors_postgres(authors_text_file_path, max_rows_to_read=MAX_ROWS_TO_READ)
-
-    load_db_works_postgres(works_text_file_path, max_rows_to_read=MAX_ROWS_TO_READ)
+    if SAMPLE_FRACTION or SAMPLE_SIZE:
+        (
+            authors_text_file_path,
+            works_text_file_path,
+            dict_sample_stats,
+        ) = write_sampled_dumps(
+            authors_text_file_path,
+            works_text_file_path,
+            sample_fraction=SAMPLE_FRACTION,
+            sample_size=SAMPLE_SIZE,
+        )
+        print("Sample:")
+        pprint_dict(dict_sample_stats)
+
+    if FRESH_BUILD:
+        if LOADER_MODE == "upsert":
+            raise ValueError("A fresh build needs the COPY based loaders")
+        if WORKS_PARTITIONS:
+            raise ValueError("A fresh build does not support partitioned tables")
+        ensure_postgres_fresh_build_tables()
+    else:
+        ensure_postgres_tables(num_partitions=WORKS_PARTITIONS, layout=STORAGE_LAYOUT)
+        if STORAGE_LAYOUT == "compact":
+            dict_migration_stats = migrate_postgres_storage_layout()
+            if dict_migration_stats:
+                print("Storage layout migration:")
+                pprint_dict(dict_migration_stats)
+
+    dict_authors_stats = load_dump("authors", authors_text_file_path)
+    dict_works_stats = load_dump("works", works_text_file_path)
+
+    if FRESH_BUILD:
+        finalize_postgres_fresh_build(layout=STORAGE_LAYOUT)
+
+    if LOAD_EDITIONS:
+        editions_text_file_path = get_editions_text_file_path()
+        if SAMPLE_FRACTION or SAMPLE_SIZE:
+            editions_text_file_path, _ = write_sampled_editions_dump(
+                editions_text_file_path, works_text_file_path
+            )
+        ensure_postgres_editions_tables()
+        dict_editions_stats = load_dump("editions", editions_text_file_path)
+        print("Editions load:")
+        pprint_dict(dict_editions_stats or {})
+
+    print("Authors load:")
+    pprint_dict(dict_authors_stats or {})
+    print("Works load:")
+    pprint_dict(dict_works_stats or {})
 
 
 # %%
@@ -0,0 +1,56 @@
+# %%
+# Imports #
+
+import numpy as np
+import pandas as pd
+
+from utils.display_tools import pprint_df, pprint_dict, pprint_ls  # noqa
+
+# %%
+# Variables #
+
+# Shapes query_postgres and query_sqlite can return their rows in:
+# "dataframe": a pandas DataFrame
+# "tuples": the list of row tuples as fetched
+# "column": the values of the first column as a flat list
+# "arrays": a dict of column name to NumPy array
+QUERY_OUTPUT_FORMATS = ("dataframe", "tuples", "column", "arrays")
+
+
+# %%
+# Query Results #
+
+
+def check_query_output(output):
+    if output not in QUERY_OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unknown query output {output!r}, expected one of {QUERY_OUTPUT_FORMATS}"
+        )
+
+
+def format_query_result(rows, columns, output="dataframe"):
+    """
+    Shape the fetched rows of a query as one of QUERY_OUTPUT_FORMATS.
+
+    Only "dataframe" builds a DataFrame, the other formats are made straight
+    from the row tuples for lookups that run often. Text columns of "arrays"
+    are object arrays of the str values rather than fixed width unicode.
+    """
+    check_query_output(output)
+    if output == "tuples":
+        return rows
+    if output == "column":
+        return [row[0] for row in rows]
+    if output == "arrays":
+        ls_column_values = list(zip(*rows)) if rows else [()] * len(columns)
+        dict_arrays = {}
+        for column, values in zip(columns, ls_column_values):
+            values = np.array(values)
+            if values.dtype.kind == "U":
+                values = values.astype(object)
+            dict_arrays[column] = values
+        return dict_arrays
+    return pd.DataFrame(rows, columns=columns)
+
+
+# %%
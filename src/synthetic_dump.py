@@ -0,0 +1,205 @@
+# %%
+# Imports #
+
+import datetime
+import gzip
+import io
+import json
+import os
+import random
+
+from utils.display_tools import pprint_df, pprint_dict, pprint_ls  # noqa
+
+# %%
+# Variables #
+
+SYNTHETIC_SEED = 42
+SYNTHETIC_START_DATE = datetime.datetime(2008, 4, 1)
+SYNTHETIC_DATE_RANGE_DAYS = 365 * 16
+
+# Number of authors listed on a work and how often it happens in the real dump,
+# most works have one author and a few have none or several
+AUTHOR_FAN_OUT_WEIGHTS = {0: 4, 1: 82, 2: 10, 3: 3, 4: 1}
+# Higher values concentrate works on fewer prolific authors
+AUTHOR_POPULARITY_SKEW = 3
+# Share of author references that point at authors missing from the dump
+MISSING_AUTHOR_SHARE = 0.01
+
+ls_words = (
+    "the a of and house night river garden letters shadow history stone "
+    "winter city song light road secret children war love island last "
+    "empire glass fire silent summer king daughter journey north memory"
+).split()
+ls_first_names = (
+    "Anna John Maria James Elena Robert Sofia David Clara Peter Ines Thomas "
+    "Laura Samuel Alice Henry Marta Paul Rosa Daniel"
+).split()
+ls_last_names = (
+    "Smith Garcia Müller Rossi Dubois Novak Silva Kowalski Jensen Tanaka "
+    "Brown Okafor Ivanova Nguyen Larsen Costa Weber Haddad Moreau Lindqvist"
+).split()
+
+
+# %%
+# Lines #
+
+
+def get_synthetic_timestamp(rng):
+    """Return a random dump timestamp (e.g. 2021-12-26T21:22:34.663256)."""
+    seconds = rng.randrange(SYNTHETIC_DATE_RANGE_DAYS * 24 * 3600)
+    timestamp = SYNTHETIC_START_DATE + datetime.timedelta(
+        seconds=seconds, microseconds=rng.randrange(1000000)
+    )
+    return timestamp.isoformat()
+
+
+def get_dump_line(line_type, key, revision, last_modified, record):
+    """Format one line of the five-column tab + JSON dump format."""
+    return (
+        f"{line_type}\t{key}\t{revision}\t{last_modified}\t"
+        f"{json.dumps(record, ensure_ascii=False)}\n"
+    )
+
+
+def get_synthetic_author_line(rng, author_number):
+    """Build the dump line of a synthetic author."""
+    key = f"/authors/OL{author_number}A"
+    revision = rng.randint(1, 8)
+    created = get_synthetic_timestamp(rng)
+    last_modified = max(created, get_synthetic_timestamp(rng))
+
+    record = {
+        "key": key,
+        "type": {"key": "/type/author"},
+        "name": f"{rng.choice(ls_first_names)} {rng.choice(ls_last_names)}",
+        "revision": revision,
+        "latest_revision": revision,
+        "created": {"type": "/type/datetime", "value": created},
+        "last_modified": {"type": "/type/datetime", "value": last_modified},
+    }
+    if rng.random() < 0.6:
+        record["source_records"] = [
+            f"bwb:{rng.randrange(10**12, 10**13)}"
+            for _ in range(rng.randint(1, 3))
+        ]
+
+    return get_dump_line("/type/author", key, revision, last_modified, record)
+
+
+def get_synthetic_author_number(rng, num_authors):
+    """
+    Pick the author of a work, skewed towards the low author numbers so that a
+    few authors have many works like in the real dump.
+    """
+    if rng.random() < MISSING_AUTHOR_SHARE:
+        return num_authors + 1 + rng.randrange(num_authors)
+    return 1 + int(num_authors * rng.random() ** AUTHOR_POPULARITY_SKEW)
+
+
+def get_synthetic_work_line(rng, work_number, num_authors):
+    """Build the dump line of a synthetic work with its author references."""
+    key = f"/works/OL{work_number}W"
+    revision = rng.randint(1, 12)
+    created = get_synthetic_timestamp(rng)
+    last_modified = max(created, get_synthetic_timestamp(rng))
+
+    num_work_authors = rng.choices(
+        list(AUTHOR_FAN_OUT_WEIGHTS), weights=list(AUTHOR_FAN_OUT_WEIGHTS.values())
+    )[0]
+    ls_author_numbers = sorted(
+        {get_synthetic_author_number(rng, num_authors) for _ in range(num_work_authors)}
+    )
+
+    ls_author_refs = []
+    for author_number in ls_author_numbers:
+        author_key = f"/authors/OL{author_number}A"
+        # the dump stores both reference styles
+        if rng.random() < 0.9:
+            ls_author_refs.append(
+                {"type": {"key": "/type/author_role"}, "author": {"key": author_key}}
+            )
+        else:
+            ls_author_refs.append({"author": author_key})
+
+    title_words = rng.sample(ls_words, rng.randint(1, 6))
+    record = {
+        "key": key,
+        "type": {"key": "/type/work"},
+        "title": " ".join(title_words).capitalize(),
+        "authors": ls_author_refs,
+        "revision": revision,
+        "latest_revision": revision,
+        "created": {"type": "/type/datetime", "value": created},
+        "last_modified": {"type": "/type/datetime", "value": last_modified},
+    }
+    if rng.random() < 0.4:
+        record["covers"] = [
+            rng.randrange(1, 15000000) for _ in range(rng.randint(1, 3))
+        ]
+    if rng.random() < 0.3:
+        record["subjects"] = rng.sample(ls_words, rng.randint(1, 5))
+
+    return get_dump_line("/type/work", key, revision, last_modified, record)
+
+
+# %%
+# Files #
+
+
+def open_dump_for_writing(file_path):
+    """Open a dump file for writing, gzip compressed if the path ends in .gz."""
+    if file_path.endswith(".gz"):
+        # fast compression, the files are rewritten for every benchmark size,
+        # and a fixed header mtime keeps the same arguments byte-identical
+        return io.TextIOWrapper(
+            gzip.GzipFile(file_path, "wb", compresslevel=1, mtime=0),
+            encoding="utf-8",
+        )
+    return open(file_path, "w", encoding="utf-8")
+
+
+def write_synthetic_dumps(
+    output_dir, num_authors, num_works, seed=SYNTHETIC_SEED, gzip_files=False
+):
+    """
+    Write a deterministic synthetic authors dump and works dump.
+
+    The same arguments always give byte-identical files. The works reference
+    the authors with a skewed fan-out, and a small share of the references
+    point at authors missing from the authors dump, like the real dumps.
+
+    Parameters:
+        output_dir (str): Directory the dump files are written to.
+        num_authors (int): Number of author lines.
+        num_works (int): Number of work lines.
+        seed (int): Seed of the random generator.
+        gzip_files (bool): Write .txt.gz files instead of .txt files.
+
+    Returns:
+        tuple: (authors_dump_path, works_dump_path)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    extension = ".txt.gz" if gzip_files else ".txt"
+    authors_dump_path = os.path.join(
+        output_dir, f"ol_dump_authors_synthetic_{num_authors}_{seed}{extension}"
+    )
+    works_dump_path = os.path.join(
+        output_dir, f"ol_dump_works_synthetic_{num_works}_{seed}{extension}"
+    )
+
+    rng = random.Random(seed)
+    with open_dump_for_writing(authors_dump_path) as f_out:
+        for author_number in range(1, num_authors + 1):
+            f_out.write(get_synthetic_author_line(rng, author_number))
+
+    rng = random.Random(seed + 1)
+    with open_dump_for_writing(works_dump_path) as f_out:
+        for work_number in range(1, num_works + 1):
+            f_out.write(get_synthetic_work_line(rng, work_number, num_authors))
+
+    print(f"Wrote {num_authors} authors to {authors_dump_path}")
+    print(f"Wrote {num_works} works to {works_dump_path}")
+    return authors_dump_path, works_dump_path
+
+
+# %%
@@ -0,0 +1,31 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+# local_database_sqlite connects when it is imported, keep it off the real database
+os.environ["SQLITE_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "book_data.db")
+
+from synthetic_dump import get_dump_line  # noqa: E402
+
+
+@pytest.fixture
+def write_dump(tmp_path):
+    """Write (line_type, key, revision, record) lines to a dump file in tmp_path."""
+
+    def write(file_name, ls_lines):
+        file_path = str(tmp_path / file_name)
+        with open(file_path, "w", encoding="utf-8") as f:
+            for line_type, key, revision, record in ls_lines:
+                f.write(
+                    get_dump_line(
+                        line_type, key, revision, "2021-12-26T21:22:34.663256", record
+                    )
+                )
+        return file_path
+
+    return write
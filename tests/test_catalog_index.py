@@ -0,0 +1,113 @@
+import sqlite3
+
+from catalog_index import (
+    CatalogIndex,
+    build_catalog_index_from_dumps,
+    build_catalog_index_from_tables,
+    get_text_tokens,
+)
+
+
+def write_catalog_dumps(write_dump):
+    authors_dump_path = write_dump(
+        "ol_dump_authors.txt",
+        [
+            ("/type/author", "/authors/OL1A", 1, {"name": "Émile Zola"}),
+            ("/type/author", "/authors/OL2A", 1, {"name": "Anna Smith"}),
+            ("/type/redirect", "/authors/OL3A", 1, {"location": "/authors/OL2A"}),
+        ],
+    )
+    works_dump_path = write_dump(
+        "ol_dump_works.txt",
+        [
+            (
+                "/type/work",
+                "/works/OL1W",
+                1,
+                {
+                    "title": "The Winter Garden",
+                    "authors": [{"author": {"key": "/authors/OL1A"}}],
+                },
+            ),
+            (
+                "/type/work",
+                "/works/OL2W",
+                1,
+                {
+                    "title": "Garden of Letters",
+                    "authors": [{"author": "/authors/OL3A"}],
+                },
+            ),
+            ("/type/work", "/works/OL3W", 1, {"title": "Winter Song"}),
+        ],
+    )
+    return authors_dump_path, works_dump_path
+
+
+def test_get_text_tokens():
+    assert get_text_tokens("Émile's GARDEN_of-letters") == [
+        "emile",
+        "s",
+        "garden",
+        "of",
+        "letters",
+    ]
+
+
+def test_catalog_index_from_dumps(tmp_path, write_dump):
+    authors_dump_path, works_dump_path = write_catalog_dumps(write_dump)
+    index_path = build_catalog_index_from_dumps(
+        authors_dump_path, works_dump_path, str(tmp_path / "works.catidx")
+    )
+
+    with CatalogIndex(index_path) as catalog_index:
+        assert len(catalog_index) == 3
+        assert catalog_index.find_works("winter garden") == [
+            {
+                "key": "/works/OL1W",
+                "title": "The Winter Garden",
+                "authors": [{"key": "/authors/OL1A", "name": "Émile Zola"}],
+            }
+        ]
+        # links to a redirected author point at its target
+        assert catalog_index.find_works("LETTERS")[0]["authors"] == [
+            {"key": "/authors/OL2A", "name": "Anna Smith"}
+        ]
+        assert [work["key"] for work in catalog_index.find_works("winter")] == [
+            "/works/OL1W",
+            "/works/OL3W",
+        ]
+        assert len(catalog_index.find_works("garden", limit=1)) == 1
+        assert catalog_index.find_works("winter missing") == []
+        assert catalog_index.find_works("") == []
+
+
+def test_catalog_index_from_tables(tmp_path):
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(
+        """
+        CREATE TABLE authors (author_key TEXT, name TEXT);
+        CREATE TABLE works (work_key TEXT, title TEXT);
+        CREATE TABLE work_authors (work_key TEXT, author_key TEXT);
+        INSERT INTO authors VALUES
+            ('/authors/OL1A', 'Anna Smith'), ('/authors/OL2A', NULL);
+        INSERT INTO works VALUES
+            ('/works/OL1W', 'Silent River'), ('/works/OL2W', 'River');
+        INSERT INTO work_authors VALUES
+            ('/works/OL1W', '/authors/OL1A'), ('/works/OL1W', '/authors/OL2A');
+        """
+    )
+    index_path = build_catalog_index_from_tables(conn, str(tmp_path / "tables.catidx"))
+
+    with CatalogIndex(index_path) as catalog_index:
+        assert catalog_index.find_works("river") == [
+            {
+                "key": "/works/OL1W",
+                "title": "Silent River",
+                "authors": [
+                    {"key": "/authors/OL1A", "name": "Anna Smith"},
+                    {"key": "/authors/OL2A", "name": ""},
+                ],
+            },
+            {"key": "/works/OL2W", "title": "River", "authors": []},
+        ]
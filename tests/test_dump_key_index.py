@@ -0,0 +1,50 @@
+import gzip
+
+import pytest
+
+from dump_key_index import DumpKeyIndex, build_dump_key_index
+
+LS_WORK_LINES = [
+    ("/type/work", "/works/OL2W", 1, {"title": "Second"}),
+    ("/type/work", "/works/OL1W", 1, {"title": "First"}),
+    ("/type/work", "/works/custom", 1, {"title": "Custom"}),
+    ("/type/work", "/works/OL2W", 2, {"title": "Second, revised"}),
+]
+
+
+@pytest.mark.parametrize("gzip_dump", [False, True])
+def test_dump_key_index_lookups(tmp_path, write_dump, gzip_dump):
+    dump_path = write_dump("ol_dump_works.txt", LS_WORK_LINES)
+    if gzip_dump:
+        with open(dump_path, "rb") as f_in, gzip.open(dump_path + ".gz", "wb") as f_out:
+            f_out.write(f_in.read())
+        dump_path += ".gz"
+
+    index_path = build_dump_key_index(dump_path, str(tmp_path / "works.keyidx"))
+    with DumpKeyIndex(index_path) as key_index:
+        assert len(key_index) == 3
+        # the last line of a key wins
+        assert key_index.get_record("/works/OL2W") == {"title": "Second, revised"}
+        assert key_index.get_line("/works/OL1W").startswith("/type/work\t/works/OL1W")
+        assert key_index.get_record("/works/custom") == {"title": "Custom"}
+        # same key number, different prefix
+        assert key_index.get_line("/authors/OL1A") is None
+        assert key_index.get_record("/works/OL3W") is None
+        assert key_index.get_records(["/works/OL1W", "/works/OL3W"]) == {
+            "/works/OL1W": {"title": "First"}
+        }
+
+
+@pytest.mark.parametrize("file_name", ["ol_dump_works.txt", "ol_dump_works.txt.gz"])
+def test_dump_key_index_of_empty_dump(tmp_path, file_name):
+    dump_path = str(tmp_path / file_name)
+    if file_name.endswith(".gz"):
+        with gzip.open(dump_path, "wb"):
+            pass
+    else:
+        open(dump_path, "wb").close()
+
+    index_path = build_dump_key_index(dump_path, str(tmp_path / "empty.keyidx"))
+    with DumpKeyIndex(index_path) as key_index:
+        assert len(key_index) == 0
+        assert key_index.get_record("/works/OL1W") is None
@@ -0,0 +1,42 @@
+from dump_sample import iter_sampled_work_lines, write_sampled_dumps
+
+
+def write_sample_dumps(write_dump):
+    authors_dump_path = write_dump(
+        "ol_dump_authors.txt",
+        [("/type/author", "/authors/OL1A", 1, {"name": "Anna Smith"})],
+    )
+    ls_work_lines = []
+    for number in range(1, 6):
+        ls_work_lines.append(
+            ("/type/redirect", f"/works/OL{number}0W", 1, {"location": "/works/OL1W"})
+        )
+        ls_work_lines.append(
+            (
+                "/type/work",
+                f"/works/OL{number}W",
+                1,
+                {"title": "Stone City", "authors": [{"author": "/authors/OL1A"}]},
+            )
+        )
+    works_dump_path = write_dump("ol_dump_works.txt", ls_work_lines)
+    return authors_dump_path, works_dump_path
+
+
+def test_sample_skips_redirect_lines(tmp_path, write_dump):
+    authors_dump_path, works_dump_path = write_sample_dumps(write_dump)
+
+    ls_lines = list(iter_sampled_work_lines(works_dump_path, sample_size=3))
+    assert len(ls_lines) == 3
+    assert all(line.startswith("/type/work\t") for line in ls_lines)
+    ls_lines = list(iter_sampled_work_lines(works_dump_path, sample_fraction=1.0))
+    assert len(ls_lines) == 5
+
+    _, _, dict_stats = write_sampled_dumps(
+        authors_dump_path,
+        works_dump_path,
+        sample_size=10,
+        output_dir=str(tmp_path / "samples"),
+    )
+    assert dict_stats["works"] == dict_stats["work_authors"] == 5
+    assert dict_stats["authors"] == 1
@@ -0,0 +1,150 @@
+import sqlite3
+
+import pytest
+
+import local_database_sqlite
+from synthetic_dump import write_synthetic_dumps
+
+LS_TABLES = ("authors", "works", "work_authors", "redirects")
+
+
+@pytest.fixture
+def open_sqlite_db(tmp_path, monkeypatch):
+    """Point the loaders of local_database_sqlite at a new database in tmp_path."""
+
+    def open_db(file_name):
+        monkeypatch.setattr(
+            local_database_sqlite, "SQLITE_DB_PATH", str(tmp_path / file_name)
+        )
+        conn, cursor = local_database_sqlite.get_sqlite_db_conn_cursor()
+        monkeypatch.setattr(local_database_sqlite, "sqlite_conn", conn)
+        monkeypatch.setattr(local_database_sqlite, "sqlite_cursor", cursor)
+        return conn
+
+    return open_db
+
+
+def get_table_rows(conn):
+    dict_table_rows = {
+        table: sorted(conn.execute(f"SELECT * FROM {table}").fetchall())
+        for table in LS_TABLES
+    }
+    for fts_table, key_column, text_column in (
+        local_database_sqlite.DICT_SEARCH_INDEXES.values()
+    ):
+        dict_table_rows[fts_table] = sorted(
+            conn.execute(
+                f"SELECT rowid, {key_column}, {text_column} FROM {fts_table}"
+            ).fetchall()
+        )
+    return dict_table_rows
+
+
+def load_serial_and_bulk(open_sqlite_db, authors_dump_path, works_dump_path, **kwargs):
+    serial_conn = open_sqlite_db("serial.db")
+    local_database_sqlite.load_db_authors_sqlite(authors_dump_path, **kwargs)
+    local_database_sqlite.load_db_works_sqlite(works_dump_path, **kwargs)
+
+    bulk_conn = open_sqlite_db("bulk.db")
+    dict_author_stats = local_database_sqlite.load_db_authors_sqlite_bulk(
+        authors_dump_path, **kwargs
+    )
+    dict_work_stats = local_database_sqlite.load_db_works_sqlite_bulk(
+        works_dump_path, **kwargs
+    )
+    return serial_conn, bulk_conn, dict_author_stats, dict_work_stats
+
+
+def test_serial_and_bulk_loads_match(tmp_path, open_sqlite_db):
+    authors_dump_path, works_dump_path = write_synthetic_dumps(
+        str(tmp_path / "dumps"), 200, 1000, gzip_files=True
+    )
+    serial_conn, bulk_conn, _, dict_work_stats = load_serial_and_bulk(
+        open_sqlite_db, authors_dump_path, works_dump_path
+    )
+
+    dict_serial_rows = get_table_rows(serial_conn)
+    assert len(dict_serial_rows["works"]) == dict_work_stats["rows"] == 1000
+    assert len(dict_serial_rows["works_fts"]) == 1000
+    assert dict_serial_rows == get_table_rows(bulk_conn)
+
+
+def test_serial_and_bulk_redirects_match(open_sqlite_db, write_dump):
+    authors_dump_path = write_dump(
+        "ol_dump_authors.txt",
+        [
+            ("/type/author", "/authors/OL1A", 1, {"name": "Anna Smith"}),
+            ("/type/author", "/authors/OL2A", 1, {"name": "John Smith"}),
+            ("/type/redirect", "/authors/OL2A", 2, {"location": "/authors/OL1A"}),
+            ("/type/author", "/authors/OL3A", 1, {"name": "Maria Rossi"}),
+        ],
+    )
+    works_dump_path = write_dump(
+        "ol_dump_works.txt",
+        [
+            ("/type/delete", "/works/OL1W", 2, {}),
+            (
+                "/type/work",
+                "/works/OL1W",
+                3,
+                {"title": "Night Road", "authors": [{"author": "/authors/OL2A"}]},
+            ),
+            ("/type/work", "/works/OL2W", 1, {"title": "Glass Fire"}),
+            ("/type/delete", "/works/OL2W", 2, {}),
+            ("/type/work", "/works/OL3W", 1, {"title": "Stone City"}),
+        ],
+    )
+    serial_conn, bulk_conn, dict_author_stats, dict_work_stats = load_serial_and_bulk(
+        open_sqlite_db, authors_dump_path, works_dump_path
+    )
+
+    dict_serial_rows = get_table_rows(serial_conn)
+    assert dict_serial_rows == get_table_rows(bulk_conn)
+    # redirect and delete lines are not counted as rows
+    assert (dict_author_stats["rows"], dict_work_stats["rows"]) == (3, 3)
+    assert [row[0] for row in dict_serial_rows["authors"]] == [
+        "/authors/OL1A",
+        "/authors/OL3A",
+    ]
+    assert [row[0] for row in dict_serial_rows["works"]] == [
+        "/works/OL1W",
+        "/works/OL3W",
+    ]
+    assert dict_serial_rows["work_authors"] == [("/works/OL1W", "/authors/OL1A")]
+    # deleted keys are only removed
+    assert dict_serial_rows["redirects"] == [("/authors/OL2A", "/authors/OL1A")]
+
+
+def test_serial_and_bulk_max_rows_match(tmp_path, open_sqlite_db):
+    authors_dump_path, works_dump_path = write_synthetic_dumps(
+        str(tmp_path / "dumps"), 100, 500
+    )
+    serial_conn, bulk_conn, _, dict_work_stats = load_serial_and_bulk(
+        open_sqlite_db, authors_dump_path, works_dump_path, max_rows_to_read=150
+    )
+
+    assert dict_work_stats["rows"] == 150
+    assert get_table_rows(serial_conn) == get_table_rows(bulk_conn)
+
+
+def test_existing_database_gets_search_indexes(tmp_path, open_sqlite_db):
+    conn = sqlite3.connect(str(tmp_path / "old.db"))
+    conn.execute("CREATE TABLE works (work_key TEXT PRIMARY KEY, title TEXT)")
+    conn.execute("INSERT INTO works VALUES ('/works/OL7W', 'Silent Summer')")
+    conn.commit()
+    conn.close()
+
+    conn = open_sqlite_db("old.db")
+    assert conn.execute("SELECT rowid, work_key FROM works_fts").fetchall() == [
+        (7, "/works/OL7W")
+    ]
+    assert conn.execute("SELECT COUNT(*) FROM authors_fts").fetchone() == (0,)
+
+
+def test_query_sqlite_statement_without_rows():
+    conn = sqlite3.connect(":memory:")
+    assert local_database_sqlite.query_sqlite(conn, "CREATE TABLE t (a)") is None
+    query = "INSERT INTO t VALUES (?)"
+    assert local_database_sqlite.query_sqlite(conn, query, (1,)) is None
+    query = "SELECT a FROM t"
+    assert local_database_sqlite.query_sqlite(conn, query, output="column") == [1]
@@ -0,0 +1,178 @@
+import gzip
+
+import pytest
+
+import open_library_dump
+from open_library_dump import (
+    DUMP_LINE_END,
+    DUMP_LINE_SKIP,
+    DumpFile,
+    RevisionMap,
+    get_redirect_row,
+    iter_dump_records,
+    limit_parsed_rows,
+    load_checkpoint,
+    normalize_isbn,
+    parse_dump_line,
+    run_dump_pipeline,
+    save_checkpoint,
+)
+
+AUTHOR_LINE = '/type/author\t/authors/OL1A\t3\t2021-12-26T21:22:34\t{"name": "Anna"}\n'
+
+
+def test_parse_dump_line():
+    assert parse_dump_line(AUTHOR_LINE) == (
+        "/type/author",
+        "/authors/OL1A",
+        "3",
+        "2021-12-26T21:22:34",
+        {"name": "Anna"},
+    )
+    assert parse_dump_line("  \n") is DUMP_LINE_SKIP
+    assert parse_dump_line("/type/author\t/authors/OL1A\n") is DUMP_LINE_END
+    assert parse_dump_line(AUTHOR_LINE, line_types={"/type/work"}) is DUMP_LINE_SKIP
+    assert parse_dump_line(AUTHOR_LINE, keys={"/authors/OL2A"}) is DUMP_LINE_SKIP
+    bad_json_line = "/type/author\t/authors/OL1A\t3\t2021\t{broken\n"
+    assert parse_dump_line(bad_json_line) is DUMP_LINE_SKIP
+
+
+def test_iter_dump_records_stops_at_short_line():
+    lines = [AUTHOR_LINE, "\n", "short\tline\n", AUTHOR_LINE]
+    assert [record[1] for record in iter_dump_records(lines)] == ["/authors/OL1A"]
+
+
+def test_iter_dump_records_skips_unchanged_revisions():
+    revision_map = RevisionMap([("/authors/OL1A", 3)])
+    lines = [AUTHOR_LINE, AUTHOR_LINE.replace("\t3\t", "\t4\t")]
+    assert [record[2] for record in iter_dump_records(lines, revision_map)] == ["4"]
+    assert revision_map.unchanged_count == 1
+
+
+def test_dump_file_reads_gzip_and_skips_to_offset(tmp_path):
+    file_path = str(tmp_path / "ol_dump_authors.txt.gz")
+    with gzip.open(file_path, "wt", encoding="utf-8") as f:
+        f.write(AUTHOR_LINE + AUTHOR_LINE.replace("OL1A", "OL2A"))
+
+    with DumpFile(file_path) as dump_file:
+        assert next(iter(dump_file)) == AUTHOR_LINE
+        line_offset = dump_file.line_offset
+    with DumpFile(file_path, line_offset) as dump_file:
+        assert [record[1] for record in iter_dump_records(dump_file)] == [
+            "/authors/OL2A"
+        ]
+
+
+def test_checkpoint_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(open_library_dump, "CHECKPOINT_DIR", str(tmp_path))
+    dump_path = str(tmp_path / "ol_dump_authors.txt")
+    with open(dump_path, "w", encoding="utf-8") as f:
+        f.write(AUTHOR_LINE * 3)
+    checkpoint_path = str(tmp_path / "authors.checkpoint.json")
+
+    assert load_checkpoint(checkpoint_path, dump_path) == (0, 0)
+    with DumpFile(dump_path) as dump_file:
+        for _ in zip(range(2), dump_file):
+            pass
+        save_checkpoint(checkpoint_path, dump_file, 2)
+    assert load_checkpoint(checkpoint_path, dump_path) == (2 * len(AUTHOR_LINE), 2)
+
+    # a changed dump file does not resume from the old checkpoint
+    with open(dump_path, "a", encoding="utf-8") as f:
+        f.write(AUTHOR_LINE)
+    assert load_checkpoint(checkpoint_path, dump_path) == (0, 0)
+
+
+def test_revision_map():
+    revision_map = RevisionMap(
+        [
+            ("/works/OL20W", 2),
+            ("/works/OL3W", 7),
+            ("/authors/OL5A", None),
+            ("/works/custom", 1),
+        ]
+    )
+    assert len(revision_map) == 3
+    assert revision_map.get("/works/OL3W") == 7
+    assert revision_map.get("/works/OL20W") == 2
+    assert revision_map.get("/authors/OL5A") is None
+    assert revision_map.get("/works/custom") == 1
+    assert revision_map.get("/works/OL4W") is None
+    assert revision_map.is_unchanged("/works/OL3W", "7")
+    assert not revision_map.is_unchanged("/works/OL3W", "8")
+    assert not revision_map.is_unchanged("/works/OL3W", "")
+    assert revision_map.unchanged_count == 1
+
+
+def test_get_redirect_row():
+    assert get_redirect_row(
+        "/type/redirect", "/works/OL1W", {"location": "/works/OL2W"}
+    ) == ("/works/OL1W", "/works/OL2W")
+    assert get_redirect_row("/type/delete", "/works/OL1W", {}) == ("/works/OL1W", None)
+
+
+@pytest.mark.parametrize(
+    "isbn, expected",
+    [
+        ("978-0-306-40615-7", "9780306406157"),
+        ("0-306-40615-2", "9780306406157"),
+        ("0 8044 2957 x", "9780804429573"),
+        ("9780306406158", None),
+        ("0306406153", None),
+        ("12345", None),
+    ],
+)
+def test_normalize_isbn(isbn, expected):
+    assert normalize_isbn(isbn) == expected
+
+
+def test_limit_parsed_rows_counts_records_only():
+    rows = [(1, "/works/OL1W"), (3, "/works/OL2W"), (5, "/works/OL3W")]
+    links = [("/works/OL1W", "/authors/OL1A"), ("/works/OL3W", "/authors/OL2A")]
+    redirects = [(2, "/works/OL9W", None), (4, "/works/OL8W", None)]
+
+    assert limit_parsed_rows(rows, links, redirects, 0, 10) == (
+        rows,
+        links,
+        redirects,
+        False,
+    )
+    assert limit_parsed_rows(rows, links, redirects, 8, 10) == (
+        rows[:2],
+        links[:1],
+        redirects[:1],
+        True,
+    )
+
+
+@pytest.mark.parametrize("max_rows_to_read, offset_kept", [(4, True), (3, False)])
+def test_run_dump_pipeline_keeps_offset_at_chunk_boundary(
+    write_dump, max_rows_to_read, offset_kept
+):
+    dump_path = write_dump(
+        "ol_dump_works.txt",
+        [
+            ("/type/work", f"/works/OL{number}W", 1, {"title": "Stone City"})
+            for number in range(1, 7)
+        ],
+    )
+    ls_batches = []
+
+    def write_batch(rows, work_author_rows, redirect_rows, line_offset):
+        ls_batches.append((len(rows), line_offset))
+
+    with DumpFile(dump_path) as dump_file:
+        row_counter, _, _ = run_dump_pipeline(
+            "works",
+            dump_file,
+            write_batch,
+            batch_row_num=100,
+            max_rows_to_read=max_rows_to_read,
+            lines_per_chunk=2,
+        )
+
+    assert row_counter == max_rows_to_read
+    last_line_offset = ls_batches[-1][1]
+    with open(dump_path, encoding="utf-8") as f:
+        line_offset = sum(len(line) for line in f.readlines()[:4])
+    assert last_line_offset == (line_offset if offset_kept else None)
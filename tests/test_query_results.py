@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from query_results import format_query_result
+
+ROWS = [("/works/OL1W", 3), ("/works/OL2W", 5)]
+COLUMNS = ["work_key", "revision"]
+
+
+def test_format_query_result_dataframe():
+    df = format_query_result(ROWS, COLUMNS)
+    assert list(df.columns) == COLUMNS
+    assert df["revision"].tolist() == [3, 5]
+
+
+def test_format_query_result_tuples_and_column():
+    assert format_query_result(ROWS, COLUMNS, "tuples") == ROWS
+    assert format_query_result(ROWS, COLUMNS, "column") == [
+        "/works/OL1W",
+        "/works/OL2W",
+    ]
+
+
+def test_format_query_result_arrays():
+    dict_arrays = format_query_result(ROWS, COLUMNS, "arrays")
+    assert dict_arrays["work_key"].dtype == object
+    assert dict_arrays["work_key"].tolist() == ["/works/OL1W", "/works/OL2W"]
+    np.testing.assert_array_equal(dict_arrays["revision"], [3, 5])
+
+    dict_empty = format_query_result([], COLUMNS, "arrays")
+    assert list(dict_empty) == COLUMNS
+    assert all(len(values) == 0 for values in dict_empty.values())
+
+
+def test_format_query_result_unknown_output():
+    with pytest.raises(ValueError):
+        format_query_result(ROWS, COLUMNS, "json")